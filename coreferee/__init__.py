@@ -6,6 +6,11 @@ import warnings
 
 warnings.filterwarnings("ignore", message=r"\[W007\]", category=UserWarning)
 
-import coreferee.manager
+from importlib.util import find_spec
 
-coreferee.manager.CorefereeBroker.set_extensions()
+# Without spaCy only the NumPy runtime in *coreferee.runtime* can be used, so the
+# pipeline component is only registered when spaCy is installed
+if find_spec("spacy") is not None:
+    import coreferee.manager
+
+    coreferee.manager.CorefereeBroker.set_extensions()
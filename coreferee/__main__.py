@@ -2,9 +2,13 @@ import argparse
 import os
 import sys
 import pkg_resources
+import spacy
 from spacy.util import run_command
 from .training.train import TrainingManager
 from .manager import COMMON_MODELS_PACKAGE_NAMEPART
+from .quantisation import QUANTISATION_DTYPES
+from .inference import export_runtime_bundle, load_thinc_model
+from .corpus import CorpusAnnotator, OUTPUT_FORMATS, SHARD_SIZE
 
 DOWNLOAD_URL = "https://github.com/richardpaulhudson/coreferee/raw/master/models"
 
@@ -19,8 +23,23 @@ check_parser = subparsers.add_parser(
     "check",
     help="Check models for a language, e.g. to verify that the same performance is obtained with a new spaCy model. Loads and runs the same test documents as when running *train* but using the existing Coreferee models. Must be executed from the root directory of the checked-out repository. Type *python -m coreferee check -h* for more information.",
 )
+quantise_parser = subparsers.add_parser(
+    "quantise",
+    help="Write copies of the existing models for a language in compressed storage at reduced precision alongside the full-precision models and report their accuracy and size compared with the full-precision models. Compressed storage reduces the size of the model files only: the weights are expanded back to float32 when they are loaded, so scoring is no faster. Must be executed from the root directory of the checked-out repository. Type *python -m coreferee quantise -h* for more information.",
+)
+benchmark_parser = subparsers.add_parser(
+    "benchmark",
+    help="Report the accuracy and speed of the existing models for a language on the test documents when evaluating different numbers of neural ensemble members. Must be executed from the root directory of the checked-out repository. Type *python -m coreferee benchmark -h* for more information.",
+)
+distill_parser = subparsers.add_parser(
+    "distill",
+    help="Train a compact single-member model for a language on the scores that the existing models assign to the training documents, write it alongside the existing models and report its accuracy and speed on the test documents compared with the existing models. Must be executed from the root directory of the checked-out repository. Type *python -m coreferee distill -h* for more information.",
+)
 train_args = train_parser.add_argument_group("required arguments")
 check_args = check_parser.add_argument_group("required arguments")
+quantise_args = quantise_parser.add_argument_group("required arguments")
+benchmark_args = benchmark_parser.add_argument_group("required arguments")
+distill_args = distill_parser.add_argument_group("required arguments")
 train_args.add_argument(
     "--lang",
     dest="lang",
@@ -69,6 +88,97 @@ check_args.add_argument(
     required=True,
     help="The path of the directory to which to write log files",
 )
+quantise_args.add_argument(
+    "--lang",
+    dest="lang",
+    required=True,
+    help="The ISO 639-1 code for the language to quantise",
+)
+quantise_args.add_argument(
+    "--loader_classes",
+    dest="loader_classes",
+    required=True,
+    help="The class name(s) of the training data loader within *coreferee.training.loaders*. Multiple class names should be comma-separated.",
+)
+quantise_args.add_argument(
+    "--data_dir",
+    dest="data_dir",
+    required=True,
+    help="The path of the directory that contains the training data",
+)
+quantise_args.add_argument(
+    "--log_dir",
+    dest="log_dir",
+    required=True,
+    help="The path of the directory to which to write log files",
+)
+quantise_parser.add_argument(
+    "--dtype",
+    dest="dtype",
+    default="int8",
+    choices=QUANTISATION_DTYPES,
+    help="The type in which to store the weights in the model file",
+)
+benchmark_args.add_argument(
+    "--lang",
+    dest="lang",
+    required=True,
+    help="The ISO 639-1 code for the language to benchmark",
+)
+benchmark_args.add_argument(
+    "--loader_classes",
+    dest="loader_classes",
+    required=True,
+    help="The class name(s) of the training data loader within *coreferee.training.loaders*. Multiple class names should be comma-separated.",
+)
+benchmark_args.add_argument(
+    "--data_dir",
+    dest="data_dir",
+    required=True,
+    help="The path of the directory that contains the training data",
+)
+benchmark_args.add_argument(
+    "--log_dir",
+    dest="log_dir",
+    required=True,
+    help="The path of the directory to which to write log files",
+)
+benchmark_parser.add_argument(
+    "--ensemble_sizes",
+    dest="ensemble_sizes",
+    default="1,3,5",
+    help="The comma-separated numbers of ensemble members to evaluate",
+)
+benchmark_parser.add_argument(
+    "--max_candidates",
+    dest="max_candidates",
+    default="2,3,5,10",
+    help="The comma-separated maximum numbers of candidates per anaphor to evaluate when pruning candidates before scoring",
+)
+distill_args.add_argument(
+    "--lang",
+    dest="lang",
+    required=True,
+    help="The ISO 639-1 code for the language to distill",
+)
+distill_args.add_argument(
+    "--loader_classes",
+    dest="loader_classes",
+    required=True,
+    help="The class name(s) of the training data loader within *coreferee.training.loaders*. Multiple class names should be comma-separated.",
+)
+distill_args.add_argument(
+    "--data_dir",
+    dest="data_dir",
+    required=True,
+    help="The path of the directory that contains the training data",
+)
+distill_args.add_argument(
+    "--log_dir",
+    dest="log_dir",
+    required=True,
+    help="The path of the directory to which to write log files",
+)
 install_parser = subparsers.add_parser(
     "install",
     help="Install models for a language. Type *python -m coreferee install -h* for more information.",
@@ -81,6 +191,78 @@ install_parser.add_argument(
     help="Forces a reinstall when models are downloaded from Github (when models are being installed from the local filesystem, a reinstall always takes place)",
 )
 install_parser.add_argument("lang", help="The ISO 639-1 code for the language to train")
+export_parser = subparsers.add_parser(
+    "export",
+    help="Export the weights of a trained model file to a flat bundle of NumPy arrays that can be run with *coreferee.runtime.NumpyEnsemble* without thinc. Type *python -m coreferee export -h* for more information.",
+)
+export_parser.add_argument(
+    "model_file",
+    help="The path of the trained model file, e.g. models/en/coreferee_model_en/lg_3_4_0/model. Distilled and compressed model files are also accepted.",
+)
+export_parser.add_argument(
+    "bundle_file", help="The path of the file to which to write the bundle"
+)
+annotate_parser = subparsers.add_parser(
+    "annotate",
+    help="Annotate a corpus with a spaCy model and Coreferee, streaming the input and writing the output to shards with a manifest that allows an interrupted job to be resumed by repeating the command. Type *python -m coreferee annotate -h* for more information.",
+)
+annotate_args = annotate_parser.add_argument_group("required arguments")
+annotate_args.add_argument(
+    "--lang",
+    dest="lang",
+    required=True,
+    help="The ISO 639-1 code for the language of the corpus",
+)
+annotate_args.add_argument(
+    "--model",
+    dest="model",
+    required=True,
+    help="The name of the spaCy model without the language prefix, e.g. core_web_lg",
+)
+annotate_args.add_argument(
+    "--input",
+    dest="input",
+    required=True,
+    help="The path of a JSONL file whose lines are strings or objects with a *text* and optionally an *id* field, or of a directory of DocBin files with the extension *.spacy*",
+)
+annotate_args.add_argument(
+    "--output",
+    dest="output",
+    required=True,
+    help="The path of the directory to which to write the shards and the manifest",
+)
+annotate_parser.add_argument(
+    "--output_format",
+    "--output-format",
+    dest="output_format",
+    default="docbin",
+    choices=OUTPUT_FORMATS,
+    help="Whether to write DocBin files or JSONL files containing the chains",
+)
+annotate_parser.add_argument(
+    "--n_process",
+    "--n-process",
+    dest="n_process",
+    type=int,
+    default=1,
+    help="The number of processes to annotate documents in",
+)
+annotate_parser.add_argument(
+    "--batch_size",
+    "--batch-size",
+    dest="batch_size",
+    type=int,
+    default=None,
+    help="The number of documents each process annotates at once",
+)
+annotate_parser.add_argument(
+    "--shard_size",
+    "--shard-size",
+    dest="shard_size",
+    type=int,
+    default=SHARD_SIZE,
+    help="The number of documents written to each shard",
+)
 
 args = parser.parse_args()
 if args.command == "train":
@@ -101,6 +283,51 @@ elif args.command == "check":
         args.log_dir,
         train_not_check=False,
     ).check_models()
+elif args.command == "quantise":
+    TrainingManager(
+        __name__,
+        args.lang,
+        args.loader_classes,
+        args.data_dir,
+        args.log_dir,
+        train_not_check=False,
+    ).quantise_models(args.dtype)
+elif args.command == "benchmark":
+    TrainingManager(
+        __name__,
+        args.lang,
+        args.loader_classes,
+        args.data_dir,
+        args.log_dir,
+        train_not_check=False,
+    ).benchmark_models(
+        [int(size) for size in args.ensemble_sizes.split(",")],
+        [int(value) for value in args.max_candidates.split(",")],
+    )
+elif args.command == "distill":
+    TrainingManager(
+        __name__,
+        args.lang,
+        args.loader_classes,
+        args.data_dir,
+        args.log_dir,
+        train_not_check=False,
+    ).distill_models()
+elif args.command == "export":
+    with open(args.model_file, "rb") as model_file:
+        thinc_model = load_thinc_model(model_file.read())
+    with open(args.bundle_file, "wb") as bundle_file:
+        bundle_file.write(export_runtime_bundle(thinc_model))
+elif args.command == "annotate":
+    nlp = spacy.load("_".join((args.lang, args.model)))
+    nlp.add_pipe("coreferee")
+    CorpusAnnotator(
+        nlp,
+        output_format=args.output_format,
+        n_process=args.n_process,
+        batch_size=args.batch_size,
+        shard_size=args.shard_size,
+    ).annotate(args.input, args.output)
 elif args.command == "install":
     file_system_root = pkg_resources.resource_filename(__name__, "")
     models_dirname = "".join(
@@ -1,11 +1,227 @@
-from typing import Dict, Set, List, Deque, cast
+from typing import Callable, Dict, Iterable, List, Deque, Optional, Set, Tuple, cast
+from time import perf_counter
+from bisect import bisect_left
 from collections import deque
+from weakref import WeakKeyDictionary
 from spacy.tokens import Doc, Token, Span
 from spacy.language import Language
 from thinc.model import Model
-from .data_model import Mention, Chain, FeatureTable
-from .rules import RulesAnalyzerFactory
-from .tendencies import TendenciesAnalyzer
+from .cache import SentenceFeatureCache
+from .data_model import ChainHolder, Mention, Chain, FeatureTable, RetryStatistics
+from .data_model import ANNOTATION_CONTEXT_KEY, get_annotation_context
+from .rules import RulesAnalyzerFactory, RulesAnalyzer
+from .tendencies import TendenciesAnalyzer, SCORING_BATCH_SIZE
+from .inference import FactorisedEnsemble
+from .deadline import AnnotationDeadline, RESTRICTED_CANDIDATE_COUNT
+from .errors import CorefereeError
+
+
+class ChainUnionFind:
+    """Tracks the chains being built for a document as a disjoint-set forest over
+    mentions with union by size and path compression. Every change is recorded in an
+    undo log so that rewinding to an earlier anaphor costs time proportional to the
+    work being undone rather than to the length of the chains involved.
+
+    Mentions without coordination are looked up by their token indexes. Mentions with
+    coordination are looked up separately by each of their token indexes: this covers
+    the case where a mention with coordination itself contains an anaphor that belongs
+    to a separate chain.
+    """
+
+    def __init__(self):
+        self.parents: Dict[Mention, Mention] = {}
+        self.members: Dict[Mention, List[Mention]] = {}
+        self.token_indexes_to_mentions_without_coordination: Dict[int, Mention] = {}
+        self.token_indexes_to_mentions_with_coordination: Dict[int, Mention] = {}
+        self.undo_log: List[tuple] = []
+        # (token index, undo log position) for each anaphor processed, in order
+        self.marks: List[Tuple[int, int]] = []
+
+    def add(self, mention: Mention) -> None:
+        """Adds *mention* to the forest as a chain on its own if it is not already
+        present."""
+        if mention in self.parents:
+            return
+        self.parents[mention] = mention
+        self.members[mention] = [mention]
+        self.undo_log.append(("add", mention))
+        if len(mention.token_indexes) > 1:
+            for token_index in mention.token_indexes:
+                self.undo_log.append(
+                    (
+                        "with_coordination",
+                        token_index,
+                        self.token_indexes_to_mentions_with_coordination.get(
+                            token_index
+                        ),
+                    )
+                )
+                self.token_indexes_to_mentions_with_coordination[token_index] = mention
+        else:
+            self.token_indexes_to_mentions_without_coordination[mention.root_index] = (
+                mention
+            )
+
+    def find(self, mention: Mention) -> Mention:
+        """Returns the mention at the root of the tree containing *mention*."""
+        root = mention
+        while self.parents[root] is not root:
+            root = self.parents[root]
+        while self.parents[mention] is not root:
+            next_mention = self.parents[mention]
+            self.undo_log.append(("parent", mention, next_mention))
+            self.parents[mention] = root
+            mention = next_mention
+        return root
+
+    def union(self, first_mention: Mention, second_mention: Mention) -> None:
+        """Merges the chains containing *first_mention* and *second_mention*."""
+        first_root = self.find(first_mention)
+        second_root = self.find(second_mention)
+        if first_root is second_root:
+            return
+        if len(self.members[first_root]) < len(self.members[second_root]):
+            first_root, second_root = second_root, first_root
+        self.undo_log.append(("union", second_root, first_root))
+        self.parents[second_root] = first_root
+        self.members[first_root].extend(self.members[second_root])
+
+    def get_chain_without_coordination(
+        self, token_index: int
+    ) -> Optional[List[Mention]]:
+        """Returns the mentions in the chain containing the mention without coordination
+        whose root is at *token_index*, or *None* if there is no such chain."""
+        mention = self.token_indexes_to_mentions_without_coordination.get(token_index)
+        if mention is None:
+            return None
+        return self.members[self.find(mention)]
+
+    def get_chain_with_coordination(self, token_index: int) -> Optional[List[Mention]]:
+        """Returns the mentions in the chain containing the mention with coordination
+        that includes *token_index*, or *None* if there is no such chain."""
+        mention = self.token_indexes_to_mentions_with_coordination.get(token_index)
+        if mention is None:
+            return None
+        return self.members[self.find(mention)]
+
+    def get_chains(self) -> List[List[Mention]]:
+        """Returns the mentions in each chain in the order in which the chains were
+        started."""
+        chains = []
+        visited_roots = set()
+        for mention in self.token_indexes_to_mentions_without_coordination.values():
+            root = self.find(mention)
+            if root not in visited_roots:
+                visited_roots.add(root)
+                chains.append(self.members[root])
+        return chains
+
+    def mark(self, token_index: int) -> None:
+        """Records the current state as the state to return to when rewinding to the
+        anaphor at *token_index*. Anaphors must be marked in document order."""
+        self.marks.append((token_index, len(self.undo_log)))
+
+    def rewind(self, token_index: int) -> None:
+        """Undoes all changes made since the first anaphor at or after *token_index*
+        was marked."""
+        position = None
+        while len(self.marks) > 0 and self.marks[-1][0] >= token_index:
+            position = self.marks.pop()[1]
+        if position is None:
+            return
+        while len(self.undo_log) > position:
+            entry = self.undo_log.pop()
+            if entry[0] == "parent":
+                self.parents[entry[1]] = entry[2]
+            elif entry[0] == "union":
+                absorbed_root, root = entry[1], entry[2]
+                self.parents[absorbed_root] = absorbed_root
+                del self.members[root][-len(self.members[absorbed_root]) :]
+            elif entry[0] == "with_coordination":
+                if entry[2] is None:
+                    del self.token_indexes_to_mentions_with_coordination[entry[1]]
+                else:
+                    self.token_indexes_to_mentions_with_coordination[entry[1]] = entry[
+                        2
+                    ]
+            else:
+                mention = entry[1]
+                del self.parents[mention]
+                del self.members[mention]
+                if len(mention.token_indexes) == 1:
+                    del self.token_indexes_to_mentions_without_coordination[
+                        mention.root_index
+                    ]
+
+    def forget_before(self, token_index: int) -> None:
+        """Discards the undo history for anaphors before *token_index*, which can no
+        longer be rewound to, so that the undo log does not grow with the document."""
+        forgotten_mark_count = 0
+        while (
+            forgotten_mark_count < len(self.marks)
+            and self.marks[forgotten_mark_count][0] < token_index
+        ):
+            forgotten_mark_count += 1
+        if forgotten_mark_count == 0:
+            return
+        del self.marks[:forgotten_mark_count]
+        position = self.marks[0][1] if len(self.marks) > 0 else len(self.undo_log)
+        del self.undo_log[:position]
+        self.marks = [
+            (marked_token_index, marked_position - position)
+            for marked_token_index, marked_position in self.marks
+        ]
+
+
+class CoreferringNounIndex:
+    """Indexes the nouns in a document by the keys returned by
+    *RulesAnalyzer.get_coreferring_noun_keys()* so that searching for nouns that corefer
+    with a later noun only examines plausible candidates."""
+
+    def __init__(self, doc: Doc, rules_analyzer: RulesAnalyzer):
+        self.token_indexes_to_keys: Dict[int, Set[Tuple[str, str]]] = {}
+        self.keys_to_token_indexes: Dict[Tuple[str, str], List[int]] = {}
+        for token in doc:
+            keys = rules_analyzer.get_coreferring_noun_keys(token, False)
+            if keys is None:
+                # the language does not support the index
+                return
+            if len(keys) == 0:
+                continue
+            self.token_indexes_to_keys[token.i] = keys
+            for key in keys:
+                self.keys_to_token_indexes.setdefault(key, []).append(token.i)
+
+    def has_any_key(self, token_index: int, keys: Set[Tuple[str, str]]) -> bool:
+        token_keys = self.token_indexes_to_keys.get(token_index)
+        return token_keys is not None and not token_keys.isdisjoint(keys)
+
+    def count_token_indexes(self, keys: Set[Tuple[str, str]], end_index: int) -> int:
+        """Returns an upper bound for the number of tokens before *end_index* that have
+        any of *keys*."""
+        return sum(
+            bisect_left(self.keys_to_token_indexes[key], end_index)
+            for key in keys
+            if key in self.keys_to_token_indexes
+        )
+
+    def get_token_indexes(
+        self, keys: Set[Tuple[str, str]], start_index: int, end_index: int
+    ) -> List[int]:
+        """Returns the indexes of the tokens from *start_index* up to but not including
+        *end_index* that have any of *keys*, in descending order."""
+        token_indexes: Set[int] = set()
+        for key in keys:
+            key_token_indexes = self.keys_to_token_indexes.get(key)
+            if key_token_indexes is not None:
+                token_indexes.update(
+                    key_token_indexes[
+                        bisect_left(key_token_indexes, start_index) : bisect_left(
+                            key_token_indexes, end_index
+                        )
+                    ]
+                )
+        return sorted(token_indexes, reverse=True)
 
 
 class Annotator:
@@ -15,70 +231,122 @@ class Annotator:
     def __init__(
         self,
         nlp: Language,
-        vectors_nlp: Language,
-        feature_table: FeatureTable,
-        thinc_ensemble: Model,
+        vectors_nlp: Optional[Language],
+        feature_table: Optional[FeatureTable],
+        thinc_ensemble: Optional[Model],
+        *,
+        ensemble_size: Optional[int] = None,
+        max_candidates: Optional[int] = None,
+        scoring_batch_size: Optional[int] = SCORING_BATCH_SIZE,
+        retry_budget: Optional[int] = None,
+        retry_time_budget: Optional[float] = None,
+        time_limit: Optional[float] = None,
+        sentence_cache_size: Optional[int] = None,
+        sparse_feature_maps: bool = False,
     ):
+        """If *thinc_ensemble* is *None*, the annotator runs in rules-only mode: the
+        potential referreds of each anaphor are ordered by
+        *RulesAnalyzer.get_rules_only_sort_key()* rather than scored by the neural
+        ensemble, and *vectors_nlp* and *feature_table* are not used.
+
+        If *max_candidates* is specified, each anaphor is only scored against the
+        *max_candidates* potential referreds that come first under a fixed heuristic
+        ordering (see *TendenciesAnalyzer.get_candidates_to_score()*). *scoring_batch_size* is the
+        maximum number of pairs passed to the neural ensemble at once, or *None* to
+        score all pairs in a document together.
+
+        *retry_budget* and *retry_time_budget*, if specified, limit the number of
+        rewinds and the number of seconds spent searching for alternative
+        interpretations of anaphors within each document (see *attempt_retry()*).
+        Once a budget is exhausted, anaphors that cannot be assigned to chains are left
+        unassigned.
+
+        *time_limit*, if specified, is the number of seconds within which each document
+        should be annotated. As the time spent on a document approaches the limit,
+        annotation degrades through the stages in *deadline.DEGRADATION_STAGES*.
+
+        *sentence_cache_size*, if specified, is the number of sentences whose feature
+        maps and position maps are held in a *cache.SentenceFeatureCache* shared
+        between the documents the annotator processes.
+
+        If *sparse_feature_maps* is *True*, the one-hot feature maps are projected as
+        lists of active indexes rather than by dense matrix products (see
+        *runtime.NumpyEnsemble*). The scores are the same either way."""
+        for name, value in (
+            ("max_candidates", max_candidates),
+            ("scoring_batch_size", scoring_batch_size),
+        ):
+            if value is not None and value < 1:
+                raise CorefereeError(
+                    "".join((name, " must be at least 1, not ", str(value), "."))
+                )
+        for name, value in (
+            ("retry_budget", retry_budget),
+            ("retry_time_budget", retry_time_budget),
+            ("time_limit", time_limit),
+        ):
+            if value is not None and value < 0:
+                raise CorefereeError(
+                    "".join((name, " must not be negative, not ", str(value), "."))
+                )
+        self.max_candidates = max_candidates
+        self.scoring_batch_size = scoring_batch_size
+        self.retry_budget = retry_budget
+        self.retry_time_budget = retry_time_budget
+        self.time_limit = time_limit
+        # from documents to the results of *resolve_tokens()* for them, which are
+        # dropped when the documents are garbage-collected
+        self.resolved_tokens: WeakKeyDictionary = WeakKeyDictionary()
         self.thinc_ensemble = thinc_ensemble
         self.rules_analyzer = RulesAnalyzerFactory().get_rules_analyzer(nlp)
-        self.tendencies_analyzer = TendenciesAnalyzer(
-            self.rules_analyzer, vectors_nlp, feature_table
-        )
+        self.factorised_ensemble: Optional[FactorisedEnsemble] = None
+        self.tendencies_analyzer: Optional[TendenciesAnalyzer] = None
+        if thinc_ensemble is not None:
+            if vectors_nlp is None or feature_table is None:
+                raise CorefereeError(
+                    "vectors_nlp and feature_table are required with a thinc_ensemble."
+                )
+            self.factorised_ensemble = FactorisedEnsemble(
+                thinc_ensemble,
+                ensemble_size=ensemble_size,
+                feature_map_width=len(feature_table) if sparse_feature_maps else None,
+            )
+            self.tendencies_analyzer = TendenciesAnalyzer(
+                self.rules_analyzer,
+                vectors_nlp,
+                feature_table,
+                (
+                    None
+                    if sentence_cache_size is None
+                    else SentenceFeatureCache(sentence_cache_size)
+                ),
+            )
 
     @staticmethod
     def record_mention(
-        preceding_mention: Mention,
-        token: Token,
-        token_indexes_without_coordination_to_mention_sets: Dict[int, Set[Mention]],
-        token_indexes_with_coordination_to_mention_sets: Dict[int, Set[Mention]],
+        preceding_mention: Mention, token: Token, chains: ChainUnionFind
     ) -> None:
-        """*token_indexes_without_coordination_to_mention_sets* is the main means of
-        generating and tracking chains.
-
-        *token_indexes_with_coordination_to_mention_sets* tracks the ends of chains that
-        end in a mention with coordination. It is necessary for the case where two anaphors
-        both refer to a mention with coordination. It has to be kept separate from the main
-        dictionary to cover the case where a mention with coordination itself contains an
-        anaphor that belongs to a separate chain.
+        """Adds *token* to the chain containing *preceding_mention*.
+
+        Where *preceding_mention* has coordination, any chain already ending in a
+        mention with coordination with the same root is extended. This is necessary for
+        the case where two anaphors both refer to a mention with coordination.
         """
         if len(preceding_mention.token_indexes) > 1:
-            if (
+            chain_mention = chains.token_indexes_to_mentions_with_coordination.get(
                 preceding_mention.root_index
-                in token_indexes_with_coordination_to_mention_sets
-            ):
-                mention_set = token_indexes_with_coordination_to_mention_sets[
-                    preceding_mention.root_index
-                ]
-            else:
-                mention_set = {preceding_mention}
-                for token_index in preceding_mention.token_indexes:
-                    token_indexes_with_coordination_to_mention_sets[
-                        token_index
-                    ] = mention_set
-        else:
-            preceding_token = token.doc[preceding_mention.root_index]
-            if preceding_token.i in token_indexes_without_coordination_to_mention_sets:
-                mention_set = token_indexes_without_coordination_to_mention_sets[
-                    preceding_token.i
-                ]
-            else:
-                mention_set = {preceding_mention}
-                token_indexes_without_coordination_to_mention_sets[
-                    preceding_token.i
-                ] = mention_set
-        mention_set.add(Mention(token, False))
-        if token.i in token_indexes_without_coordination_to_mention_sets:
-            mention_set.update(
-                token_indexes_without_coordination_to_mention_sets[token.i]
             )
-            for mention in token_indexes_without_coordination_to_mention_sets[token.i]:
-                token_indexes_without_coordination_to_mention_sets[
-                    mention.root_index
-                ] = mention_set
+            if chain_mention is None:
+                chains.add(preceding_mention)
+                chain_mention = preceding_mention
         else:
-            token_indexes_without_coordination_to_mention_sets[token.i] = mention_set
+            chains.add(preceding_mention)
+            chain_mention = preceding_mention
+        token_mention = Mention(token, False)
+        chains.add(token_mention)
+        chains.union(chain_mention, token_mention)
 
-    def get_compatibility(self, token: Token, mention_set: Set[Mention]) -> int:
+    def get_compatibility(self, token: Token, mention_set: List[Mention]) -> int:
         """Checks the compatibility of *token* with the possible chain represented by *mention_set*
         and expresses it with the semantics of *RuleAnalyzer.is_potential_anaphoric_pair()*.
         """
@@ -103,93 +371,129 @@ class Annotator:
         self,
         token: Token,
         sentence_deque: Deque[Span],
-        token_indexes_without_coordination_to_mention_sets: Dict[int, Set[Mention]],
-        token_indexes_with_coordination_to_mention_sets: Dict[int, Set[Mention]],
+        chains: ChainUnionFind,
+        coreferring_noun_index: CoreferringNounIndex,
     ) -> None:
+        """Links *token* to the closest preceding token within the sentences in
+        *sentence_deque* that either forms a coreferring noun pair with *token* itself
+        or belongs to a chain containing a noun that does."""
         doc = token.doc
-        if not token._.coref_chains.temp_potentially_referring:
+        potentially_referring = get_annotation_context(doc).potentially_referring
+        if not potentially_referring[token.i]:
             return
-        for sent in sentence_deque:
-            for preceding_token in (
-                doc[index]
-                for index in range(sent.end, sent.start - 1, -1)
-                if index < token.i
+        window_start_index = sentence_deque[-1].start
+        lookup_keys = self.rules_analyzer.get_coreferring_noun_keys(token, True)
+        if lookup_keys is None:
+            candidate_indexes: Iterable[int] = range(
+                token.i - 1, window_start_index - 1, -1
+            )
+        else:
+            candidate_indexes = coreferring_noun_index.get_token_indexes(
+                lookup_keys, window_start_index, token.i
+            )
+        referred_index = -1
+        for index in candidate_indexes:
+            if potentially_referring[index] and (
+                self.rules_analyzer.is_potential_coreferring_noun_pair(
+                    doc[index], token
+                )
             ):
-                if (
-                    preceding_token._.coref_chains.temp_potentially_referring
-                    and self.rules_analyzer.is_potential_coreferring_noun_pair(
-                        preceding_token, token
-                    )
-                ):
-                    self.record_mention(
-                        Mention(preceding_token, False),
-                        token,
-                        token_indexes_without_coordination_to_mention_sets,
-                        token_indexes_with_coordination_to_mention_sets,
-                    )
-                    return
-                if (
-                    preceding_token.i
-                    in token_indexes_without_coordination_to_mention_sets
-                ):
-                    # existing chain; *preceding_token* may be an anaphor linked to a noun
-                    # that can form a noun pair with *token*
-                    mention_set = token_indexes_without_coordination_to_mention_sets[
-                        preceding_token.i
-                    ]
-                    for mention in (
-                        mention
-                        for mention in mention_set
-                        if len(mention.token_indexes) == 1
-                    ):
-                        if self.rules_analyzer.is_potential_coreferring_noun_pair(
-                            token.doc[mention.root_index], token
-                        ):
-                            self.record_mention(
-                                Mention(preceding_token, False),
-                                token,
-                                token_indexes_without_coordination_to_mention_sets,
-                                token_indexes_with_coordination_to_mention_sets,
-                            )
-                            return
+                referred_index = index
+                break
+        # existing chains; a closer token may be an anaphor linked to a noun that can
+        # form a noun pair with *token*
+        checked_chain_ids = set()
+        for index in range(
+            token.i - 1, max(referred_index, window_start_index - 1), -1
+        ):
+            mention_set = chains.get_chain_without_coordination(index)
+            if mention_set is None or id(mention_set) in checked_chain_ids:
+                continue
+            checked_chain_ids.add(id(mention_set))
+            if self.chain_contains_coreferring_noun(
+                token, mention_set, chains, coreferring_noun_index, lookup_keys
+            ):
+                referred_index = index
+                break
+        if referred_index >= 0:
+            self.record_mention(Mention(doc[referred_index], False), token, chains)
+
+    def chain_contains_coreferring_noun(
+        self,
+        token: Token,
+        mention_set: List[Mention],
+        chains: ChainUnionFind,
+        coreferring_noun_index: CoreferringNounIndex,
+        lookup_keys: Optional[Set[Tuple[str, str]]],
+    ) -> bool:
+        """Returns *True* if *mention_set* contains a mention without coordination that
+        forms a coreferring noun pair with *token*. Whichever is shorter out of the
+        chain and the indexed candidates is searched."""
+        doc = token.doc
+        if lookup_keys is not None and coreferring_noun_index.count_token_indexes(
+            lookup_keys, token.i
+        ) < len(mention_set):
+            return any(
+                chains.get_chain_without_coordination(index) is mention_set
+                and self.rules_analyzer.is_potential_coreferring_noun_pair(
+                    doc[index], token
+                )
+                for index in coreferring_noun_index.get_token_indexes(
+                    lookup_keys, 0, token.i
+                )
+            )
+        return any(
+            len(mention.token_indexes) == 1
+            and (
+                lookup_keys is None
+                or coreferring_noun_index.has_any_key(mention.root_index, lookup_keys)
+            )
+            and self.rules_analyzer.is_potential_coreferring_noun_pair(
+                doc[mention.root_index], token
+            )
+            for mention in mention_set
+        )
 
     def temp_annotate_any_anaphoric_link(
         self,
         token: Token,
-        token_indexes_without_coordination_to_mention_sets: Dict[int, Set[Mention]],
-        token_indexes_with_coordination_to_mention_sets: Dict[int, Set[Mention]],
+        chains: ChainUnionFind,
         permitted_start_index: int = 0,
+        candidate_count: Optional[int] = None,
     ) -> bool:
-        """Returns *True* if an annotation occurred."""
+        """Returns *True* if an annotation occurred. *candidate_count*, if specified,
+        restricts the potential referreds considered to fewer than *RETRY_DEPTH*."""
+
+        chains.mark(token.i)
 
         def check_mention_sets_for_reflexive_relationships(
-            mention: Mention, index_to_mention_set_dict: dict
+            mention: Mention, get_chain: Callable[[int], Optional[List[Mention]]]
         ) -> bool:
             for token_index in mention.token_indexes:
-                if token_index in index_to_mention_set_dict:
-                    for working_mention in index_to_mention_set_dict[token_index]:
+                mention_set = get_chain(token_index)
+                if mention_set is not None:
+                    for working_mention in mention_set:
                         if self.rules_analyzer.is_potential_reflexive_pair(
                             working_mention, token
                         ):
                             return True
             return False
 
+        maximum_index = self.RETRY_DEPTH
+        if candidate_count is not None:
+            maximum_index = min(maximum_index, candidate_count)
+
         def intern_temp_annotate_any_anaphoric_link(allow_uncertainty: bool) -> bool:
             for index, potential_referred in enumerate(
-                token._.coref_chains.temp_potential_referreds
+                get_annotation_context(token.doc).potential_referreds[token.i]
             ):
-                if index < permitted_start_index or index >= self.RETRY_DEPTH:
+                if index < permitted_start_index or index >= maximum_index:
                     continue
                 if len(potential_referred.token_indexes) == 1:
-                    if (
+                    mention_set = chains.get_chain_without_coordination(
                         potential_referred.root_index
-                        in token_indexes_without_coordination_to_mention_sets
-                    ):
-                        mention_set = (
-                            token_indexes_without_coordination_to_mention_sets[
-                                potential_referred.root_index
-                            ]
-                        )
+                    )
+                    if mention_set is not None:
                         compatibility = self.get_compatibility(token, mention_set)
                         if compatibility == 0 or (
                             compatibility == 1 and not allow_uncertainty
@@ -197,20 +501,17 @@ class Annotator:
                             continue
                 if self.rules_analyzer.is_reflexive_anaphor(token) == 0 and (
                     check_mention_sets_for_reflexive_relationships(
-                        potential_referred,
-                        token_indexes_without_coordination_to_mention_sets,
+                        potential_referred, chains.get_chain_without_coordination
                     )
                     or check_mention_sets_for_reflexive_relationships(
-                        potential_referred,
-                        token_indexes_with_coordination_to_mention_sets,
+                        potential_referred, chains.get_chain_with_coordination
                     )
                 ):
                     continue
                 self.record_mention(
                     potential_referred,
                     token,
-                    token_indexes_without_coordination_to_mention_sets,
-                    token_indexes_with_coordination_to_mention_sets,
+                    chains,
                 )
                 return True
             return False
@@ -219,130 +520,124 @@ class Annotator:
             return True
         return intern_temp_annotate_any_anaphoric_link(True)
 
-    def delete_from_collections_for_rewind(
-        self,
-        previous_token: Token,
-        token: Token,
-        token_indexes_without_coordination_to_mention_sets: Dict[int, Set[Mention]],
-        token_indexes_with_coordination_to_mention_sets: Dict[int, Set[Mention]],
-    ) -> None:
-        def intern_delete_from_collections_for_rewind(
-            dictionary: Dict[int, Set[Mention]], working_token: Token
-        ):
-            if working_token.i in dictionary:
-                mention_set = dictionary[working_token.i]
-                working_mention = Mention(working_token, False)
-                if working_mention in mention_set:
-                    mention_set.remove(working_mention)
-                del dictionary[working_token.i]
-                if len(mention_set) == 1:
-                    remaining_mention = list(mention_set)[0]
-                    if remaining_mention.root_index in dictionary:
-                        # is not the case where *remaining_mention* involves coordination
-                        del dictionary[remaining_mention.root_index]
-
-        doc = token.doc
-        for working_token in doc[previous_token.i : token.i + 1]:
-            intern_delete_from_collections_for_rewind(
-                token_indexes_without_coordination_to_mention_sets, working_token
-            )
-            intern_delete_from_collections_for_rewind(
-                token_indexes_with_coordination_to_mention_sets, working_token
-            )
-
     def attempt_rewind_with_previous_token_and_retry_index(
         self,
         retry_index: int,
         previous_token: Token,
         token: Token,
         sentence_deque: Deque[Span],
-        token_indexes_without_coordination_to_mention_sets: Dict[int, Set[Mention]],
-        token_indexes_with_coordination_to_mention_sets: Dict[int, Set[Mention]],
+        chains: ChainUnionFind,
+        coreferring_noun_index: CoreferringNounIndex,
     ) -> bool:
         """Returns *True* if the rewind attempt succeeded."""
         doc = token.doc
+        potential_referreds = get_annotation_context(doc).potential_referreds
         if self.temp_annotate_any_anaphoric_link(
             previous_token,
-            token_indexes_without_coordination_to_mention_sets,
-            token_indexes_with_coordination_to_mention_sets,
+            chains,
             retry_index,
         ):
             for working_token in doc[previous_token.i + 1 : token.i + 1]:
                 self.temp_annotate_any_coreferring_noun_link(
                     working_token,
                     sentence_deque,
-                    token_indexes_without_coordination_to_mention_sets,
-                    token_indexes_with_coordination_to_mention_sets,
+                    chains,
+                    coreferring_noun_index,
                 )
-                if hasattr(working_token._.coref_chains, "temp_potential_referreds"):
+                if working_token.i in potential_referreds:
                     if not self.temp_annotate_any_anaphoric_link(
                         working_token,
-                        token_indexes_without_coordination_to_mention_sets,
-                        token_indexes_with_coordination_to_mention_sets,
+                        chains,
                     ):
                         return False
             return True
         return False
 
+    def is_retry_budget_exhausted(
+        self, retry_statistics: RetryStatistics, start_time: float
+    ) -> bool:
+        return (
+            self.retry_budget is not None
+            and retry_statistics.rewinds >= self.retry_budget
+        ) or (
+            self.retry_time_budget is not None
+            and retry_statistics.seconds + perf_counter() - start_time
+            >= self.retry_time_budget
+        )
+
     def attempt_retry(
         self,
         token: Token,
         coreferring_deque: Deque[Token],
         sentence_deque: Deque[Span],
-        token_indexes_without_coordination_to_mention_sets: Dict[int, Set[Mention]],
-        token_indexes_with_coordination_to_mention_sets: Dict[int, Set[Mention]],
+        chains: ChainUnionFind,
+        coreferring_noun_index: CoreferringNounIndex,
+        retry_statistics: RetryStatistics,
+        deadline: Optional[AnnotationDeadline] = None,
     ) -> bool:
         """Called when an anaphor could not be assigned to a chain; attempts alternative
         interpretations of the preceding anaphors to see whether any allow all anaphors to be
-        assigned. Returns *True* if the rewind attempt succeeded."""
-        previous_token = None
-        for retry_index in range(
-            1,
-            min(
-                self.RETRY_DEPTH, len(token._.coref_chains.temp_potential_referreds) + 1
-            ),
-        ):
-            # we only need start with *previous_token* because any different interpretations of
-            # *token* have already been tried out unsuccessfully
-            for previous_token in (
-                t
-                for t in coreferring_deque
-                if token._.coref_chains.temp_sent_index
-                - t._.coref_chains.temp_sent_index
-                <= self.rules_analyzer.maximum_anaphora_sentence_referential_distance
-            ):
-                self.delete_from_collections_for_rewind(
-                    previous_token,
-                    token,
-                    token_indexes_without_coordination_to_mention_sets,
-                    token_indexes_with_coordination_to_mention_sets,
-                )
+        assigned. Returns *True* if the rewind attempt succeeded.
+
+        The search is abandoned once the retry budget for the document is exhausted or
+        *deadline* reaches the *skipped_retries* stage, in which case the original
+        interpretation is restored."""
+        start_time = perf_counter()
+        retry_statistics.retries += 1
+        context = get_annotation_context(token.doc)
+        earliest_previous_token = None
+        # we only need start with *previous_token* because any different interpretations of
+        # *token* have already been tried out unsuccessfully
+        attempts = (
+            (retry_index, previous_token)
+            for retry_index in range(
+                1,
+                min(
+                    self.RETRY_DEPTH,
+                    len(context.potential_referreds[token.i]) + 1,
+                ),
+            )
+            for previous_token in coreferring_deque
+            if context.sent_indexes[token.i] - context.sent_indexes[previous_token.i]
+            <= self.rules_analyzer.maximum_anaphora_sentence_referential_distance
+        )
+        try:
+            for retry_index, previous_token in attempts:
+                if self.is_retry_budget_exhausted(retry_statistics, start_time):
+                    retry_statistics.budget_exhaustions += 1
+                    break
+                if deadline is not None and deadline.has_reached("skipped_retries"):
+                    break
+                retry_statistics.rewinds += 1
+                if (
+                    earliest_previous_token is None
+                    or previous_token.i < earliest_previous_token.i
+                ):
+                    earliest_previous_token = previous_token
+                chains.rewind(previous_token.i)
                 if self.attempt_rewind_with_previous_token_and_retry_index(
                     retry_index,
                     previous_token,
                     token,
                     sentence_deque,
-                    token_indexes_without_coordination_to_mention_sets,
-                    token_indexes_with_coordination_to_mention_sets,
+                    chains,
+                    coreferring_noun_index,
                 ):
                     return True
-        if previous_token is not None:
-            # All attempts have failed, so return to the original interpretation
-            self.delete_from_collections_for_rewind(
-                previous_token,
-                token,
-                token_indexes_without_coordination_to_mention_sets,
-                token_indexes_with_coordination_to_mention_sets,
-            )
-            self.attempt_rewind_with_previous_token_and_retry_index(
-                0,
-                previous_token,
-                token,
-                sentence_deque,
-                token_indexes_without_coordination_to_mention_sets,
-                token_indexes_with_coordination_to_mention_sets,
-            )
-        return False
+            if earliest_previous_token is not None:
+                # All attempts have failed, so return to the original interpretation
+                chains.rewind(earliest_previous_token.i)
+                self.attempt_rewind_with_previous_token_and_retry_index(
+                    0,
+                    earliest_previous_token,
+                    token,
+                    sentence_deque,
+                    chains,
+                    coreferring_noun_index,
+                )
+            return False
+        finally:
+            retry_statistics.seconds += perf_counter() - start_time
 
     def get_most_specific_mention(self, mentions: List[Mention], doc: Doc) -> Mention:
         """Returns the most specific mention in the chain, where names > nouns > pronouns."""
@@ -372,86 +667,290 @@ class Annotator:
                 stored_mention = mention
         return cast(Mention, stored_mention)
 
-    def annotate(self, doc: Doc, used_in_training=False) -> Doc:
-        if not used_in_training:
-            self.rules_analyzer.initialize(doc)
-        self.tendencies_analyzer.score(doc, self.thinc_ensemble)
-        token_indexes_without_coordination_to_mention_sets: Dict[int, Set[Mention]] = {}
-        token_indexes_with_coordination_to_mention_sets: Dict[int, Set[Mention]] = {}
-        sentence_deque: Deque[Span] = deque(
-            maxlen=self.rules_analyzer.maximum_coreferring_nouns_sentence_referential_distance
-            + 1
-        )
-        coreferring_deque: Deque[Token] = deque(maxlen=self.RETRY_DEPTH)
-        for sent in doc.sents:
-            sentence_deque.appendleft(sent)
-            for token in sent:
-                self.temp_annotate_any_coreferring_noun_link(
-                    token,
-                    sentence_deque,
-                    token_indexes_without_coordination_to_mention_sets,
-                    token_indexes_with_coordination_to_mention_sets,
-                )
-                if hasattr(token._.coref_chains, "temp_potential_referreds"):
-                    if self.temp_annotate_any_anaphoric_link(
-                        token,
-                        token_indexes_without_coordination_to_mention_sets,
-                        token_indexes_with_coordination_to_mention_sets,
-                    ) or self.attempt_retry(
-                        token,
-                        coreferring_deque,
-                        sentence_deque,
-                        token_indexes_without_coordination_to_mention_sets,
-                        token_indexes_with_coordination_to_mention_sets,
-                    ):
-                        coreferring_deque.appendleft(token)
-
-        visited_token_indexes = set()
+    def get_chains(self, doc: Doc, chain_union_find: ChainUnionFind) -> List[Chain]:
+        """Returns the chains built up in *chain_union_find* sorted by their first
+        mentions, each with its most specific mention marked."""
         chains = []
-        for (
-            token_index,
-            mention_set,
-        ) in token_indexes_without_coordination_to_mention_sets.items():
-            if token_index in visited_token_indexes:
-                continue
-            mention_list = sorted(
-                list(mention_set), key=lambda mention: mention.root_index
-            )
+        for mention_set in chain_union_find.get_chains():
+            mention_list = sorted(mention_set, key=lambda mention: mention.root_index)
             most_specific_mention = self.get_most_specific_mention(mention_list, doc)
+            for mention in mention_list:
+                mention.release_doc()
             chain = Chain(mention_list, mention_list.index(most_specific_mention))
             chains.append(chain)
-            for mention in chain.mentions:
-                if len(mention.token_indexes) == 1:
-                    visited_token_indexes.add(mention.root_index)
 
         chains.sort(key=lambda chain: chain.mentions[0].root_index)
 
         for index, chain in enumerate(chains):
             chain.index = index
-            for mention in chain.mentions:
-                for token in (
-                    doc[token_index] for token_index in mention.token_indexes
-                ):
-                    token._.coref_chains.chains.append(chain)
-
-        doc._.coref_chains.chains = chains
+        return chains
 
+    def annotate(
+        self,
+        doc: Doc,
+        used_in_training=False,
+        ensemble_size: Optional[int] = None,
+        time_limit: Optional[float] = None,
+    ) -> Doc:
+        """*ensemble_size* and *time_limit*, if specified, override the number of
+        ensemble members evaluated and the time limit for this document. The stages to
+        which annotation degraded are recorded in *doc._.coref_chains.degradations*."""
+        if time_limit is not None and time_limit < 0:
+            raise CorefereeError(
+                "".join(("time_limit must not be negative, not ", str(time_limit), "."))
+            )
+        deadline = AnnotationDeadline(
+            time_limit if time_limit is not None else self.time_limit
+        )
         if not used_in_training:
-            # get rid of the *temp_* properties on the various objects
-            for temp_entry in [
-                t for t in doc._.coref_chains.__dict__ if t.startswith("temp_")
-            ][:]:
-                doc._.coref_chains.__dict__.pop(temp_entry)
-            for token in doc:
-                for temp_entry in [
-                    t for t in token._.coref_chains.__dict__ if t.startswith("temp_")
-                ][:]:
-                    token._.coref_chains.__dict__.pop(temp_entry)
-                    for chain in token._.coref_chains:
-                        for mention in chain:
-                            for inner_temp_entry in [
-                                t for t in mention.__dict__ if t.startswith("temp_")
-                            ][:]:
-                                mention.__dict__.pop(inner_temp_entry)
+            self.rules_analyzer.initialize(doc)
+        try:
+            if self.tendencies_analyzer is None:
+                self.rules_analyzer.order_potential_referreds(doc)
+            else:
+                self.tendencies_analyzer.score(
+                    doc,
+                    cast(FactorisedEnsemble, self.factorised_ensemble),
+                    ensemble_size,
+                    self.max_candidates,
+                    self.scoring_batch_size,
+                    deadline,
+                )
+            context = get_annotation_context(doc)
+            chain_union_find = ChainUnionFind()
+            coreferring_noun_index = CoreferringNounIndex(doc, self.rules_analyzer)
+            retry_statistics = RetryStatistics()
+            sentence_deque: Deque[Span] = deque(
+                maxlen=self.rules_analyzer.maximum_coreferring_nouns_sentence_referential_distance
+                + 1
+            )
+            coreferring_deque: Deque[Token] = deque(maxlen=self.RETRY_DEPTH)
+            for sent in doc.sents:
+                if deadline.has_reached("truncated"):
+                    break
+                sentence_deque.appendleft(sent)
+                for token in sent:
+                    if deadline.has_reached("truncated"):
+                        break
+                    if not deadline.has_reached("skipped_noun_links"):
+                        self.temp_annotate_any_coreferring_noun_link(
+                            token,
+                            sentence_deque,
+                            chain_union_find,
+                            coreferring_noun_index,
+                        )
+                    if token.i in context.potential_referreds:
+                        if self.temp_annotate_any_anaphoric_link(
+                            token,
+                            chain_union_find,
+                            candidate_count=(
+                                RESTRICTED_CANDIDATE_COUNT
+                                if deadline.has_reached("restricted_candidates")
+                                else None
+                            ),
+                        ) or (
+                            not deadline.has_reached("skipped_retries")
+                            and self.attempt_retry(
+                                token,
+                                coreferring_deque,
+                                sentence_deque,
+                                chain_union_find,
+                                coreferring_noun_index,
+                                retry_statistics,
+                                deadline,
+                            )
+                        ):
+                            coreferring_deque.appendleft(token)
+                            if len(coreferring_deque) == coreferring_deque.maxlen:
+                                # anaphors that have left the deque are never rewound to
+                                chain_union_find.forget_before(coreferring_deque[-1].i)
+
+            doc._.coref_chains.chains = self.get_chains(doc, chain_union_find)
+            doc._.coref_chains.retry_statistics = retry_statistics
+            doc._.coref_chains.degradations = tuple(deadline.degradations)
+            doc._.coref_chains.index_mentions(doc)
+        finally:
+            if not used_in_training:
+                # the intermediate state is no longer needed
+                doc.user_data.pop(ANNOTATION_CONTEXT_KEY, None)
 
         return doc
+
+    def get_resolution_windows(
+        self, doc: Doc, token_indexes: Iterable[int], context_sentences: int
+    ) -> List[Tuple[int, int, List[int]]]:
+        """Returns, for the anaphors at *token_indexes*, a list of non-overlapping
+        windows of *doc* as tuples of start token index, end token index and the indexes
+        of the requested tokens the window contains. Each window ends with the sentence
+        containing its last requested token and begins *context_sentences* sentences
+        before the sentence containing its first requested token; windows that would
+        overlap or touch are merged."""
+        sentences = list(doc.sents)
+        sentence_starts = [sentence.start for sentence in sentences]
+        windows: List[Tuple[int, int, List[int]]] = []
+        for token_index in sorted(set(token_indexes)):
+            sentence_index = bisect_left(sentence_starts, token_index + 1) - 1
+            start_index = sentences[max(0, sentence_index - context_sentences)].start
+            end_index = sentences[sentence_index].end
+            if len(windows) > 0 and start_index <= windows[-1][1]:
+                windows[-1][2].append(token_index)
+                windows[-1] = (windows[-1][0], end_index, windows[-1][2])
+            else:
+                windows.append((start_index, end_index, [token_index]))
+        return windows
+
+    def resolve_window(
+        self, window_doc: Doc, token_indexes: List[int]
+    ) -> Dict[int, Optional[List[int]]]:
+        """Returns a dictionary from each of *token_indexes* to the indexes of the
+        tokens within *window_doc* to which it approximately resolves, or *None* if it
+        does not point to any other tokens (see *resolve_tokens()*). The anaphors for
+        which potential referreds were recorded and the tokens within their potential
+        referreds are visited in document order. Each is linked to any preceding
+        coreferring noun and each anaphor then to its highest-ranked compatible
+        potential referred, as in *annotate()*."""
+        self.rules_analyzer.initialize(window_doc, token_indexes)
+        try:
+            if self.tendencies_analyzer is None:
+                self.rules_analyzer.order_potential_referreds(window_doc)
+            else:
+                self.tendencies_analyzer.score(
+                    window_doc,
+                    cast(FactorisedEnsemble, self.factorised_ensemble),
+                    max_candidates=self.max_candidates,
+                    scoring_batch_size=self.scoring_batch_size,
+                )
+            chain_union_find = ChainUnionFind()
+            coreferring_noun_index = CoreferringNounIndex(
+                window_doc, self.rules_analyzer
+            )
+            sentences = list(window_doc.sents)
+            sentence_starts = [sentence.start for sentence in sentences]
+            noun_distance = (
+                self.rules_analyzer.maximum_coreferring_nouns_sentence_referential_distance
+            )
+            potential_referreds = get_annotation_context(window_doc).potential_referreds
+            # the anaphors and the tokens within their potential referreds, which are
+            # linked to any preceding coreferring nouns so that the compatibility of
+            # the anaphors with the resulting chains can be checked
+            for token_index in sorted(
+                set(potential_referreds).union(
+                    contained_index
+                    for mentions in potential_referreds.values()
+                    for potential_referred in mentions
+                    for contained_index in potential_referred.token_indexes
+                )
+            ):
+                token = window_doc[token_index]
+                sentence_index = bisect_left(sentence_starts, token_index + 1) - 1
+                self.temp_annotate_any_coreferring_noun_link(
+                    token,
+                    deque(
+                        reversed(
+                            sentences[
+                                max(0, sentence_index - noun_distance) : sentence_index
+                                + 1
+                            ]
+                        )
+                    ),
+                    chain_union_find,
+                    coreferring_noun_index,
+                )
+                if token_index in potential_referreds:
+                    self.temp_annotate_any_anaphoric_link(token, chain_union_find)
+            window_doc._.coref_chains.chains = self.get_chains(
+                window_doc, chain_union_find
+            )
+            window_doc._.coref_chains.index_mentions(window_doc)
+        finally:
+            window_doc.user_data.pop(ANNOTATION_CONTEXT_KEY, None)
+        resolutions: Dict[int, Optional[List[int]]] = {}
+        for token_index in token_indexes:
+            resolved_tokens = ChainHolder.resolve(window_doc[token_index])
+            resolutions[token_index] = (
+                None
+                if resolved_tokens is None
+                else [resolved_token.i for resolved_token in resolved_tokens]
+            )
+        return resolutions
+
+    def resolve_tokens(
+        self,
+        doc: Doc,
+        token_indexes: Iterable[int],
+        context_sentences: Optional[int] = None,
+    ) -> Dict[int, Optional[List[Token]]]:
+        """Returns a dictionary from each of *token_indexes* to what
+        *ChainHolder.resolve()* would return for the token at that index, without
+        annotating *doc*.
+
+        If *doc* has already been annotated, the existing chains are used. Otherwise
+        the results are approximate. A window around each requested token is analysed:
+        the sentence containing the token and the *context_sentences* sentences before
+        it, which by default cover the potential referreds of the token and those of
+        its potential referreds in turn. Within the window, potential referreds are
+        only recorded and scored for the requested anaphors and the anaphors on which
+        their resolution depends (see *RulesAnalyzer.initialize()*), and only these
+        anaphors and the tokens within their potential referreds are added to chains
+        (see *resolve_window()*). Other interpretations of anaphors that cannot be added
+        to a chain are not retried, other nouns are not linked to coreferring nouns and
+        chains reaching further back than the window are not followed, so that the
+        result can differ from the result of annotating the whole document.
+
+        The results are cached by the annotator, which holds *doc* only weakly, together
+        with the number of context sentences they were calculated with, so that
+        repeated queries for the same tokens are not recalculated unless a wider window
+        is requested. The cache is not serialized with *doc*."""
+        token_indexes = [doc[token_index].i for token_index in token_indexes]
+        if doc._.coref_chains is not None:
+            return {
+                token_index: ChainHolder.resolve(doc[token_index])
+                for token_index in token_indexes
+            }
+        if context_sentences is None:
+            context_sentences = (
+                2 * self.rules_analyzer.maximum_anaphora_sentence_referential_distance
+            )
+        if context_sentences < 0:
+            raise CorefereeError(
+                "".join(
+                    (
+                        "context_sentences must not be negative, not ",
+                        str(context_sentences),
+                        ".",
+                    )
+                )
+            )
+        # from token indexes to the numbers of context sentences and the indexes of the
+        # resolved tokens
+        cache = self.resolved_tokens.setdefault(doc, {})
+        for start_index, end_index, window_token_indexes in self.get_resolution_windows(
+            doc, token_indexes, context_sentences
+        ):
+            window_token_indexes = [
+                token_index
+                for token_index in window_token_indexes
+                if token_index not in cache or cache[token_index][0] < context_sentences
+            ]
+            if len(window_token_indexes) == 0:
+                continue
+            for token_index, resolved_indexes in self.resolve_window(
+                doc[start_index:end_index].as_doc(),
+                [token_index - start_index for token_index in window_token_indexes],
+            ).items():
+                cache[token_index + start_index] = (
+                    context_sentences,
+                    (
+                        None
+                        if resolved_indexes is None
+                        else [index + start_index for index in resolved_indexes]
+                    ),
+                )
+        return {
+            token_index: (
+                None
+                if cache[token_index][1] is None
+                else [doc[index] for index in cast(List[int], cache[token_index][1])]
+            )
+            for token_index in token_indexes
+        }
@@ -0,0 +1,219 @@
+from typing import Dict, List, Optional, Tuple, Union
+from collections import OrderedDict
+from hashlib import blake2b
+from threading import Lock
+import sqlite3
+import numpy
+import srsly
+from spacy.attrs import ORTH, LEMMA, POS, TAG, DEP, HEAD, MORPH, ENT_TYPE, ENT_IOB
+from spacy.attrs import SENT_START, SPACY
+from spacy.tokens import Doc, Token
+from .data_model import ChainHolder, Mention, get_annotation_context
+from .errors import CorefereeError
+
+# The token attributes on which the chains of a document depend
+KEY_ATTRIBUTES = [
+    ORTH,
+    SPACY,
+    LEMMA,
+    POS,
+    TAG,
+    DEP,
+    HEAD,
+    MORPH,
+    ENT_TYPE,
+    ENT_IOB,
+    SENT_START,
+]
+
+# The token attributes on which the feature maps and position maps of the tokens within
+# a sentence depend
+SENTENCE_KEY_ATTRIBUTES = [ORTH, LEMMA, POS, TAG, DEP, HEAD, MORPH, ENT_TYPE, ENT_IOB]
+
+# The feature maps and position maps of the tokens and mentions within a sentence, keyed
+# by the name of the map and the token indexes relative to the start of the sentence
+SentenceRows = Dict[Tuple[str, Tuple[int, ...]], List[Union[int, float]]]
+
+# The number of entries held in memory if only an SQLite database is specified
+CACHE_SIZE = 10000
+
+
+class ChainCache:
+    """Caches the chains of documents in their compact serialized form, keyed by a hash
+    of the parsed documents and of *identity*, which should identify the spaCy model,
+    the Coreferee model and the pipe configuration that produced the chains. Up to
+    *max_entries* entries are held in memory with least-recently-used eviction; if
+    *path* is specified, all entries are also stored in an SQLite database at *path*
+    that outlives the process and can be shared between processes.
+
+    *hits* and *misses* count the lookups that did and did not find chains."""
+
+    def __init__(self, identity: bytes, max_entries: int, path: Optional[str] = None):
+        if max_entries < 1:
+            raise CorefereeError(
+                "".join(("cache_size must be at least 1, not ", str(max_entries), "."))
+            )
+        self.identity = identity
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[bytes, bytes]" = OrderedDict()
+        self.lock = Lock()
+        self.connection: Optional[sqlite3.Connection] = None
+        if path is not None:
+            self.connection = sqlite3.connect(path, timeout=60, check_same_thread=False)
+            with self.connection:
+                self.connection.execute(
+                    "CREATE TABLE IF NOT EXISTS chains "
+                    "(key BLOB PRIMARY KEY, value BLOB)"
+                )
+        self.hits = 0
+        self.misses = 0
+
+    def get_key(self, doc: Doc) -> bytes:
+        digest = blake2b(self.identity, digest_size=20)
+        digest.update(doc.to_array(KEY_ATTRIBUTES).tobytes())
+        return digest.digest()
+
+    def get(self, key: bytes) -> Optional[ChainHolder]:
+        """Returns a new *ChainHolder* holding the chains stored under *key*, or *None*
+        if there are none. The object is completed when it is first accessed via the
+        *doc._.coref_chains* of the document to which it is assigned."""
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+            elif self.connection is not None:
+                row = self.connection.execute(
+                    "SELECT value FROM chains WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    value = row[0]
+                    self.add_entry(key, value)
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return srsly.msgpack_loads(value)
+
+    def put(self, key: bytes, chain_holder: ChainHolder) -> None:
+        value = srsly.msgpack_dumps(chain_holder)
+        with self.lock:
+            self.add_entry(key, value)
+            if self.connection is not None:
+                with self.connection:
+                    self.connection.execute(
+                        "INSERT OR REPLACE INTO chains (key, value) VALUES (?, ?)",
+                        (key, value),
+                    )
+
+    def add_entry(self, key: bytes, value: bytes) -> None:
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def close(self) -> None:
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+class SentenceFeatureCache:
+    """Caches the feature maps and position maps of tokens and mentions, which depend
+    only on the sentences containing them, so that they are shared between identical
+    sentences in different documents. The maps are keyed by a hash of the parse of each
+    sentence and, within a sentence, by the indexes of the tokens of each token or
+    mention relative to the start of the sentence. The maps for up to *max_entries*
+    sentences are held in memory with least-recently-used eviction.
+
+    *hits* and *misses* count the lookups that did and did not find maps."""
+
+    def __init__(self, max_entries: int):
+        if max_entries < 1:
+            raise CorefereeError(
+                "".join(
+                    (
+                        "sentence_cache_size must be at least 1, not ",
+                        str(max_entries),
+                        ".",
+                    )
+                )
+            )
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[bytes, SentenceRows]" = OrderedDict()
+        self.lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_sentence_rows(self, doc: Doc) -> List[Optional[SentenceRows]]:
+        """Returns, for each sentence in *doc*, the dictionary in which the maps of the
+        tokens and mentions within the sentence are stored, or *None* for a sentence
+        containing tokens whose heads lie outside it."""
+        context = get_annotation_context(doc)
+        array = doc.to_array(SENTENCE_KEY_ATTRIBUTES)
+        # *HEAD* holds the offset of each token's head from the token
+        heads = array[:, SENTENCE_KEY_ATTRIBUTES.index(HEAD)].astype("int64")
+        heads += numpy.arange(len(doc))
+        sentence_rows: List[Optional[SentenceRows]] = []
+        with self.lock:
+            for start, end in zip(
+                context.sent_starts, context.sent_starts[1:] + [len(doc)]
+            ):
+                if heads[start:end].min() < start or heads[start:end].max() >= end:
+                    sentence_rows.append(None)
+                    continue
+                key = blake2b(array[start:end].tobytes(), digest_size=20).digest()
+                rows = self.entries.get(key)
+                if rows is None:
+                    rows = {}
+                    self.entries[key] = rows
+                    if len(self.entries) > self.max_entries:
+                        self.entries.popitem(last=False)
+                else:
+                    self.entries.move_to_end(key)
+                sentence_rows.append(rows)
+        return sentence_rows
+
+    def get_rows_and_key(
+        self, token_or_mention: Union[Token, Mention], doc: Doc, map_name: str
+    ) -> Tuple[Optional[SentenceRows], Tuple[str, Tuple[int, ...]]]:
+        context = get_annotation_context(doc)
+        if context.sentence_rows is None:
+            context.sentence_rows = self.get_sentence_rows(doc)
+        if isinstance(token_or_mention, Token):
+            token_indexes: Tuple[int, ...] = (token_or_mention.i,)
+        else:
+            token_indexes = tuple(token_or_mention.token_indexes)
+        sent_index = context.sent_indexes[token_indexes[0]]
+        start = context.sent_starts[sent_index]
+        if any(context.sent_indexes[index] != sent_index for index in token_indexes):
+            return None, (map_name, token_indexes)
+        return context.sentence_rows[sent_index], (
+            map_name,
+            tuple(index - start for index in token_indexes),
+        )
+
+    def get(
+        self, token_or_mention: Union[Token, Mention], doc: Doc, map_name: str
+    ) -> Optional[List[Union[int, float]]]:
+        """Returns the map called *map_name* of *token_or_mention*, which is within
+        *doc*, or *None* if it has not been stored for an identical sentence."""
+        rows, key = self.get_rows_and_key(token_or_mention, doc, map_name)
+        with self.lock:
+            row = rows.get(key) if rows is not None else None
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return row
+
+    def put(
+        self,
+        token_or_mention: Union[Token, Mention],
+        doc: Doc,
+        map_name: str,
+        row: List[Union[int, float]],
+    ) -> None:
+        rows, key = self.get_rows_and_key(token_or_mention, doc, map_name)
+        if rows is not None:
+            with self.lock:
+                rows[key] = row
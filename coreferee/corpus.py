@@ -0,0 +1,268 @@
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+import json
+import os
+from itertools import islice
+from time import perf_counter
+from wasabi import Printer  # type: ignore[import]
+from spacy.language import Language
+from spacy.tokens import Doc, DocBin
+from .errors import CorefereeError
+
+# The formats in which annotated documents can be written: *docbin* writes spaCy
+# *DocBin* files containing the documents and their chains, *jsonl* writes one line per
+# document with the chains as token indexes and character offsets
+OUTPUT_FORMATS = ("docbin", "jsonl")
+
+SHARD_SIZE = 1000
+
+MANIFEST_FILENAME = "manifest.json"
+
+
+class CorpusAnnotator:
+    """Annotates a corpus that is too large to hold in memory using *nlp*, which must
+    contain the *coreferee* pipe. The input is streamed either from a JSONL file whose
+    lines are strings or objects with a *text* and optionally an *id* field, or from a
+    directory of *DocBin* files with the extension *.spacy*. The annotated documents are
+    written to numbered shards of *shard_size* documents each. A manifest recording the
+    shards written so far is updated once each shard is complete, so that an interrupted
+    job resumes with the first document not yet written when it is restarted.
+
+    *n_process* and *batch_size* are passed to *nlp.pipe()*."""
+
+    def __init__(
+        self,
+        nlp: Language,
+        *,
+        output_format: str = "docbin",
+        n_process: int = 1,
+        batch_size: Optional[int] = None,
+        shard_size: int = SHARD_SIZE,
+    ):
+        if output_format not in OUTPUT_FORMATS:
+            raise CorefereeError(
+                "".join(
+                    (
+                        "output_format must be one of ",
+                        ", ".join(OUTPUT_FORMATS),
+                        ", not ",
+                        str(output_format),
+                        ".",
+                    )
+                )
+            )
+        for name, value in (
+            ("n_process", n_process),
+            ("batch_size", batch_size),
+            ("shard_size", shard_size),
+        ):
+            if value is not None and value < 1:
+                raise CorefereeError(
+                    "".join((name, " must be at least 1, not ", str(value), "."))
+                )
+        self.nlp = nlp
+        self.output_format = output_format
+        self.n_process = n_process
+        self.batch_size = batch_size
+        self.shard_size = shard_size
+
+    def annotate(self, input_path: str, output_dir: str) -> Dict[str, Any]:
+        """Annotates the documents at *input_path* that are not yet recorded in the
+        manifest in *output_dir*, writes them to shards in *output_dir* and returns the
+        manifest."""
+        msg = Printer()
+        os.makedirs(output_dir, exist_ok=True)
+        manifest_filename = os.sep.join((output_dir, MANIFEST_FILENAME))
+        if os.path.isfile(manifest_filename):
+            with open(manifest_filename, "r", encoding="utf-8") as manifest_file:
+                manifest = json.load(manifest_file)
+            if (
+                manifest["input"] != os.path.abspath(input_path)
+                or manifest["output_format"] != self.output_format
+            ):
+                raise CorefereeError(
+                    "".join(
+                        (
+                            output_dir,
+                            " contains the output of a job with a different input or",
+                            " output format.",
+                        )
+                    )
+                )
+            if manifest["complete"]:
+                msg.good("".join(("All documents are already in ", output_dir, ".")))
+                return manifest
+            msg.info(
+                "".join(
+                    (
+                        "Resuming after ",
+                        str(manifest["documents"]),
+                        " documents in ",
+                        str(len(manifest["shards"])),
+                        " shards.",
+                    )
+                )
+            )
+        else:
+            manifest = {
+                "input": os.path.abspath(input_path),
+                "output_format": self.output_format,
+                "documents": 0,
+                "tokens": 0,
+                "shards": [],
+                "complete": False,
+            }
+        start_time = perf_counter()
+        documents = tokens = 0
+        shard: List[Tuple[Doc, Union[str, int]]] = []
+        for doc, document_id in self.nlp.pipe(
+            self.read_input(input_path, manifest["documents"]),
+            as_tuples=True,
+            n_process=self.n_process,
+            batch_size=self.batch_size,
+        ):
+            shard.append((doc, document_id))
+            if len(shard) == self.shard_size:
+                documents += len(shard)
+                tokens += self.write_shard(shard, output_dir, manifest)
+                shard = []
+                self.report(msg, documents, tokens, perf_counter() - start_time)
+        if len(shard) > 0:
+            documents += len(shard)
+            tokens += self.write_shard(shard, output_dir, manifest)
+        manifest["complete"] = True
+        self.write_manifest(manifest, output_dir)
+        self.report(msg, documents, tokens, perf_counter() - start_time)
+        return manifest
+
+    def read_input(
+        self, input_path: str, skip: int
+    ) -> Iterator[Tuple[Union[str, Doc], Union[str, int]]]:
+        """Yields the documents at *input_path* after the first *skip* documents
+        together with their ids, which are the positions of the documents within the
+        input unless JSONL lines specify ids. Skipped lines are not parsed and no
+        documents are created for skipped *DocBin* files."""
+        if os.path.isdir(input_path):
+            document_index = 0
+            for filename in sorted(
+                filename
+                for filename in os.listdir(input_path)
+                if filename.endswith(".spacy")
+            ):
+                doc_bin = DocBin().from_disk(os.sep.join((input_path, filename)))
+                if document_index + len(doc_bin) > skip:
+                    first_index = max(skip - document_index, 0)
+                    for index, doc in enumerate(
+                        islice(doc_bin.get_docs(self.nlp.vocab), first_index, None),
+                        first_index,
+                    ):
+                        yield doc, document_index + index
+                document_index += len(doc_bin)
+        else:
+            with open(input_path, "r", encoding="utf-8") as input_file:
+                for document_index, line in enumerate(
+                    islice(input_file, skip, None), skip
+                ):
+                    record = json.loads(line)
+                    if isinstance(record, str):
+                        yield record, document_index
+                    else:
+                        yield record["text"], record.get("id", document_index)
+
+    def write_shard(
+        self,
+        shard: List[Tuple[Doc, Union[str, int]]],
+        output_dir: str,
+        manifest: Dict[str, Any],
+    ) -> int:
+        """Writes the documents in *shard* with their ids, which are stored in
+        *doc.user_data["id"]* in *DocBin* files, to the next shard file in *output_dir*,
+        records the shard in *manifest* and returns the number of tokens the documents
+        contain. Each file is written under a temporary name and then renamed, so that
+        an interrupted job never leaves a partly written shard under the name recorded
+        in the manifest."""
+        filename = "".join(
+            (
+                "shard_",
+                str(len(manifest["shards"])).zfill(5),
+                ".spacy" if self.output_format == "docbin" else ".jsonl",
+            )
+        )
+        path = os.sep.join((output_dir, filename))
+        temp_path = "".join((path, ".tmp"))
+        if self.output_format == "docbin":
+            doc_bin = DocBin(store_user_data=True)
+            for doc, document_id in shard:
+                doc.user_data["id"] = document_id
+                doc_bin.add(doc)
+            doc_bin.to_disk(temp_path)
+        else:
+            with open(temp_path, "w", encoding="utf-8") as shard_file:
+                for doc, document_id in shard:
+                    record = {"id": document_id, "chains": get_chains_record(doc)}
+                    shard_file.write(json.dumps(record))
+                    shard_file.write("\n")
+        os.replace(temp_path, path)
+        tokens = sum(len(doc) for doc, _ in shard)
+        manifest["shards"].append(
+            {
+                "filename": filename,
+                "first_document": manifest["documents"],
+                "documents": len(shard),
+                "tokens": tokens,
+            }
+        )
+        manifest["documents"] += len(shard)
+        manifest["tokens"] += tokens
+        self.write_manifest(manifest, output_dir)
+        return tokens
+
+    @staticmethod
+    def write_manifest(manifest: Dict[str, Any], output_dir: str) -> None:
+        path = os.sep.join((output_dir, MANIFEST_FILENAME))
+        temp_path = "".join((path, ".tmp"))
+        with open(temp_path, "w", encoding="utf-8") as manifest_file:
+            json.dump(manifest, manifest_file, indent=2)
+        os.replace(temp_path, path)
+
+    @staticmethod
+    def report(msg: Printer, documents: int, tokens: int, seconds: float) -> None:
+        msg.info(
+            "".join(
+                (
+                    str(documents),
+                    " documents and ",
+                    str(tokens),
+                    " tokens annotated in ",
+                    str(round(seconds, 1)),
+                    " seconds (",
+                    str(round(documents / seconds, 1)) if seconds > 0 else "-",
+                    " documents per second, ",
+                    str(round(tokens / seconds)) if seconds > 0 else "-",
+                    " tokens per second)",
+                )
+            )
+        )
+
+
+def get_chains_record(doc: Doc) -> List[Dict[str, Any]]:
+    """Returns the chains of *doc* as written to JSONL shards: for each chain, the index
+    of its most specific mention and, for each mention, the indexes of its tokens and
+    the start and end character offsets of each token."""
+    if doc._.coref_chains is None:
+        return []
+    return [
+        {
+            "most_specific_mention_index": chain.most_specific_mention_index,
+            "mentions": [
+                {
+                    "token_indexes": list(mention.token_indexes),
+                    "char_offsets": [
+                        [doc[index].idx, doc[index].idx + len(doc[index])]
+                        for index in mention.token_indexes
+                    ],
+                }
+                for mention in chain.mentions
+            ],
+        }
+        for chain in doc._.coref_chains.chains
+    ]
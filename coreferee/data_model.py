@@ -1,18 +1,50 @@
-from typing import List, Union, Dict, Tuple, Iterator, Set, Optional, cast
+from typing import List, Union, Dict, Tuple, Iterable, Iterator, Set, Optional, cast
 from os import linesep
-from spacy.tokens import Token
+from array import array
+from bisect import bisect_left
+from itertools import accumulate
+from spacy.tokens import Doc, SpanGroup, Token
+from thinc.types import Floats1d
 from srsly import msgpack_decoders, msgpack_encoders  # type:ignore[import]
+from .errors import CorefereeError, UnsupportedChainFormatError
 
+# The version of the format in which *ChainHolder* objects are serialized. Version 1,
+# written by Coreferee versions before 1.5.0, stored the token indexes and the pretty
+# representation of each mention, and was stored for each token as well as for the
+# document; version 2 stores the chains of the document once as flat integer lists.
+CHAIN_HOLDER_FORMAT_VERSION = 2
 
-class ChainHolder:
-    """The object returned by *token._.coref_chains*."""
+# The key under which *doc._.coref_chains* is stored in *doc.user_data*, which is the
+# key spaCy uses for an extension attribute with a default value as used by earlier
+# versions, so that documents serialized by those versions can still be read
+DOC_CHAIN_HOLDER_KEY = ("._.", "coref_chains", None, None)
+
+# The prefix of the names of the span groups in *doc.spans* to which chains are written
+# if the *output* pipe config option is *span_groups* or *both*
+SPAN_GROUP_PREFIX = "coref_chains_"
 
-    def __init__(self):
-        self.chains = []
 
-        # 'temp*' properties will be removed before processing ends
-        self.temp_governing_sibling = None
-        self.temp_has_or_coordination = False
+class ChainHolder:
+    """The object returned by *doc._.coref_chains* and by *token._.coref_chains*. The
+    object returned for a token is a view created on access from the token chain index
+    of the object returned for its document."""
+
+    # Set on the object returned by *doc._.coref_chains* when the document is annotated
+    retry_statistics: Optional["RetryStatistics"] = None
+    # The stages to which annotation degraded because the time limit was approached
+    degradations: Tuple[str, ...] = ()
+    # Built from *chains* on the object returned by *doc._.coref_chains* when the
+    # chains of a token are first requested
+    token_chain_index: Optional["TokenChainIndex"] = None
+    # Built from *chains* on the object returned by *doc._.coref_chains* by
+    # *index_mentions()* when the document is annotated or loaded
+    mention_interval_index: Optional["MentionIntervalIndex"] = None
+    # Set on an object decoded from bytes until *restore()* has been called: the version
+    # of the format it was decoded from
+    decoded_version: Optional[int] = None
+
+    def __init__(self, chains: Optional[List["Chain"]] = None):
+        self.chains = [] if chains is None else chains
 
     def __str__(self) -> str:
         return str(self.chains)
@@ -36,86 +68,237 @@ class ChainHolder:
     def pretty_representation(self) -> str:
         return "; ".join(chain.pretty_representation for chain in self.chains)
 
+    def get_token_chains(self, token_index: int) -> List["Chain"]:
+        """Returns the chains containing the token at *token_index* where *self* is the
+        object returned by *doc._.coref_chains*."""
+        if (
+            self.token_chain_index is None
+            or self.token_chain_index.chains is not self.chains
+            or self.token_chain_index.chain_count != len(self.chains)
+        ):
+            self.token_chain_index = TokenChainIndex(self.chains)
+        return self.token_chain_index.get_chains(token_index)
+
+    def index_mentions(self, doc: Doc) -> None:
+        """Builds the index used by *get_overlapping_mentions()* and
+        *get_overlapping_chains()* from *chains*, where *self* is the object returned by
+        *doc._.coref_chains*. This is done automatically when *doc* is annotated or
+        loaded, but has to be repeated if *chains* is changed subsequently."""
+        self.mention_interval_index = MentionIntervalIndex(self.chains, doc)
+
+    def get_overlapping_mentions(
+        self, start: int, end: int, *, char_offsets: bool = False
+    ) -> List[Tuple[int, int]]:
+        """Returns the chain indexes and the indexes within their chains of the mentions
+        that overlap the tokens from *start* up to but not including *end*, or the
+        characters if *char_offsets* is *True*, ordered by where the mentions begin. A
+        mention consisting of coordinated tokens extends from the first to the last of
+        them."""
+        if (
+            self.mention_interval_index is None
+            or self.mention_interval_index.chains is not self.chains
+            or self.mention_interval_index.chain_count != len(self.chains)
+        ):
+            raise CorefereeError(
+                "The chains have changed since the mentions were indexed: call "
+                "index_mentions() first."
+            )
+        return self.mention_interval_index.get_overlapping_mentions(
+            start, end, char_offsets
+        )
+
+    def get_overlapping_chains(
+        self, start: int, end: int, *, char_offsets: bool = False
+    ) -> List["Chain"]:
+        """Returns the chains with mentions that overlap the tokens from *start* up to
+        but not including *end*, or the characters if *char_offsets* is *True*, ordered
+        by chain index."""
+        return [
+            self.chains[chain_index]
+            for chain_index in sorted(
+                {
+                    chain_index
+                    for chain_index, _ in self.get_overlapping_mentions(
+                        start, end, char_offsets=char_offsets
+                    )
+                }
+            )
+        ]
+
     @staticmethod
     def resolve(token: Token) -> Optional[List[Token]]:
         """If *token* is an anaphor, returns a list of tokens to which *token* points;
         otherwise returns *None*.
         """
-
-        def resolve_recursively(token: Token) -> Set[Token]:
-            tokens_to_return = set()
-            for chain in token._.coref_chains.chains:
-                for mention in (
-                    mention
+        resolved_indexes = token.doc._.coref_chains.resolve_index(token.i, {})
+        if len(resolved_indexes) == 1 and token.i in resolved_indexes:
+            return None
+        return [token.doc[index] for index in sorted(resolved_indexes)]
+
+    def resolve_all(self) -> Dict[int, List[int]]:
+        """Returns a dictionary from the index of each token for which *resolve()* would
+        not return *None* to the indexes of the tokens *resolve()* would return, where
+        *self* is the object returned by *doc._.coref_chains*. The resolutions of tokens
+        within mentions consisting of coordinated tokens are only worked out once."""
+        memo: Dict[int, Set[int]] = {}
+        resolutions = {}
+        for token_index in sorted(
+            {
+                token_index
+                for chain in self.chains
+                for mention in chain.mentions
+                for token_index in mention.token_indexes
+            }
+        ):
+            resolved_indexes = self.resolve_index(token_index, memo)
+            if len(resolved_indexes) > 1 or token_index not in resolved_indexes:
+                resolutions[token_index] = sorted(resolved_indexes)
+        return resolutions
+
+    def resolve_index(self, token_index: int, memo: Dict[int, Set[int]]) -> Set[int]:
+        """Returns the indexes of the tokens to which the token at *token_index* points,
+        which is the token itself if it does not point to any other tokens. *memo* holds
+        the indexes already worked out for other tokens."""
+        if token_index in memo:
+            return memo[token_index]
+        # guards against mentions that would otherwise resolve each other endlessly
+        memo[token_index] = {token_index}
+        token_chains = self.get_token_chains(token_index)
+        resolved_indexes = None
+        for chain in token_chains:
+            for mention in (
+                mention
+                for mention in chain.mentions
+                if len(mention.token_indexes) > 1
+                and token_index not in mention.token_indexes
+            ):
+                # Mention contains multiple tokens, some of which may be anaphors and
+                # belong to further chains.
+                resolved_indexes = set()
+                for contained_index in mention.token_indexes:
+                    if contained_index != token_index:
+                        resolved_indexes.update(
+                            self.resolve_index(contained_index, memo)
+                        )
+                break
+            if resolved_indexes is not None:
+                break
+        else:
+            for chain in token_chains:
+                if any(
+                    len(mention.token_indexes) > 1
+                    and token_index in mention.token_indexes
                     for mention in chain.mentions
-                    if len(mention.token_indexes) > 1
-                    and token.i not in mention.token_indexes
-                ):
-                    # Mention contains multiple tokens, some of which may be anaphors and
-                    # belong to further chains.
-                    for contained_token in (
-                        token.doc[index]
-                        for index in mention.token_indexes
-                        if index != token.i
-                    ):
-                        tokens_to_return.update(resolve_recursively(contained_token))
-                    return tokens_to_return
-            for chain in token._.coref_chains.chains:
-                if (
-                    len(
-                        [
-                            mention
-                            for mention in chain.mentions
-                            if len(mention.token_indexes) > 1
-                            and token.i in mention.token_indexes
-                        ]
-                    )
-                    > 0
                 ):
-                    # This token is pointing back to a multiple-token mention which should
-                    # already have been dealt with further up the recursion stack
+                    # This token is pointing back to a multiple-token mention which
+                    # should already have been dealt with further up the recursion stack
                     continue
-                return {
-                    token.doc[
-                        chain.mentions[chain.most_specific_mention_index].root_index
-                    ]
+                resolved_indexes = {
+                    chain.mentions[chain.most_specific_mention_index].root_index
                 }
-            return {token}
-
-        resolved_set = resolve_recursively(token)
-        if len(resolved_set) == 1 and token in resolved_set:
-            return None
-        return sorted(list(resolved_set))  # type:ignore[type-var]
+                break
+        if resolved_indexes is None:
+            resolved_indexes = {token_index}
+        memo[token_index] = resolved_indexes
+        return resolved_indexes
+
+    def restore(self, doc: Doc) -> None:
+        """Completes an object decoded from bytes once the document it belongs to is
+        available: mentions decoded from the compact format are given their pretty
+        representations, and the per-token objects stored by earlier versions, which
+        are now derived from *self*, are removed from *doc.user_data*."""
+        if self.decoded_version == 1:
+            for key in [
+                key
+                for key in doc.user_data
+                if isinstance(key, tuple)
+                and key[:2] == DOC_CHAIN_HOLDER_KEY[:2]
+                and key[2] is not None
+            ]:
+                del doc.user_data[key]
+        else:
+            for working_chain in self.chains:
+                for mention in working_chain.mentions:
+                    mention._doc = doc
+                    mention.release_doc()
+        self.index_mentions(doc)
+        self.decoded_version = None
 
     @msgpack_encoders("coreferee_chain_holder")
     def serialize_obj(obj, chain=None):
         if isinstance(obj, ChainHolder):
-            serialized_chain_holder = []
+            chain_lengths = []
+            mention_lengths = []
+            token_indexes: List[int] = []
             for working_chain in obj.chains:
-                serialized_chain_holder.append(
-                    (
-                        [
-                            (mention.token_indexes, mention.pretty_representation)
-                            for mention in working_chain.mentions
-                        ],
-                        working_chain.most_specific_mention_index,
-                    )
-                )
-            return {"__coreferee_chain_holder__": serialized_chain_holder}
+                chain_lengths.append(len(working_chain.mentions))
+                for mention in working_chain.mentions:
+                    mention_lengths.append(len(mention.token_indexes))
+                    token_indexes.extend(mention.token_indexes)
+            return {
+                "__coreferee_chains__": {
+                    "version": CHAIN_HOLDER_FORMAT_VERSION,
+                    "chain_lengths": chain_lengths,
+                    "mention_lengths": mention_lengths,
+                    "token_indexes": token_indexes,
+                    "most_specific_mention_indexes": [
+                        working_chain.most_specific_mention_index
+                        for working_chain in obj.chains
+                    ],
+                }
+            }
         return obj if chain is None else chain(obj)
 
     @msgpack_decoders("coreferee_chain_holder")
     def deserialize_obj(obj, chain=None):
+        if "__coreferee_chains__" in obj:
+            serialized_chains = obj["__coreferee_chains__"]
+            if serialized_chains["version"] > CHAIN_HOLDER_FORMAT_VERSION:
+                raise UnsupportedChainFormatError(
+                    " ".join(
+                        (
+                            "Chains serialized in format version",
+                            str(serialized_chains["version"]),
+                            "require a later version of Coreferee.",
+                        )
+                    )
+                )
+            chain_holder = ChainHolder()
+            chain_holder.decoded_version = serialized_chains["version"]
+            token_indexes = serialized_chains["token_indexes"]
+            mention_lengths = iter(serialized_chains["mention_lengths"])
+            token_position = 0
+            for index, (chain_length, most_specific_mention_index) in enumerate(
+                zip(
+                    serialized_chains["chain_lengths"],
+                    serialized_chains["most_specific_mention_indexes"],
+                )
+            ):
+                mentions = []
+                for _ in range(chain_length):
+                    mention_length = next(mention_lengths)
+                    mention = Mention()
+                    mention.token_indexes = list(
+                        token_indexes[token_position : token_position + mention_length]
+                    )
+                    mention.root_index = mention.token_indexes[0]
+                    mentions.append(mention)
+                    token_position += mention_length
+                working_chain = Chain(mentions, most_specific_mention_index)
+                working_chain.index = index
+                chain_holder.chains.append(working_chain)
+            return chain_holder
         if "__coreferee_chain_holder__" in obj:
+            # the format written by Coreferee versions before 1.5.0
             chain_holder = ChainHolder()
-            chain_holder.chains = []
+            chain_holder.decoded_version = 1
             for index, (chain_representation, most_specific_mention_index) in enumerate(
                 obj["__coreferee_chain_holder__"]
             ):
                 mentions = []
                 for (token_indexes, pretty_representation) in chain_representation:
                     mention = Mention()
-                    mention.token_indexes = token_indexes
+                    mention.token_indexes = list(token_indexes)
                     mention.pretty_representation = pretty_representation
                     mention.root_index = token_indexes[0]
                     mentions.append(mention)
@@ -126,7 +309,185 @@ class ChainHolder:
         return obj if chain is None else chain(obj)
 
 
+class TokenChainIndex:
+    """Maps the tokens of a document to the chains containing them in a compressed
+    sparse row layout: the positions within *chains* of the chains containing the token
+    at index *i* are *chain_positions[offsets[i]:offsets[i + 1]]*. Tokens after the last
+    token belonging to a mention have no entry in *offsets*."""
+
+    def __init__(self, chains: List["Chain"]):
+        self.chains = chains
+        self.chain_count = len(chains)
+        token_and_chain_positions = [
+            (token_index, chain_position)
+            for chain_position, chain in enumerate(chains)
+            for mention in chain.mentions
+            for token_index in mention.token_indexes
+        ]
+        token_count = 1 + max(
+            (token_index for token_index, _ in token_and_chain_positions), default=-1
+        )
+        counts = [0] * (token_count + 1)
+        for token_index, _ in token_and_chain_positions:
+            counts[token_index + 1] += 1
+        self.offsets = array("l", accumulate(counts))
+        self.chain_positions = array("l", [0]) * len(token_and_chain_positions)
+        # a counting sort that retains the order of the chains and mentions
+        next_positions = self.offsets.tolist()
+        for token_index, chain_position in token_and_chain_positions:
+            self.chain_positions[next_positions[token_index]] = chain_position
+            next_positions[token_index] += 1
+
+    def get_chains(self, token_index: int) -> List["Chain"]:
+        if token_index + 1 >= len(self.offsets):
+            return []
+        return [
+            self.chains[chain_position]
+            for chain_position in self.chain_positions[
+                self.offsets[token_index] : self.offsets[token_index + 1]
+            ]
+        ]
+
+
+class MentionIntervalIndex:
+    """Holds the token and character extents of the mentions in *chains* sorted by
+    where they begin. Because no mention extends over more than *max_lengths* tokens or
+    characters, the mentions overlapping a range can only begin in a window found by
+    binary search, so that a query takes logarithmic time plus time proportional to the
+    number of mentions beginning in that window."""
+
+    def __init__(self, chains: List["Chain"], doc: Doc):
+        self.chains = chains
+        self.chain_count = len(chains)
+        extents = sorted(
+            (
+                min(mention.token_indexes),
+                max(mention.token_indexes),
+                chain_position,
+                mention_position,
+            )
+            for chain_position, chain in enumerate(chains)
+            for mention_position, mention in enumerate(chain.mentions)
+        )
+        # the token and character extents, with the first index of each in *starts* and
+        # the index after the end of each in *ends*
+        self.starts = (
+            array("l", (extent[0] for extent in extents)),
+            array("l", (doc[extent[0]].idx for extent in extents)),
+        )
+        self.ends = (
+            array("l", (extent[1] + 1 for extent in extents)),
+            array(
+                "l",
+                (doc[extent[1]].idx + len(doc[extent[1]]) for extent in extents),
+            ),
+        )
+        self.max_lengths = tuple(
+            max((end - start for start, end in zip(starts, ends)), default=0)
+            for starts, ends in zip(self.starts, self.ends)
+        )
+        self.chain_positions = array("l", (extent[2] for extent in extents))
+        self.mention_positions = array("l", (extent[3] for extent in extents))
+
+    def get_overlapping_mentions(
+        self, start: int, end: int, char_offsets: bool
+    ) -> List[Tuple[int, int]]:
+        starts = self.starts[char_offsets]
+        ends = self.ends[char_offsets]
+        return [
+            (self.chain_positions[position], self.mention_positions[position])
+            for position in range(
+                bisect_left(starts, start - self.max_lengths[char_offsets] + 1),
+                bisect_left(starts, end),
+            )
+            if ends[position] > start
+        ]
+
+
+def get_doc_chain_holder(doc: Doc) -> Optional[ChainHolder]:
+    """The getter of *doc._.coref_chains*."""
+    chain_holder = doc.user_data.get(DOC_CHAIN_HOLDER_KEY)
+    if chain_holder is not None and chain_holder.decoded_version is not None:
+        chain_holder.restore(doc)
+    return chain_holder
+
+
+def set_doc_chain_holder(doc: Doc, chain_holder: Optional[ChainHolder]) -> None:
+    """The setter of *doc._.coref_chains*."""
+    if chain_holder is None:
+        doc.user_data.pop(DOC_CHAIN_HOLDER_KEY, None)
+    else:
+        doc.user_data[DOC_CHAIN_HOLDER_KEY] = chain_holder
+
+
+def set_span_groups(doc: Doc) -> None:
+    """Writes the chains in *doc._.coref_chains* to *doc.spans*, replacing any groups
+    written by an earlier annotation. Each chain becomes a group named
+    *SPAN_GROUP_PREFIX* followed by the chain index, with one span per mention and the
+    attributes *chain_index* and *most_specific_mention_index*. A mention consisting of
+    coordinated tokens spans from the first to the last of them."""
+    for name in [name for name in doc.spans if name.startswith(SPAN_GROUP_PREFIX)]:
+        del doc.spans[name]
+    for working_chain in doc._.coref_chains.chains:
+        name = "".join((SPAN_GROUP_PREFIX, str(working_chain.index)))
+        doc.spans[name] = SpanGroup(
+            doc,
+            name=name,
+            attrs={
+                "chain_index": working_chain.index,
+                "most_specific_mention_index": (
+                    working_chain.most_specific_mention_index
+                ),
+            },
+            spans=[
+                doc[min(mention.token_indexes) : max(mention.token_indexes) + 1]
+                for mention in working_chain.mentions
+            ],
+        )
+
+
+def get_token_chain_holder(token: Token) -> Optional[ChainHolder]:
+    """The getter of *token._.coref_chains*."""
+    doc_chain_holder = token.doc._.coref_chains
+    if doc_chain_holder is None:
+        return None
+    return ChainHolder(doc_chain_holder.get_token_chains(token.i))
+
+
+class RetryStatistics:
+    """Counts the work done while searching for alternative interpretations of anaphors
+    that could not be assigned to chains within a document."""
+
+    def __init__(self):
+        # anaphors for which alternative interpretations were searched for
+        self.retries = 0
+        # rewinds to a preceding anaphor that were replayed
+        self.rewinds = 0
+        # searches that were abandoned because the retry budget was exhausted
+        self.budget_exhaustions = 0
+        self.seconds = 0.0
+
+    def __str__(self) -> str:
+        return "".join(
+            (
+                "retries: ",
+                str(self.retries),
+                ", rewinds: ",
+                str(self.rewinds),
+                ", budget exhaustions: ",
+                str(self.budget_exhaustions),
+                ", seconds: ",
+                str(round(self.seconds, 3)),
+            )
+        )
+
+    def __repr__(self) -> str:
+        return str(self)
+
+
 class Chain:
+    __slots__ = ("mentions", "most_specific_mention_index", "index")
+
     def __init__(self, mentions: List["Mention"], most_specific_mention_index: int):
         self.mentions = mentions
         self.most_specific_mention_index = most_specific_mention_index
@@ -160,17 +521,41 @@ class Chain:
 
 
 class Mention:
+    """A mention within a chain or a potential referred. The pretty representation is
+    only formatted when first requested, as most mentions never end up in a chain.
+
+    The attributes *true_in_training* and *spanned_in_training* are only ever set during
+    training, where their presence rather than their value is significant."""
+
+    __slots__ = (
+        "root_index",
+        "token_indexes",
+        "_doc",
+        "_pretty_representation",
+        "true_in_training",
+        "spanned_in_training",
+    )
+
     def __init__(self, root: Token = None, include_dependent_siblings: bool = False):
+        # the document from which the pretty representation is formatted, released as
+        # soon as the representation has been formatted
+        self._doc: Optional[Doc] = None
+        self._pretty_representation: Optional[str] = None
         if root is not None:  # root==None during deserialization, never otherwise
             doc = root.doc
+            self._doc = doc
             self.root_index = root.i
             self.token_indexes = [root.i]
             if include_dependent_siblings:
-                self.token_indexes.extend(
-                    [t.i for t in root._.coref_chains.temp_dependent_siblings]
-                )
+                dependent_siblings = get_annotation_context(doc).dependent_siblings
+                self.token_indexes.extend([t.i for t in dependent_siblings[root.i]])
+
+    @property
+    def pretty_representation(self) -> str:
+        if self._pretty_representation is None:
+            doc = self._doc
             if len(self.token_indexes) > 1:
-                self.pretty_representation = "".join(
+                self._pretty_representation = "".join(
                     (
                         "[",
                         "; ".join(
@@ -181,9 +566,23 @@ class Mention:
                     )
                 )
             else:
-                self.pretty_representation = "".join(
+                self._pretty_representation = "".join(
                     (doc[self.root_index].text, "(", str(self.root_index), ")")
                 )
+            self._doc = None
+        return self._pretty_representation
+
+    @pretty_representation.setter
+    def pretty_representation(self, pretty_representation: str) -> None:
+        self._pretty_representation = pretty_representation
+        self._doc = None
+
+    def release_doc(self) -> None:
+        """Formats the pretty representation and drops the reference to the document, so
+        that a mention stored in *doc._.coref_chains* does not keep the document in a
+        reference cycle."""
+        if self._doc is not None:
+            self.pretty_representation
 
     def __eq__(self, other):
         return isinstance(other, Mention) and self.token_indexes == other.token_indexes
@@ -205,17 +604,94 @@ class Mention:
 
     @staticmethod
     def number_of_training_mentions_marked_true(token: Token) -> int:
-        if not hasattr(token._.coref_chains, "temp_potential_referreds"):
+        potential_referreds = get_annotation_context(token.doc).potential_referreds.get(
+            token.i
+        )
+        if potential_referreds is None:
             return 0
         return len(
             [
                 1
-                for mention in token._.coref_chains.temp_potential_referreds
+                for mention in potential_referreds
                 if hasattr(mention, "true_in_training")
             ]
         )
 
 
+# The key under which the *AnnotationContext* of a document being annotated is stored in
+# *doc.user_data*
+ANNOTATION_CONTEXT_KEY = "coreferee_annotation_context"
+
+
+class AnnotationContext:
+    """Holds the intermediate state built up while a document is being annotated. The
+    per-token state is held in lists indexed by token index and the sparser state in
+    dictionaries, so that none of it has to be accessed via spaCy extension attributes.
+    The object is stored in *doc.user_data* by *RulesAnalyzer.initialize()* and simply
+    dropped once annotation has finished.
+    """
+
+    def __init__(self, doc: Doc):
+        length = len(doc)
+
+        # The index of the first token of each sentence
+        self.sent_starts: List[int] = []
+
+        # The index of the sentence containing each token
+        self.sent_indexes: List[int] = [0] * length
+
+        # The dependent siblings of each token, e.g. 'Peter' for 'Richard' in 'Richard and
+        # Peter'
+        self.dependent_siblings: List[List[Token]] = [[] for _ in range(length)]
+
+        # The governing sibling of each token, e.g. 'Richard' for 'Peter' in 'Richard and
+        # Peter'
+        self.governing_siblings: List[Optional[Token]] = [None] * length
+
+        # Whether each token with dependent siblings is linked to them by 'or'
+        self.has_or_coordination: List[bool] = [False] * length
+
+        # For each token, the number of times each pair in *RulesAnalyzer.quote_tuples* has
+        # been opened and not yet closed
+        self.quote_arrays: List[List[int]] = [[] for _ in range(length)]
+
+        # Whether each token is an independent noun
+        self.potentially_referring: List[bool] = [False] * length
+
+        # From the index of each anaphor to its potential referreds
+        self.potential_referreds: Dict[int, List[Mention]] = {}
+
+        # The pairs of anaphor index and potential referred whose interpretation is
+        # uncertain
+        self.uncertain_pairs: Set[Tuple[int, Mention]] = set()
+
+        # Feature maps and position maps of tokens by index and of mentions
+        self.token_feature_maps: Dict[int, List[Union[int, float]]] = {}
+        self.mention_feature_maps: Dict[Mention, List[Union[int, float]]] = {}
+        self.token_position_maps: Dict[int, List[int]] = {}
+        self.mention_position_maps: Dict[Mention, List[int]] = {}
+
+        # For each sentence, the rows of feature maps and position maps shared with
+        # identical sentences in other documents, or *None* if the rows of the sentence
+        # are not shared (see *cache.SentenceFeatureCache*)
+        self.sentence_rows: Optional[
+            List[Optional[Dict[Tuple[str, Tuple[int, ...]], List[Union[int, float]]]]]
+        ] = None
+
+        # Compatibility maps of pairs of anaphor index and potential referred
+        self.compatibility_maps: Dict[Tuple[int, Mention], List[Union[int, float]]] = {}
+
+        # The vectors of tokens and of their heads by index
+        self.vectors: Dict[int, Floats1d] = {}
+        self.head_vectors: Dict[int, Floats1d] = {}
+
+
+def get_annotation_context(doc: Doc) -> AnnotationContext:
+    """Returns the *AnnotationContext* of *doc*, which must have been initialized by
+    *RulesAnalyzer.initialize()*."""
+    return doc.user_data[ANNOTATION_CONTEXT_KEY]
+
+
 class FeatureTable:
     """Captures the possible values of the various Spacy annotations that are observed
     to occur during a training corpus. These are then used as the basis for a oneshot
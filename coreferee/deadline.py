@@ -0,0 +1,46 @@
+from typing import List, Optional
+from time import perf_counter
+
+# The stages through which the annotation of a document degrades as the time spent on
+# it approaches its time limit, with the fraction of the limit at which each stage is
+# entered. Each stage also implies all the stages before it:
+#
+# skipped_retries: anaphors that cannot be assigned to chains are not retried
+# restricted_candidates: anaphors only consider their RESTRICTED_CANDIDATE_COUNT
+#   most likely potential referreds
+# skipped_noun_links: nouns are no longer linked to preceding coreferring nouns
+# rules_only: potential referreds not yet scored by the neural ensemble are ordered
+#   by the heuristic ordering of TendenciesAnalyzer.get_heuristic_order_key()
+# truncated: no further chains are built
+DEGRADATION_STAGES = (
+    ("skipped_retries", 0.5),
+    ("restricted_candidates", 0.7),
+    ("skipped_noun_links", 0.8),
+    ("rules_only", 0.9),
+    ("truncated", 1.0),
+)
+
+RESTRICTED_CANDIDATE_COUNT = 2
+
+
+class AnnotationDeadline:
+    """Tracks the time spent annotating a document against a limit of *time_limit*
+    seconds. If *time_limit* is *None*, no stage is ever reached."""
+
+    def __init__(self, time_limit: Optional[float]):
+        self.time_limit = time_limit
+        self.start_time = perf_counter()
+        # the stages that have been entered, in order
+        self.degradations: List[str] = []
+
+    def has_reached(self, stage: str) -> bool:
+        """Returns *True* if annotation should have degraded to *stage*."""
+        if self.time_limit is None:
+            return False
+        if len(self.degradations) < len(DEGRADATION_STAGES):
+            elapsed = perf_counter() - self.start_time
+            for stage_name, fraction in DEGRADATION_STAGES[len(self.degradations) :]:
+                if elapsed < fraction * self.time_limit:
+                    break
+                self.degradations.append(stage_name)
+        return stage in self.degradations
@@ -25,3 +25,15 @@ class VectorsModelHasWrongVersionError(CorefereeError):
 
 class OutdatedCorefereeModelError(CorefereeError):
     pass
+
+
+class QuantisedModelNotInstalledError(CorefereeError):
+    pass
+
+
+class DistilledModelNotInstalledError(CorefereeError):
+    pass
+
+
+class UnsupportedChainFormatError(CorefereeError):
+    pass
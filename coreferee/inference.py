@@ -0,0 +1,161 @@
+from typing import Dict, List, Optional, cast
+import io
+import numpy
+import srsly  # type: ignore[import]
+from thinc.model import Model
+from thinc.types import Floats2d, Ints1d
+from thinc.util import to_numpy
+from .errors import CorefereeError
+from .quantisation import dequantise_thinc_model
+from .runtime import NumpyEnsemble, PairInputs
+from .runtime import RUNTIME_BUNDLE_FORMAT_VERSION, get_runtime_bundle_key
+from .tendencies import DocumentPairInfo, get_ensemble_member_layers
+from .tendencies import create_thinc_model, create_distilled_thinc_model
+
+
+class FactorisedEnsemble:
+    """Inference-only counterpart of the ensemble generated by *create_thinc_model()*
+    that uses the same trained weights.
+
+    Within each ensemble member, the input to the first wide layer is the concatenation
+    of the squeezed referrer vector, the squeezed antecedent vector and the static info
+    row, which is itself made up of the referrer feature and position maps, the
+    antecedent feature and position maps and the compatibility map. Because a referrer
+    or an antecedent typically takes part in many pairs, the first layer is split into
+    the column blocks that see referrer inputs, antecedent inputs and the compatibility
+    map respectively. The referrer and antecedent blocks are projected once per referrer
+    and once per antecedent, and the per-pair work is reduced to projecting the narrow
+    compatibility map and adding the three partial results.
+
+    The forward pass itself is that of *runtime.NumpyEnsemble*, which executes the
+    members together with the weights of each layer stacked across the members. This
+    class reads the weights from the thinc model once and converts the
+    *DocumentPairInfo* objects to the plain arrays the runtime expects, so inference
+    runs on the CPU.
+
+    If *ensemble_size* is supplied, only the first *ensemble_size* members are
+    evaluated unless a different number is passed to *predict()*. If
+    *feature_map_width* is supplied, the one-hot feature maps are projected sparsely
+    (see *runtime.NumpyEnsemble*).
+    """
+
+    def __init__(
+        self,
+        thinc_ensemble: Model,
+        *,
+        ensemble_size: Optional[int] = None,
+        feature_map_width: Optional[int] = None,
+    ):
+        self.thinc_ensemble = thinc_ensemble
+        self.ops = thinc_ensemble.ops
+        self.numpy_ensemble = NumpyEnsemble(
+            get_runtime_bundle_arrays(thinc_ensemble),
+            ensemble_size=ensemble_size,
+            feature_map_width=feature_map_width,
+        )
+
+    def predict(
+        self,
+        document_pair_infos: List[DocumentPairInfo],
+        *,
+        ensemble_size: Optional[int] = None,
+    ) -> List[Floats2d]:
+        """Returns the same output as *thinc_ensemble.predict(document_pair_infos)*:
+        one array per referrer with a row for each candidate antecedent and a column for
+        each ensemble member. If fewer members than the whole ensemble are evaluated, the
+        arrays only contain the columns for the leading members; the members that are not
+        needed are never executed.
+        """
+        return [
+            self.ops.asarray2f(prediction)
+            for prediction in self.numpy_ensemble.predict(
+                [
+                    get_pair_inputs(document_pair_info)
+                    for document_pair_info in document_pair_infos
+                    if len(document_pair_info.candidates.dataXd) > 0
+                ],
+                ensemble_size=ensemble_size,
+            )
+        ]
+
+
+def get_pair_inputs(document_pair_info: DocumentPairInfo) -> PairInputs:
+    """Returns the inputs that *document_pair_info* holds for the ensemble as NumPy
+    arrays, with one vector per referrer and one per antecedent rather than one per
+    pair. As in *antecedents_forward()*, the vector of an antecedent with several tokens
+    is the mean of the vectors of those tokens."""
+    vectors = document_pair_info.vectors
+    antecedents = document_pair_info.antecedents
+    antecedent_lengths = to_numpy(antecedents.lengths)
+    antecedent_token_vectors = numpy.stack(
+        [
+            to_numpy(vectors[index])
+            for index in to_numpy(cast(Ints1d, antecedents.dataXd)).tolist()
+        ]
+    ).astype("float32", copy=False)
+    return PairInputs(
+        referrer_vectors=numpy.stack(
+            [
+                to_numpy(vectors[referrer])
+                for referrer in to_numpy(document_pair_info.referrers).tolist()
+            ]
+        ).astype("float32", copy=False),
+        antecedent_vectors=numpy.add.reduceat(
+            antecedent_token_vectors,
+            numpy.cumsum(antecedent_lengths) - antecedent_lengths,
+        )
+        / antecedent_lengths[:, None].astype("float32"),
+        referrer_static_infos=to_numpy(document_pair_info.referrer_static_infos),
+        antecedent_static_infos=to_numpy(document_pair_info.antecedent_static_infos),
+        compatibility_infos=to_numpy(document_pair_info.compatibility_infos),
+        referrers2candidates_pointers=to_numpy(
+            document_pair_info.referrers2candidates_pointers
+        ),
+        candidates=to_numpy(cast(Ints1d, document_pair_info.candidates.dataXd)),
+        candidate_lengths=to_numpy(document_pair_info.candidates.lengths),
+    )
+
+
+def get_runtime_bundle_arrays(thinc_ensemble: Model) -> Dict[str, numpy.ndarray]:
+    """Returns the weights of *thinc_ensemble*, which must have been generated by
+    *create_thinc_model()*, as the named NumPy arrays that *runtime.NumpyEnsemble*
+    accepts."""
+    arrays = {"format_version": numpy.array(RUNTIME_BUNDLE_FORMAT_VERSION)}
+    for member_index, member in enumerate(get_ensemble_member_layers(thinc_ensemble)):
+        for part, layers in member.items():
+            for layer_index, layer in enumerate(layers):
+                arrays[get_runtime_bundle_key(part, member_index, layer_index, "W")] = (
+                    thinc_ensemble.ops.to_numpy(layer.get_param("W"))
+                )
+                arrays[get_runtime_bundle_key(part, member_index, layer_index, "b")] = (
+                    thinc_ensemble.ops.to_numpy(layer.get_param("b"))
+                )
+                arrays[
+                    get_runtime_bundle_key(part, member_index, layer_index, "relu")
+                ] = numpy.array(layer.name == "relu")
+    return arrays
+
+
+def export_runtime_bundle(thinc_ensemble: Model) -> bytes:
+    """Returns the weights of *thinc_ensemble*, which must have been generated by
+    *create_thinc_model()*, as a flat bundle of named NumPy arrays that
+    *runtime.NumpyEnsemble* loads without thinc."""
+    bundle_bytes = io.BytesIO()
+    numpy.savez(bundle_bytes, **get_runtime_bundle_arrays(thinc_ensemble))
+    return bundle_bytes.getvalue()
+
+
+def load_thinc_model(data: bytes) -> Model:
+    """Returns the model serialized in *data*, which may be a model generated by
+    *create_thinc_model()*, a distilled model generated by
+    *create_distilled_thinc_model()* or a quantised model written by
+    *quantisation.quantise_thinc_model()*. The architecture is chosen to match the
+    number of layers recorded in *data*."""
+    msg = srsly.msgpack_loads(data)
+    if "dtype" in msg:
+        return dequantise_thinc_model(data)
+    for create_model in (create_thinc_model, create_distilled_thinc_model):
+        thinc_model = create_model()
+        if len(list(thinc_model.walk())) == len(msg["nodes"]):
+            return thinc_model.from_bytes(data)
+    raise CorefereeError("The model does not have a supported architecture.")
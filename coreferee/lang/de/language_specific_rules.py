@@ -2,7 +2,7 @@ from typing import List, Set, Tuple, Optional, cast
 from string import punctuation
 from spacy.tokens import Token
 from ...rules import RulesAnalyzer
-from ...data_model import Mention
+from ...data_model import Mention, get_annotation_context
 
 
 class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
@@ -43,7 +43,7 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
             siblings_set = set()
             coordinator = False
             if recursed_token.lemma_ in self.or_lemmas:
-                token._.coref_chains.temp_has_or_coordination = True
+                get_annotation_context(token.doc).has_or_coordination[token.i] = True
             if recursed_token.dep_ in self.dependent_sibling_deps:
                 siblings_set.add(recursed_token)
             for child in (
@@ -121,12 +121,8 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
 
         if token.tag_ == "PROAV":
             # 'damit' etc. in sentence-initial position refers to the preceding clause
-            if (
-                token.i
-                == token.doc._.coref_chains.temp_sent_starts[
-                    token._.coref_chains.temp_sent_index
-                ]
-            ):
+            context = get_annotation_context(token.doc)
+            if token.i == context.sent_starts[context.sent_indexes[token.i]]:
                 return False
             if not token.lemma_.lower().startswith("da"):
                 return False
@@ -305,6 +301,7 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
             return masc, fem, neut, plur
 
         doc = referring.doc
+        context = get_annotation_context(doc)
         referred_root = doc[referred.root_index]
 
         (
@@ -321,10 +318,9 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
             and referring_plur
             and self.is_involved_in_non_or_conjunction(referred_root)
             and not (
-                len(referred_root._.coref_chains.temp_dependent_siblings) > 0
+                len(context.dependent_siblings[referred_root.i]) > 0
                 and referring.i > referred.root_index
-                and referring.i
-                < referred_root._.coref_chains.temp_dependent_siblings[-1].i
+                and referring.i < context.dependent_siblings[referred_root.i][-1].i
             )
         ):
             return 0
@@ -362,11 +358,8 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
         if referring.tag_ == "PROAV":
 
             # 'damit' etc. does not refer to nouns over several sentences
-            if (
-                referring._.coref_chains.temp_sent_index
-                - referred_root._.coref_chains.temp_sent_index
-                > 1
-            ):
+            sent_indexes = context.sent_indexes
+            if sent_indexes[referring.i] - sent_indexes[referred_root.i] > 1:
                 return 0
 
             # 'damit' etc. cannot refer to people, places or organisations or to male or female
@@ -432,10 +425,8 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
                     working_token = working_token.head
 
         referring_governing_sibling = referring
-        if referring._.coref_chains.temp_governing_sibling is not None:
-            referring_governing_sibling = (
-                referring._.coref_chains.temp_governing_sibling
-            )
+        if context.governing_siblings[referring.i] is not None:
+            referring_governing_sibling = context.governing_siblings[referring.i]
         if (
             referring_governing_sibling.dep_ == "sb"
             and referring_governing_sibling.head.lemma_
@@ -494,11 +485,12 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
 
         referred_root = referring.doc[referred.root_index]
 
-        if referred_root._.coref_chains.temp_governing_sibling is not None:
-            referred_root = referred_root._.coref_chains.temp_governing_sibling
+        governing_siblings = get_annotation_context(referring.doc).governing_siblings
+        if governing_siblings[referred_root.i] is not None:
+            referred_root = governing_siblings[referred_root.i]
 
-        if referring._.coref_chains.temp_governing_sibling is not None:
-            referring = referring._.coref_chains.temp_governing_sibling
+        if governing_siblings[referring.i] is not None:
+            referring = governing_siblings[referring.i]
 
         if referred_root.dep_ == "sb":
             for referring_ancestor in referring.ancestors:
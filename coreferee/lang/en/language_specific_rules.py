@@ -1,7 +1,7 @@
 from typing import List, Set, Tuple, Optional
 from spacy.tokens import Token
 from ...rules import RulesAnalyzer
-from ...data_model import Mention
+from ...data_model import Mention, get_annotation_context
 
 
 class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
@@ -41,7 +41,7 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
             siblings_set = set()
             coordinator = False
             if recursed_token.lemma_ in self.or_lemmas:
-                token._.coref_chains.temp_has_or_coordination = True
+                get_annotation_context(token.doc).has_or_coordination[token.i] = True
             if recursed_token.dep_ in self.dependent_sibling_deps:
                 siblings_set.add(recursed_token)
             for child in (
@@ -99,9 +99,10 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
         # We have 'it' and have to find out if it is pleonastic...
 
         # Pleonastic it is out of the question in a conjunction environment
+        context = get_annotation_context(token.doc)
         if (
-            len(token._.coref_chains.temp_dependent_siblings) > 0
-            or token._.coref_chains.temp_governing_sibling is not None
+            len(context.dependent_siblings[token.i]) > 0
+            or context.governing_siblings[token.i] is not None
         ):
             return True
 
@@ -403,11 +404,12 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
 
         syntactic_subject_dep = ("nsubj", "nsubjpass")
 
-        if referred_root._.coref_chains.temp_governing_sibling is not None:
-            referred_root = referred_root._.coref_chains.temp_governing_sibling
+        governing_siblings = get_annotation_context(referring.doc).governing_siblings
+        if governing_siblings[referred_root.i] is not None:
+            referred_root = governing_siblings[referred_root.i]
 
-        if referring._.coref_chains.temp_governing_sibling is not None:
-            referring = referring._.coref_chains.temp_governing_sibling
+        if governing_siblings[referring.i] is not None:
+            referring = governing_siblings[referring.i]
 
         if referring.tag_ != "PRP":  # e.g. 'his' rather than 'him' 'himself'
             return False
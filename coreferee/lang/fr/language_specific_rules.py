@@ -4,7 +4,7 @@
 from typing import List, Set, Tuple, Optional, cast
 from spacy.tokens import Token
 from ...rules import RulesAnalyzer
-from ...data_model import Mention
+from ...data_model import Mention, get_annotation_context
 import sys
 import re
 
@@ -152,7 +152,7 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
             siblings_set = set()
             coordinator = False
             if recursed_token.lemma_ in self.or_lemmas:
-                token._.coref_chains.temp_has_or_coordination = True
+                get_annotation_context(token.doc).has_or_coordination[token.i] = True
             if recursed_token.dep_ in self.dependent_sibling_deps:
                 siblings_set.add(recursed_token)
             for child in (
@@ -536,6 +536,7 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
     ) -> int:
 
         doc = referring.doc
+        context = get_annotation_context(doc)
         referred_root = doc[referred.root_index]
         uncertain = False
 
@@ -564,10 +565,9 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
             and not referring_sing
             and self.is_involved_in_non_or_conjunction(referred_root)
             and not (
-                len(referred_root._.coref_chains.temp_dependent_siblings) > 0
+                len(context.dependent_siblings[referred_root.i]) > 0
                 and referring.i > referred.root_index
-                and referring.i
-                < referred_root._.coref_chains.temp_dependent_siblings[-1].i
+                and referring.i < context.dependent_siblings[referred_root.i][-1].i
             )
             and referring.lemma_ not in ("dernier", "celui", "celui-ci", "celui-là")
         ):
@@ -756,10 +756,8 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
                 uncertain = True
 
         referring_governing_sibling = referring
-        if referring._.coref_chains.temp_governing_sibling is not None:
-            referring_governing_sibling = (
-                referring._.coref_chains.temp_governing_sibling
-            )
+        if context.governing_siblings[referring.i] is not None:
+            referring_governing_sibling = context.governing_siblings[referring.i]
         if (
             referring_governing_sibling.dep_ in ("nsubj:pass", "nsubj")
             and referring_governing_sibling.head.lemma_
@@ -844,11 +842,12 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
 
         referred_root = referring.doc[referred.root_index]
 
-        if referred_root._.coref_chains.temp_governing_sibling is not None:
-            referred_root = referred_root._.coref_chains.temp_governing_sibling
+        governing_siblings = get_annotation_context(referring.doc).governing_siblings
+        if governing_siblings[referred_root.i] is not None:
+            referred_root = governing_siblings[referred_root.i]
 
-        if referring._.coref_chains.temp_governing_sibling is not None:
-            referring = referring._.coref_chains.temp_governing_sibling
+        if governing_siblings[referring.i] is not None:
+            referring = governing_siblings[referring.i]
 
         if referred_root.dep_ in ("nsubj", "nsubj:pass") and not any(
             selon
@@ -1029,8 +1028,10 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
         ):
             return True
 
+        governing_siblings = get_annotation_context(token.doc).governing_siblings
+        governing_sibling = governing_siblings[token.i]
         return (
-            token._.coref_chains.temp_governing_sibling is not None
+            governing_sibling is not None
             and len(
                 [
                     1
@@ -1040,9 +1041,7 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
                 ]
             )
             == 0
-            and self.is_potentially_referring_back_noun(
-                token._.coref_chains.temp_governing_sibling
-            )
+            and self.is_potentially_referring_back_noun(governing_sibling)
         )
 
     def get_noun_core_lemma(self, token):
@@ -1187,7 +1186,10 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
             ):
                 return True
         # Other cases of apposition
-        if referring not in referred._.coref_chains.temp_dependent_siblings:
+        if (
+            referring
+            not in get_annotation_context(referred.doc).dependent_siblings[referred.i]
+        ):
             referred_right_in_subtree = list(referred.subtree)[-1]
             referring_left_in_subtree = list(referring.subtree)[0]
             if (
@@ -1243,13 +1245,14 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
         ):
             return True
 
-        if referring in referred._.coref_chains.temp_dependent_siblings:
+        context = get_annotation_context(referring.doc)
+        if referring in context.dependent_siblings[referred.i]:
             return False
 
         if (
-            referring._.coref_chains.temp_governing_sibling is not None
-            and referring._.coref_chains.temp_governing_sibling
-            == referred._.coref_chains.temp_governing_sibling
+            context.governing_siblings[referring.i] is not None
+            and context.governing_siblings[referring.i]
+            == context.governing_siblings[referred.i]
         ):
             return False
 
@@ -1315,3 +1318,10 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
         ):
             return True
         return False
+
+    def get_coreferring_noun_keys(
+        self, token: Token, referring: bool
+    ) -> Optional[Set[Tuple[str, str]]]:
+        # *is_potential_coreferring_noun_pair()* also matches nouns with determiners and
+        # nouns related through *language_dependent_is_coreferring_noun_pair()*
+        return None
@@ -2,7 +2,7 @@ from typing import Set
 from string import punctuation
 from spacy.tokens import Token
 from ...rules import RulesAnalyzer
-from ...data_model import Mention
+from ...data_model import Mention, get_annotation_context
 
 
 class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
@@ -60,7 +60,7 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
             visited_set.add(recursed_token)
             siblings_set = set()
             if recursed_token.lemma_.lower() in self.or_lemmas:
-                token._.coref_chains.temp_has_or_coordination = True
+                get_annotation_context(token.doc).has_or_coordination[token.i] = True
             if (
                 token != recursed_token
                 and token.pos_ in ("VERB", "AUX")
@@ -70,7 +70,7 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
             ):
                 # we treat two verb anaphors as having or coordination because two
                 # singular anaphors do not give rise to a plural phrase
-                token._.coref_chains.temp_has_or_coordination = True
+                get_annotation_context(token.doc).has_or_coordination[token.i] = True
             if (
                 recursed_token.dep_ in self.dependent_sibling_deps
                 or self.has_morph(recursed_token, "Case", "Ins")
@@ -204,12 +204,15 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
             and not self.has_morph(token, "VerbForm", "Inf")
         ):
 
+            governing_sibling = get_annotation_context(token.doc).governing_siblings[
+                token.i
+            ]
             if (
-                token._.coref_chains.temp_governing_sibling is not None
+                governing_sibling is not None
                 and len(
                     [
                         child
-                        for child in token._.coref_chains.temp_governing_sibling.children
+                        for child in governing_sibling.children
                         if self._is_subject_noun(child)
                     ]
                 )
@@ -370,6 +373,7 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
             return 0  # only nonvirile
 
         doc = referring.doc
+        context = get_annotation_context(doc)
         referred_root = doc[referred.root_index]
         uncertain = False
 
@@ -409,10 +413,8 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
 
         # Some verbs like 'mówić' require a personal subject
         referring_governing_sibling = referring
-        if referring._.coref_chains.temp_governing_sibling is not None:
-            referring_governing_sibling = (
-                referring._.coref_chains.temp_governing_sibling
-            )
+        if context.governing_siblings[referring.i] is not None:
+            referring_governing_sibling = context.governing_siblings[referring.i]
         if (
             self._is_subject_noun(referring_governing_sibling)
             and referring_governing_sibling.head.lemma_
@@ -435,14 +437,12 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
         ) = get_gender_number_info_for_single_token(referring)
 
         if self.is_involved_in_non_or_conjunction(referred_root):
-            if referred_root._.coref_chains.temp_governing_sibling is not None:
-                all_involved_referreds = [
-                    referred_root._.coref_chains.temp_governing_sibling
-                ]
+            if context.governing_siblings[referred_root.i] is not None:
+                all_involved_referreds = [context.governing_siblings[referred_root.i]]
             else:
                 all_involved_referreds = [referred_root]
             all_involved_referreds.extend(
-                all_involved_referreds[0]._.coref_chains.temp_dependent_siblings
+                context.dependent_siblings[all_involved_referreds[0].i]
             )
         else:
             all_involved_referreds = [referred_root]
@@ -450,7 +450,7 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
         # e.g. 'Janek był w domu. Zadzwonili z żoną ...'
         comitative_siblings = [
             c
-            for c in referring._.coref_chains.temp_dependent_siblings
+            for c in context.dependent_siblings[referring.i]
             if referring.pos_ in ("VERB", "AUX")
             and self.has_morph(referring, "Number", "Plur")
             and self.has_morph(c, "Case", "Ins")
@@ -509,7 +509,7 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
 
             referred_comitative_siblings = [
                 c
-                for c in referred_root._.coref_chains.temp_dependent_siblings
+                for c in context.dependent_siblings[referred_root.i]
                 if referred_root.pos_ in ("VERB", "AUX")
                 and self.has_morph(referred_root, "Number", "Plur")
                 and self.has_morph(c, "Case", "Ins")
@@ -657,11 +657,12 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
 
         referred_root = referring.doc[referred.root_index]
 
-        if referred_root._.coref_chains.temp_governing_sibling is not None:
-            referred_root = referred_root._.coref_chains.temp_governing_sibling
+        governing_siblings = get_annotation_context(referring.doc).governing_siblings
+        if governing_siblings[referred_root.i] is not None:
+            referred_root = governing_siblings[referred_root.i]
 
-        if referring._.coref_chains.temp_governing_sibling is not None:
-            referring = referring._.coref_chains.temp_governing_sibling
+        if governing_siblings[referring.i] is not None:
+            referring = governing_siblings[referring.i]
 
         if (self._is_subject_noun(referred_root)) or (
             referred_root.pos_ in ("VERB", "AUX")
@@ -703,10 +704,7 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
                 ):
                     return False
 
-                if (
-                    referring_or_ancestor._.coref_chains.temp_governing_sibling
-                    == referred_root
-                ):
+                if governing_siblings[referring_or_ancestor.i] == referred_root:
                     return False
 
         return (
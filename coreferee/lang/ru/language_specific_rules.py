@@ -15,7 +15,7 @@
 from string import punctuation
 from spacy.tokens import Token
 from ...rules import RulesAnalyzer
-from ...data_model import Mention
+from ...data_model import Mention, get_annotation_context
 
 
 class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
@@ -66,7 +66,7 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
             visited_set.add(recursed_token)
             siblings_set = set()
             if recursed_token.lemma_ in self.or_lemmas:
-                token._.coref_chains.temp_has_or_coordination = True
+                get_annotation_context(token.doc).has_or_coordination[token.i] = True
             if (
                 token != recursed_token
                 and token.pos_ in ("VERB", "AUX")
@@ -76,7 +76,7 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
             ):
                 # we treat two verb anaphors as having or coordination because two
                 # singular anaphors do not give rise to a plural phrase
-                token._.coref_chains.temp_has_or_coordination = True
+                get_annotation_context(token.doc).has_or_coordination[token.i] = True
             if (
                 recursed_token.dep_ in self.dependent_sibling_deps
                 or self.has_morph(recursed_token, "Case", "Ins")
@@ -152,12 +152,15 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
         if self.is_reflexive_possessive_pronoun(token):
             return True
 
+        governing_sibling = get_annotation_context(token.doc).governing_siblings[
+            token.i
+        ]
         if (
-            token._.coref_chains.temp_governing_sibling is not None
+            governing_sibling is not None
             and len(
                 [
                     child
-                    for child in token._.coref_chains.temp_governing_sibling.children
+                    for child in governing_sibling.children
                     if child.dep_.startswith("nsubj")
                 ]
             )
@@ -217,6 +220,7 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
             return masc, fem, neut
 
         doc = referring.doc
+        context = get_annotation_context(doc)
         referred_root = doc[referred.root_index]
         uncertain = False
 
@@ -256,10 +260,8 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
                 working_token = working_token.head
 
         referring_governing_sibling = referring
-        if referring._.coref_chains.temp_governing_sibling is not None:
-            referring_governing_sibling = (
-                referring._.coref_chains.temp_governing_sibling
-            )
+        if context.governing_siblings[referring.i] is not None:
+            referring_governing_sibling = context.governing_siblings[referring.i]
         if (
             referring_governing_sibling.dep_.startswith("nsubj")
             and referring_governing_sibling.head.lemma_
@@ -278,14 +280,12 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
         )
 
         if self.is_involved_in_non_or_conjunction(referred_root):
-            if referred_root._.coref_chains.temp_governing_sibling is not None:
-                all_involved_referreds = [
-                    referred_root._.coref_chains.temp_governing_sibling
-                ]
+            if context.governing_siblings[referred_root.i] is not None:
+                all_involved_referreds = [context.governing_siblings[referred_root.i]]
             else:
                 all_involved_referreds = [referred_root]
             all_involved_referreds.extend(
-                all_involved_referreds[0]._.coref_chains.temp_dependent_siblings
+                context.dependent_siblings[all_involved_referreds[0].i]
             )
         else:
             all_involved_referreds = [referred_root]
@@ -293,7 +293,7 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
         # e.g. 'Муж и жена... Они...'
         comitative_siblings = [
             c
-            for c in referring._.coref_chains.temp_dependent_siblings
+            for c in context.dependent_siblings[referring.i]
             if referring.pos_ in ("VERB", "AUX")
             and self.has_morph(referring, "Number", "Plur")
         ]
@@ -332,7 +332,7 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
 
             referred_comitative_siblings = [
                 child
-                for child in referred_root._.coref_chains.temp_dependent_siblings
+                for child in context.dependent_siblings[referred_root.i]
                 if child.i != referring.i
                 and referred_root.pos_ in ("VERB", "AUX")
                 and self.has_morph(referring, "Number", "Plur")
@@ -742,11 +742,12 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
             return False
         referred_root = referring.doc[referred.root_index]
 
-        if referred_root._.coref_chains.temp_governing_sibling is not None:
-            referred_root = referred_root._.coref_chains.temp_governing_sibling
+        governing_siblings = get_annotation_context(referring.doc).governing_siblings
+        if governing_siblings[referred_root.i] is not None:
+            referred_root = governing_siblings[referred_root.i]
 
-        if referring._.coref_chains.temp_governing_sibling is not None:
-            referring = referring._.coref_chains.temp_governing_sibling
+        if governing_siblings[referring.i] is not None:
+            referring = governing_siblings[referring.i]
 
         if referred_root.dep_.startswith("nsubj") or (
             referred_root.pos_ in ("VERB", "AUX")
@@ -783,10 +784,7 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
                 ]:
                     return False
 
-                if (
-                    referring_or_ancestor._.coref_chains.temp_governing_sibling
-                    == referred_root
-                ):
+                if governing_siblings[referring_or_ancestor.i] == referred_root:
                     return False
 
         return (
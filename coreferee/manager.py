@@ -1,5 +1,7 @@
-from typing import Dict, Tuple
+from typing import Dict, Tuple, Optional, Any
+from hashlib import blake2b
 import importlib
+import json
 import os
 import pickle
 import traceback
@@ -15,14 +17,21 @@ from spacy.tokens import Doc, Token
 from thinc.api import Config
 from thinc.model import Model
 from .annotation import Annotator
-from .data_model import FeatureTable
+from .cache import ChainCache, CACHE_SIZE
+from .data_model import FeatureTable, get_doc_chain_holder, set_doc_chain_holder
+from .data_model import get_token_chain_holder, set_span_groups
 from .errors import (
+    CorefereeError,
     LanguageNotSupportedError,
     ModelNotSupportedError,
     OutdatedCorefereeModelError,
+    QuantisedModelNotInstalledError,
+    DistilledModelNotInstalledError,
 )
 from .errors import VectorsModelNotInstalledError, VectorsModelHasWrongVersionError
-from .tendencies import create_thinc_model, ENSEMBLE_SIZE
+from .tendencies import create_thinc_model, create_distilled_thinc_model
+from .tendencies import ENSEMBLE_SIZE, SCORING_BATCH_SIZE
+from .quantisation import dequantise_thinc_model, QUANTISATION_DTYPES
 
 COMMON_MODELS_PACKAGE_NAMEPART = "coreferee_model_"
 
@@ -30,10 +39,37 @@ FEATURE_TABLE_FILENAME = "feature_table.bin"
 
 THINC_MODEL_FILENAME = "model"
 
+QUANTISED_THINC_MODEL_FILENAMES = {
+    dtype: "_".join((THINC_MODEL_FILENAME, dtype)) for dtype in QUANTISATION_DTYPES
+}
+
+DISTILLED_THINC_MODEL_FILENAME = "_".join((THINC_MODEL_FILENAME, "distilled"))
+
+# The values of the *output* pipe config option: whether chains are written to
+# *doc._.coref_chains*, to span groups in *doc.spans* or to both
+OUTPUT_MODES = ("extension", "span_groups", "both")
+
+# The pipe config options handled by *CorefereeBroker* rather than by the *Annotator*
+BROKER_CONFIG_KEYS = ("output", "cache_size", "cache_path")
+
 
 class CorefereeManager:
     @staticmethod
-    def get_annotator(nlp: Language) -> Annotator:
+    def get_annotator(
+        nlp: Language,
+        *,
+        compressed_storage: Optional[str] = None,
+        ensemble_size: Optional[int] = None,
+        distilled: bool = False,
+        max_candidates: Optional[int] = None,
+        scoring_batch_size: Optional[int] = SCORING_BATCH_SIZE,
+        retry_budget: Optional[int] = None,
+        retry_time_budget: Optional[float] = None,
+        time_limit: Optional[float] = None,
+        sentence_cache_size: Optional[int] = None,
+        sparse_feature_maps: bool = False,
+        rules_only: bool = False
+    ) -> Annotator:
         model_name = "_".join((nlp.meta["lang"], nlp.meta["name"]))
         relative_config_filename = os.sep.join(("lang", nlp.meta["lang"], "config.cfg"))
         if not pkg_resources.resource_exists(__name__, relative_config_filename):
@@ -60,6 +96,21 @@ class CorefereeManager:
                 and version.parse(nlp.meta["version"])
                 <= version.parse(config_entry["to_version"])
             ):
+                if rules_only:
+                    if compressed_storage is not None or distilled:
+                        raise ModelNotSupportedError(
+                            "Compressed and distilled models are not used in rules-only"
+                            " mode."
+                        )
+                    return Annotator(
+                        nlp,
+                        None,
+                        None,
+                        None,
+                        retry_budget=retry_budget,
+                        retry_time_budget=retry_time_budget,
+                        time_limit=time_limit,
+                    )
                 if "vectors_model" in config_entry:
                     try:
                         vectors_nlp = spacy.load(
@@ -113,6 +164,16 @@ class CorefereeManager:
                     nlp=nlp,
                     vectors_nlp=vectors_nlp,
                     config_entry_name=config_entry_name,
+                    compressed_storage=compressed_storage,
+                    ensemble_size=ensemble_size,
+                    distilled=distilled,
+                    max_candidates=max_candidates,
+                    scoring_batch_size=scoring_batch_size,
+                    retry_budget=retry_budget,
+                    retry_time_budget=retry_time_budget,
+                    time_limit=time_limit,
+                    sentence_cache_size=sentence_cache_size,
+                    sparse_feature_maps=sparse_feature_maps,
                 )
         msg = Printer()
         error_msg = "".join(
@@ -132,16 +193,142 @@ class CorefereeManager:
         raise ModelNotSupportedError(error_msg)
 
 
-@Language.factory("coreferee")
+@Language.factory(
+    "coreferee",
+    default_config={
+        "compressed_storage": None,
+        "ensemble_size": None,
+        "distilled": False,
+        "max_candidates": None,
+        "scoring_batch_size": SCORING_BATCH_SIZE,
+        "retry_budget": None,
+        "retry_time_budget": None,
+        "time_limit": None,
+        "sentence_cache_size": None,
+        "sparse_feature_maps": False,
+        "rules_only": False,
+        "output": "extension",
+        "cache_size": None,
+        "cache_path": None,
+    },
+)
 class CorefereeBroker:
-    def __init__(self, nlp: Language, name: str):
+    def __init__(
+        self,
+        nlp: Language,
+        name: str,
+        compressed_storage: Optional[str],
+        ensemble_size: Optional[int],
+        distilled: bool,
+        max_candidates: Optional[int],
+        scoring_batch_size: Optional[int],
+        retry_budget: Optional[int],
+        retry_time_budget: Optional[float],
+        time_limit: Optional[float],
+        sentence_cache_size: Optional[int],
+        sparse_feature_maps: bool,
+        rules_only: bool,
+        output: str,
+        cache_size: Optional[int],
+        cache_path: Optional[str],
+    ):
+        if output not in OUTPUT_MODES:
+            raise CorefereeError(
+                "".join(
+                    (
+                        "output must be one of ",
+                        ", ".join(OUTPUT_MODES),
+                        ", not ",
+                        str(output),
+                        ".",
+                    )
+                )
+            )
         self.nlp = nlp
         self.pid = os.getpid()
-        self.annotator = CorefereeManager().get_annotator(nlp)
+        self.config: Dict[str, Any] = {
+            "compressed_storage": compressed_storage,
+            "ensemble_size": ensemble_size,
+            "distilled": distilled,
+            "max_candidates": max_candidates,
+            "scoring_batch_size": scoring_batch_size,
+            "retry_budget": retry_budget,
+            "retry_time_budget": retry_time_budget,
+            "time_limit": time_limit,
+            "sentence_cache_size": sentence_cache_size,
+            "sparse_feature_maps": sparse_feature_maps,
+            "rules_only": rules_only,
+            "output": output,
+            "cache_size": cache_size,
+            "cache_path": cache_path,
+        }
+        self.annotator = self.create_annotator()
+        self.cache = self.create_cache()
+
+    def create_annotator(self) -> Annotator:
+        return CorefereeManager().get_annotator(
+            self.nlp,
+            **{
+                key: value
+                for key, value in self.config.items()
+                if key not in BROKER_CONFIG_KEYS
+            }
+        )
+
+    def create_cache(self) -> Optional[ChainCache]:
+        """Returns the cache specified by the *cache_size* and *cache_path* pipe config
+        options, or *None* if neither is specified. The cache is keyed by the versions
+        of the spaCy model and of Coreferee, the pipe configuration and the weights of
+        the neural ensemble as well as by the documents themselves."""
+        cache_size = self.config.get("cache_size")
+        cache_path = self.config.get("cache_path")
+        if cache_size is None and cache_path is None:
+            return None
+        try:
+            coreferee_version = pkg_resources.get_distribution("coreferee").version
+        except pkg_resources.DistributionNotFound:
+            coreferee_version = ""
+        identity = blake2b(
+            json.dumps(
+                {
+                    "nlp": [self.nlp.meta[key] for key in ("lang", "name", "version")],
+                    "coreferee": coreferee_version,
+                    "config": {
+                        key: value
+                        for key, value in self.config.items()
+                        if key not in ("cache_size", "cache_path")
+                    },
+                },
+                sort_keys=True,
+            ).encode("utf-8")
+        )
+        if self.annotator.thinc_ensemble is not None:
+            identity.update(self.annotator.thinc_ensemble.to_bytes())
+        return ChainCache(
+            identity.digest(),
+            CACHE_SIZE if cache_size is None else cache_size,
+            cache_path,
+        )
 
     def __call__(self, doc: Doc) -> Doc:
         try:
-            self.annotator.annotate(doc)
+            if self.cache is None:
+                self.annotator.annotate(doc)
+            else:
+                key = self.cache.get_key(doc)
+                chain_holder = self.cache.get(key)
+                if chain_holder is None:
+                    self.annotator.annotate(doc)
+                    if len(doc._.coref_chains.degradations) == 0:
+                        # chains degraded by the time limit are not reused
+                        self.cache.put(key, doc._.coref_chains)
+                else:
+                    doc._.coref_chains = chain_holder
+            output = self.config.get("output", "extension")
+            if output != "extension":
+                set_span_groups(doc)
+            if output == "span_groups":
+                doc._.coref_chains = None
         except:
             msg = Printer()
             msg.warn("Unexpected error in Coreferee annotating document, skipping ....")
@@ -151,26 +338,46 @@ class CorefereeBroker:
             traceback.print_tb(exception_info_parts[2])
         return doc
 
-    def __getstate__(self) -> Dict[str, str]:
-        return self.nlp.meta
+    def __getstate__(self) -> Dict[str, Any]:
+        return {"meta": self.nlp.meta, "config": self.config}
 
-    def __setstate__(self, meta: Dict[str, str]):
+    def __setstate__(self, state: Dict[str, Any]):
+        if "config" not in state:  # state pickled by an earlier Coreferee version
+            state = {"meta": state, "config": {}}
+        meta = state["meta"]
         nlp_name = "_".join((meta["lang"], meta["name"]))
         self.nlp = spacy.load(nlp_name)
-        self.annotator = CorefereeManager().get_annotator(self.nlp)
+        self.config = state["config"]
+        self.annotator = self.create_annotator()
+        self.cache = self.create_cache()
         self.pid = os.getpid()
         CorefereeBroker.set_extensions()
 
     @staticmethod
     def set_extensions() -> None:
         if not Doc.has_extension("coref_chains"):
-            Doc.set_extension("coref_chains", default=None)
+            Doc.set_extension(
+                "coref_chains", getter=get_doc_chain_holder, setter=set_doc_chain_holder
+            )
         if not Token.has_extension("coref_chains"):
-            Token.set_extension("coref_chains", default=None)
+            Token.set_extension("coref_chains", getter=get_token_chain_holder)
 
 
 def get_annotator(
-    *, nlp: Language, vectors_nlp: Language, config_entry_name: str
+    *,
+    nlp: Language,
+    vectors_nlp: Language,
+    config_entry_name: str,
+    compressed_storage: Optional[str] = None,
+    ensemble_size: Optional[int] = None,
+    distilled: bool = False,
+    max_candidates: Optional[int] = None,
+    scoring_batch_size: Optional[int] = SCORING_BATCH_SIZE,
+    retry_budget: Optional[int] = None,
+    retry_time_budget: Optional[float] = None,
+    time_limit: Optional[float] = None,
+    sentence_cache_size: Optional[int] = None,
+    sparse_feature_maps: bool = False
 ) -> Annotator:
     model_package_name = "".join(
         (
@@ -216,6 +423,72 @@ def get_annotator(
         )
         msg.fail(error_msg)
         raise OutdatedCorefereeModelError(error_msg)
-    thinc_model = create_thinc_model()
-    thinc_model.from_disk(absolute_thinc_model_filename)
-    return Annotator(nlp, vectors_nlp, feature_table, thinc_model)
+    if distilled:
+        if compressed_storage is not None:
+            raise ModelNotSupportedError(
+                "Compressed storage is not supported for distilled models."
+            )
+        absolute_distilled_thinc_model_filename = pkg_resources.resource_filename(
+            model_package_name, DISTILLED_THINC_MODEL_FILENAME
+        )
+        if not os.path.isfile(absolute_distilled_thinc_model_filename):
+            msg = Printer()
+            error_msg = "".join(
+                (
+                    "No distilled model is installed for config entry '",
+                    config_entry_name,
+                    "'. Please generate one with the command 'python -m coreferee distill' and reinstall the models for language '",
+                    nlp.meta["lang"],
+                    "'.",
+                )
+            )
+            msg.fail(error_msg)
+            raise DistilledModelNotInstalledError(error_msg)
+        thinc_model = create_distilled_thinc_model()
+        thinc_model.from_disk(absolute_distilled_thinc_model_filename)
+    elif compressed_storage is not None:
+        if compressed_storage not in QUANTISED_THINC_MODEL_FILENAMES:
+            raise ModelNotSupportedError(
+                "".join(
+                    ("Unsupported compressed storage dtype '", compressed_storage, "'.")
+                )
+            )
+        absolute_quantised_thinc_model_filename = pkg_resources.resource_filename(
+            model_package_name, QUANTISED_THINC_MODEL_FILENAMES[compressed_storage]
+        )
+        if not os.path.isfile(absolute_quantised_thinc_model_filename):
+            msg = Printer()
+            error_msg = "".join(
+                (
+                    "No ",
+                    compressed_storage,
+                    " compressed model is installed for config entry '",
+                    config_entry_name,
+                    "'. Please generate one with the command 'python -m coreferee quantise' and reinstall the models for language '",
+                    nlp.meta["lang"],
+                    "'.",
+                )
+            )
+            msg.fail(error_msg)
+            raise QuantisedModelNotInstalledError(error_msg)
+        with open(
+            absolute_quantised_thinc_model_filename, "rb"
+        ) as quantised_thinc_model_file:
+            thinc_model = dequantise_thinc_model(quantised_thinc_model_file.read())
+    else:
+        thinc_model = create_thinc_model()
+        thinc_model.from_disk(absolute_thinc_model_filename)
+    return Annotator(
+        nlp,
+        vectors_nlp,
+        feature_table,
+        thinc_model,
+        ensemble_size=ensemble_size,
+        max_candidates=max_candidates,
+        scoring_batch_size=scoring_batch_size,
+        retry_budget=retry_budget,
+        retry_time_budget=retry_time_budget,
+        time_limit=time_limit,
+        sentence_cache_size=sentence_cache_size,
+        sparse_feature_maps=sparse_feature_maps,
+    )
@@ -0,0 +1,87 @@
+from typing import Dict, Any
+import srsly  # type: ignore[import]
+from thinc.model import Model
+from .errors import CorefereeError
+from .tendencies import create_thinc_model, get_ensemble_member_layers
+from .tendencies import ENSEMBLE_SIZE, HIDDEN_LAYER_WIDTHS
+
+QUANTISATION_DTYPES = ("int8", "float16")
+
+QUANTISATION_FORMAT_VERSION = 1
+
+
+def quantise_thinc_model(thinc_model: Model, dtype: str) -> bytes:
+    """Returns a serialized copy of *thinc_model*, which must have been generated by
+    *create_thinc_model()*, in which the weight matrices are stored as *dtype*. Biases
+    are small and are left as they are. The architecture of *thinc_model* is recorded
+    so that distilled models can also be quantised.
+
+    With *dtype=='int8'*, each row of a weight matrix, i.e. the weights leading into
+    one neuron, is scaled symmetrically so that its largest absolute value maps to 127.
+    """
+    if dtype not in QUANTISATION_DTYPES:
+        raise CorefereeError("".join(("Unsupported quantisation dtype '", dtype, "'.")))
+    layers: Dict[int, Dict[str, Any]] = {}
+    for node_index, node in enumerate(thinc_model.walk()):
+        if not node.has_param("W"):
+            continue
+        W = thinc_model.ops.to_numpy(node.get_param("W"))
+        layer: Dict[str, Any] = {
+            "nO": node.get_dim("nO"),
+            "nI": node.get_dim("nI"),
+            "b": thinc_model.ops.to_numpy(node.get_param("b")),
+        }
+        if dtype == "int8":
+            scales = abs(W).max(axis=1, keepdims=True) / 127
+            scales[scales == 0] = 1
+            layer["W"] = (W / scales).round().astype("int8")
+            layer["scales"] = scales.astype("float32")
+        else:
+            layer["W"] = W.astype("float16")
+        layers[node_index] = layer
+    members = get_ensemble_member_layers(thinc_model)
+    return srsly.msgpack_dumps(
+        {
+            "version": QUANTISATION_FORMAT_VERSION,
+            "dtype": dtype,
+            "ensemble_size": len(members),
+            "hidden_layer_widths": [
+                layer.get_dim("nO") for layer in members[0]["main"][:2]
+            ],
+            "layers": layers,
+        }
+    )
+
+
+def dequantise_thinc_model(data: bytes) -> Model:
+    """Returns a model generated by *create_thinc_model()* with the architecture
+    recorded in *data* whose weights are the float32 equivalents of the quantised
+    weights in *data*. Inference then proceeds as normal, so that the scores reflect
+    exactly the precision that was retained on quantisation."""
+    msg = srsly.msgpack_loads(data)
+    if msg["version"] != QUANTISATION_FORMAT_VERSION:
+        raise CorefereeError(
+            "".join(
+                (
+                    "Unsupported quantised model format version ",
+                    str(msg["version"]),
+                    ".",
+                )
+            )
+        )
+    thinc_model = create_thinc_model(
+        ensemble_size=msg.get("ensemble_size", ENSEMBLE_SIZE),
+        hidden_layer_widths=tuple(msg.get("hidden_layer_widths", HIDDEN_LAYER_WIDTHS)),
+    )
+    for node_index, node in enumerate(thinc_model.walk()):
+        if node_index not in msg["layers"]:
+            continue
+        layer = msg["layers"][node_index]
+        W = layer["W"].astype("float32")
+        if msg["dtype"] == "int8":
+            W *= layer["scales"]
+        node.set_dim("nO", layer["nO"], force=True)
+        node.set_dim("nI", layer["nI"], force=True)
+        node.set_param("W", thinc_model.ops.asarray2f(W))
+        node.set_param("b", thinc_model.ops.asarray1f(layer["b"]))
+    return thinc_model
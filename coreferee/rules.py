@@ -1,4 +1,4 @@
-from typing import List, Tuple, Dict
+from typing import Iterable, List, Tuple, Dict, Optional, Set
 import importlib
 import sys
 from os import sep
@@ -7,7 +7,8 @@ from threading import Lock
 import pkg_resources
 from spacy.language import Language
 from spacy.tokens import Token, Doc
-from .data_model import ChainHolder, Mention
+from .data_model import ChainHolder, Mention, AnnotationContext, ANNOTATION_CONTEXT_KEY
+from .data_model import get_annotation_context
 
 language_to_rules = {}
 lock = Lock()
@@ -101,9 +102,9 @@ class RulesAnalyzer(ABC):
     @abstractmethod
     def get_dependent_siblings(self, token: Token) -> List[Token]:
         """Returns a list of tokens that are dependent siblings of *token*. The method must
-        additionally set *token._.coref_chains.temp_has_or_coordination = True* for all
-        tokens with dependent siblings that are linked to those siblings by an *or*
-        relationship."""
+        additionally set *get_annotation_context(token.doc).has_or_coordination[token.i] =
+        True* for all tokens with dependent siblings that are linked to those siblings by
+        an *or* relationship."""
 
     @abstractmethod
     def is_independent_noun(self, token: Token) -> bool:
@@ -197,6 +198,10 @@ class RulesAnalyzer(ABC):
 
     number_morph_key = "Number"
 
+    # The number of characters at the end of a proper-noun subtree that are used to
+    # narrow down the search for coreferring nouns.
+    propn_tail_key_length = 4
+
     ### COULD BE OVERRIDDEN BY IMPLEMENTING CLASSES, BUT THIS IS NOT EXPECTED
     ### TO BE NECESSARY:
 
@@ -207,38 +212,45 @@ class RulesAnalyzer(ABC):
                 assert value not in self.reverse_entity_noun_dictionary
                 self.reverse_entity_noun_dictionary[value.lower()] = entity_type
 
-    def initialize(self, doc: Doc) -> None:
-        """Adds *ChainHolder* objects to *doc* as well as to each token in *doc*
-        and stores temporary information on the objects that will be required during further
-        processing."""
+    def initialize(
+        self, doc: Doc, anaphor_indexes: Optional[Iterable[int]] = None
+    ) -> None:
+        """Adds a *ChainHolder* object to *doc*, from which the objects returned by
+        *token._.coref_chains* are derived, and stores the temporary information that
+        will be required during further processing in an *AnnotationContext* in
+        *doc.user_data*.
+
+        If *anaphor_indexes* is specified, potential referreds are only recorded for the
+        anaphors at those indexes and for the anaphors on which their resolution
+        depends: the anaphors within their potential referreds, the anaphors within the
+        potential referreds of those anaphors, and so on."""
 
         doc._.coref_chains = ChainHolder()
-        for token in doc:
-            token._.coref_chains = ChainHolder()
+        context = AnnotationContext(doc)
+        doc.user_data[ANNOTATION_CONTEXT_KEY] = context
 
-        # Adds to *doc* a list of the start indexes of the sentences it contains.
-        doc._.coref_chains.temp_sent_starts = [s[0].i for s in doc.sents]  # type: ignore[attr-defined]
+        # Records the start indexes of the sentences *doc* contains.
+        context.sent_starts = [s[0].i for s in doc.sents]
 
-        # Adds to each token in *doc* the index of the sentence that contains it.
+        # Records for each token in *doc* the index of the sentence that contains it.
         for index, sent in enumerate(doc.sents):
             for token in sent:
-                token._.coref_chains.temp_sent_index = index
+                context.sent_indexes[token.i] = index
 
-        # For each token in *doc*, if the token has dependent siblings, adds to the
-        # *CorefChainHolder* instance of the token a list containing them, otherwise an empty list.
-        # Wherever token B is added as a dependent sibling of token A, A is also added to B as a
-        # governing sibling.
+        # For each token in *doc*, if the token has dependent siblings, records a list
+        # containing them, otherwise an empty list. Wherever token B is recorded as a
+        # dependent sibling of token A, A is also recorded as the governing sibling of B.
         for token in doc:
             siblings_list = self.get_dependent_siblings(token)
-            token._.coref_chains.temp_dependent_siblings = siblings_list
+            context.dependent_siblings[token.i] = siblings_list
             for sibling in (
                 sibling for sibling in siblings_list if sibling.i != token.i
             ):
-                if token._.coref_chains.temp_governing_sibling is None:
+                if context.governing_siblings[token.i] is None:
                     # in Polish some nouns can form part of two chains
-                    sibling._.coref_chains.temp_governing_sibling = token
+                    context.governing_siblings[sibling.i] = token
 
-        # Adds an array representing which quotes the word is within. Note that the failure
+        # Records an array representing which quotes the word is within. Note that the failure
         # to end a quotation within a document will not cause any problems because the neural
         # network is only given the information whether two members of a potential pair have
         # the same quote array or a different quote array.
@@ -249,85 +261,102 @@ class RulesAnalyzer(ABC):
                     working_quote_array[index] = 1
                 elif working_quote_array[index] == 1 and token.text == quote_tuple[1]:
                     working_quote_array[index] = 0
-            token._.coref_chains.temp_quote_array = working_quote_array[:]
+            context.quote_arrays[token.i] = working_quote_array[:]
 
-        # Adds to each potential anaphora a list of potential referred mentions.
+        # Records for each potential anaphor a list of potential referred mentions.
         for token in doc:
-            token._.coref_chains.temp_potentially_referring = self.is_independent_noun(
-                token
+            context.potentially_referring[token.i] = self.is_independent_noun(token)
+            if anaphor_indexes is None and self.is_potential_anaphor(token):
+                potential_referreds = self.get_potential_referreds(token)
+                if len(potential_referreds) > 0:
+                    context.potential_referreds[token.i] = potential_referreds
+        if anaphor_indexes is not None:
+            # the anaphors within the potential referreds of the anaphors already
+            # recorded, whose potential referreds are recorded in turn
+            pending_indexes = list(anaphor_indexes)
+            checked_indexes: Set[int] = set()
+            recorded_potential_referreds: Dict[int, List[Mention]] = {}
+            while len(pending_indexes) > 0:
+                token_index = pending_indexes.pop()
+                if token_index in checked_indexes:
+                    continue
+                checked_indexes.add(token_index)
+                if not self.is_potential_anaphor(doc[token_index]):
+                    continue
+                potential_referreds = self.get_potential_referreds(doc[token_index])
+                if len(potential_referreds) > 0:
+                    recorded_potential_referreds[token_index] = potential_referreds
+                    pending_indexes.extend(
+                        contained_index
+                        for potential_referred in potential_referreds
+                        for contained_index in potential_referred.token_indexes
+                    )
+            for token_index in sorted(recorded_potential_referreds):
+                context.potential_referreds[token_index] = recorded_potential_referreds[
+                    token_index
+                ]
+
+    def get_potential_referreds(self, token: Token) -> List[Mention]:
+        """Returns the mentions to which the potential anaphor *token* can refer. The
+        earlier parts of *RulesAnalyzer.initialize()* must already have been executed
+        for the document containing *token*."""
+        doc = token.doc
+        context = get_annotation_context(doc)
+        potential_referreds = []
+        this_sentence_number = context.sent_indexes[token.i]
+        start_sentence_number = 0
+        if this_sentence_number > self.maximum_anaphora_sentence_referential_distance:
+            start_sentence_number = (
+                this_sentence_number
+                - self.maximum_anaphora_sentence_referential_distance
             )
-            if self.is_potential_anaphor(token):
-                potential_referreds = []
-                this_sentence_start_index = token.sent[0].i
-                this_sentence_number = doc._.coref_chains.temp_sent_starts.index(  # type: ignore[attr-defined]
-                    this_sentence_start_index
-                )
-                start_sentence_number = 0
+        for preceding_token in (
+            t
+            for t in doc[context.sent_starts[start_sentence_number] : token.i]
+            if (self.is_potential_anaphor(t) or self.is_independent_noun(t))
+        ):
+            simple_referred = Mention(preceding_token, False)
+            if self.language_independent_is_potential_anaphoric_pair(
+                simple_referred, token
+            ) > 0 and not self.is_potential_reflexive_pair(
+                Mention(token, False), doc[simple_referred.root_index]
+            ):
+                potential_referreds.append(simple_referred)
+            if len(context.dependent_siblings[preceding_token.i]) > 0:
+                complex_referred = Mention(preceding_token, True)
                 if (
-                    this_sentence_number
-                    > self.maximum_anaphora_sentence_referential_distance
-                ):
-                    start_sentence_number = (
-                        this_sentence_number
-                        - self.maximum_anaphora_sentence_referential_distance
+                    self.language_independent_is_potential_anaphoric_pair(
+                        complex_referred, token
                     )
-                for preceding_token in (
-                    t
-                    for t in doc[
-                        doc._.coref_chains.temp_sent_starts[  # type: ignore[attr-defined]
-                            start_sentence_number
-                        ] : token.i
-                    ]
-                    if (self.is_potential_anaphor(t) or self.is_independent_noun(t))
+                    > 0
                 ):
-                    simple_referred = Mention(preceding_token, False)
-                    if self.language_independent_is_potential_anaphoric_pair(
-                        simple_referred, token
-                    ) > 0 and not self.is_potential_reflexive_pair(
-                        Mention(token, False), doc[simple_referred.root_index]
-                    ):
-                        potential_referreds.append(simple_referred)
-                    if len(preceding_token._.coref_chains.temp_dependent_siblings) > 0:
-                        complex_referred = Mention(preceding_token, True)
-                        if (
-                            self.language_independent_is_potential_anaphoric_pair(
-                                complex_referred, token
-                            )
-                            > 0
-                        ):
-                            potential_referreds.append(complex_referred)
-                if this_sentence_number + 1 == len(doc._.coref_chains.temp_sent_starts):  # type: ignore[attr-defined]
-                    succeeding_tokens = doc[token.i + 1 :]
-                else:
-                    succeeding_tokens = doc[
-                        token.i
-                        + 1 : doc._.coref_chains.temp_sent_starts[  # type: ignore[attr-defined]
-                            this_sentence_number + 1
-                        ]
-                    ]
-                for succeeding_token in (
-                    t
-                    for t in succeeding_tokens
-                    if (self.is_potential_anaphor(t) or self.is_independent_noun(t))
-                ):
-                    simple_referred = Mention(succeeding_token, False)
-                    if self.language_independent_is_potential_anaphoric_pair(
-                        simple_referred, token
-                    ) > 0 and (
-                        self.is_potential_cataphoric_pair(simple_referred, token)
-                        or self.is_potential_reflexive_pair(simple_referred, token)
-                    ):
-                        potential_referreds.append(simple_referred)
-                    if len(succeeding_token._.coref_chains.temp_dependent_siblings) > 0:
-                        complex_referred = Mention(succeeding_token, True)
-                        if self.language_independent_is_potential_anaphoric_pair(
-                            complex_referred, token
-                        ) > 0 and self.is_potential_cataphoric_pair(
-                            simple_referred, token
-                        ):
-                            potential_referreds.append(complex_referred)
-                if len(potential_referreds) > 0:
-                    token._.coref_chains.temp_potential_referreds = potential_referreds
+                    potential_referreds.append(complex_referred)
+        if this_sentence_number + 1 == len(context.sent_starts):
+            succeeding_tokens = doc[token.i + 1 :]
+        else:
+            succeeding_tokens = doc[
+                token.i + 1 : context.sent_starts[this_sentence_number + 1]
+            ]
+        for succeeding_token in (
+            t
+            for t in succeeding_tokens
+            if (self.is_potential_anaphor(t) or self.is_independent_noun(t))
+        ):
+            simple_referred = Mention(succeeding_token, False)
+            if self.language_independent_is_potential_anaphoric_pair(
+                simple_referred, token
+            ) > 0 and (
+                self.is_potential_cataphoric_pair(simple_referred, token)
+                or self.is_potential_reflexive_pair(simple_referred, token)
+            ):
+                potential_referreds.append(simple_referred)
+            if len(context.dependent_siblings[succeeding_token.i]) > 0:
+                complex_referred = Mention(succeeding_token, True)
+                if self.language_independent_is_potential_anaphoric_pair(
+                    complex_referred, token
+                ) > 0 and self.is_potential_cataphoric_pair(simple_referred, token):
+                    potential_referreds.append(complex_referred)
+        return potential_referreds
 
     def has_non_determiner_non_conjunction_children(self, token: Token) -> bool:
         return any(
@@ -350,12 +379,13 @@ class RulesAnalyzer(ABC):
         ) and self.has_non_determiner_non_conjunction_children(token):
             return True
 
+        governing_sibling = get_annotation_context(token.doc).governing_siblings[
+            token.i
+        ]
         return (
-            token._.coref_chains.temp_governing_sibling is not None
+            governing_sibling is not None
             and not self.has_non_determiner_non_conjunction_children(token)
-            and self.is_potentially_introducing_noun(
-                token._.coref_chains.temp_governing_sibling
-            )
+            and self.is_potentially_introducing_noun(governing_sibling)
         )
 
     def is_potentially_referring_back_noun(self, token: Token) -> bool:
@@ -365,8 +395,11 @@ class RulesAnalyzer(ABC):
         ) and not self.has_non_determiner_non_conjunction_children(token):
             return True
 
+        governing_sibling = get_annotation_context(token.doc).governing_siblings[
+            token.i
+        ]
         return (
-            token._.coref_chains.temp_governing_sibling is not None
+            governing_sibling is not None
             and len(
                 [
                     1
@@ -376,9 +409,7 @@ class RulesAnalyzer(ABC):
                 ]
             )
             == 0
-            and self.is_potentially_referring_back_noun(
-                token._.coref_chains.temp_governing_sibling
-            )
+            and self.is_potentially_referring_back_noun(governing_sibling)
         )
 
     def is_potential_coreferring_noun_pair(
@@ -395,13 +426,14 @@ class RulesAnalyzer(ABC):
         if referred.pos_ not in self.noun_pos or referring.pos_ not in self.noun_pos:
             return False
 
-        if referring in referred._.coref_chains.temp_dependent_siblings:
+        context = get_annotation_context(referring.doc)
+        if referring in context.dependent_siblings[referred.i]:
             return False
 
         if (
-            referring._.coref_chains.temp_governing_sibling is not None
-            and referring._.coref_chains.temp_governing_sibling
-            == referred._.coref_chains.temp_governing_sibling
+            context.governing_siblings[referring.i] is not None
+            and context.governing_siblings[referring.i]
+            == context.governing_siblings[referred.i]
         ):
             return False
 
@@ -443,18 +475,64 @@ class RulesAnalyzer(ABC):
             return True
         return False
 
+    def get_coreferring_noun_keys(
+        self, token: Token, referring: bool
+    ) -> Optional[Set[Tuple[str, str]]]:
+        """Returns keys for *token* such that *is_potential_coreferring_noun_pair()* can
+        only return *True* for a pair where the keys returned for the referred token
+        with *referring=False* overlap with the keys returned for the referring token
+        with *referring=True*. The keys are the lemma, the entity type matched by an
+        entity noun and the tails of the texts and lemmas of proper-noun subtrees.
+
+        Returns *None* if the pairs cannot be narrowed down in this way, in which case
+        all preceding tokens are examined. Subclasses that override
+        *is_potential_coreferring_noun_pair()* must also override this method.
+        """
+        if token.pos_ not in self.noun_pos:
+            return set()
+        keys = {("lemma", token.lemma_)}
+        if referring:
+            if token.lemma_.lower() in self.reverse_entity_noun_dictionary:
+                keys.add(
+                    (
+                        "entity",
+                        self.reverse_entity_noun_dictionary[token.lemma_.lower()],
+                    )
+                )
+        elif token.pos_ in self.propn_pos and token.ent_type_ != "":
+            keys.add(("entity", token.ent_type_))
+        propn_subtree = self.get_propn_subtree(token)
+        if len(propn_subtree) > 0:
+            for text in (
+                " ".join(t.text for t in propn_subtree),
+                " ".join(t.lemma_.lower() for t in propn_subtree),
+            ):
+                if referring:
+                    # the referred text has to end with the referring text
+                    keys.add(("tail", text[-self.propn_tail_key_length :]))
+                else:
+                    keys.update(
+                        ("tail", text[len(text) - length :])
+                        for length in range(
+                            min(len(text), self.propn_tail_key_length) + 1
+                        )
+                    )
+        return keys
+
     def language_independent_is_potential_anaphoric_pair(
         self, referred: Mention, referring: Token
     ) -> int:
-        """Calls *is_potential_anaphoric_pair*, then sets *referred.temp_is_uncertain* depending
-        on the result and on additional language-independent tests. Because this method
+        """Calls *is_potential_anaphoric_pair*, then records whether the pair is uncertain in
+        *AnnotationContext.uncertain_pairs* depending on the result and on additional
+        language-independent tests. Because this method
         is not called from *Annotator*, all language-independent tests are understood to
         apply to the *directly* situation explained above in *is_potential_anaphoric_pair*."""
 
         # all common tests are 'directly' tests
         doc = referring.doc
+        context = get_annotation_context(doc)
         referred_root = doc[referred.root_index]
-        if referring in referred_root._.coref_chains.temp_dependent_siblings:
+        if referring in context.dependent_siblings[referred_root.i]:
             return 0
 
         result = self.is_potential_anaphoric_pair(referred, referring, True)
@@ -485,17 +563,50 @@ class RulesAnalyzer(ABC):
         # Checks whether the two words have different quote arrays
         if (
             result == 2
-            and referred_root._.coref_chains.temp_quote_array
-            != referring._.coref_chains.temp_quote_array
+            and context.quote_arrays[referred_root.i]
+            != context.quote_arrays[referring.i]
         ):
             result = 1
 
         if result == 1:
-            referred.temp_is_uncertain = True  # type: ignore[attr-defined]
+            context.uncertain_pairs.add((referring.i, referred))
         elif result == 2:
-            referred.temp_is_uncertain = False  # type: ignore[attr-defined]
+            context.uncertain_pairs.discard((referring.i, referred))
         return result
 
+    @staticmethod
+    def get_rules_only_sort_key(
+        potential_referred: Mention, referring: Token
+    ) -> Tuple[bool, bool, int, bool, int, int]:
+        """Returns a sort key that orders the potential referreds of *referring* without
+        the neural ensemble: certain interpretations before uncertain ones, preceding
+        potential referreds before cataphoric ones, then potential referreds in nearer
+        sentences, then those with the same syntactic role as *referring*, then those
+        closer to the root of their sentence, and finally the nearest ones."""
+        context = get_annotation_context(referring.doc)
+        referred_root = referring.doc[potential_referred.root_index]
+        return (
+            (referring.i, potential_referred) in context.uncertain_pairs,
+            referred_root.i > referring.i,
+            context.sent_indexes[referring.i] - context.sent_indexes[referred_root.i],
+            referred_root.dep_ != referring.dep_,
+            sum(1 for _ in referred_root.ancestors),
+            abs(referred_root.i - referring.i),
+        )
+
+    def order_potential_referreds(self, doc: Doc) -> None:
+        """Sorts the potential referreds of each anaphor in *doc* by
+        *get_rules_only_sort_key()*. Used in place of *TendenciesAnalyzer.score()* when
+        no neural ensemble is loaded."""
+        for referring_index, potential_referreds in get_annotation_context(
+            doc
+        ).potential_referreds.items():
+            potential_referreds.sort(
+                key=lambda potential_referred: self.get_rules_only_sort_key(
+                    potential_referred, doc[referring_index]
+                )
+            )
+
     def has_list_member_in_propn_subtree(
         self, token: Token, word_list: List[str]
     ) -> bool:
@@ -553,12 +664,12 @@ class RulesAnalyzer(ABC):
     def is_involved_in_non_or_conjunction(token: Token) -> bool:
         """Returns *True* if *token* is part of a conjunction phrase that does not contain an or-
         lemma."""
-        if len(token._.coref_chains.temp_dependent_siblings) > 0:
-            return not token._.coref_chains.temp_has_or_coordination
-        if token._.coref_chains.temp_governing_sibling is not None:
-            return (
-                not token._.coref_chains.temp_governing_sibling._.coref_chains.temp_has_or_coordination
-            )
+        context = get_annotation_context(token.doc)
+        if len(context.dependent_siblings[token.i]) > 0:
+            return not context.has_or_coordination[token.i]
+        governing_sibling = context.governing_siblings[token.i]
+        if governing_sibling is not None:
+            return not context.has_or_coordination[governing_sibling.i]
         return False
 
     @staticmethod
@@ -0,0 +1,352 @@
+"""Inference for trained Coreferee models that depends on NumPy alone.
+
+The weights of a model generated by *create_thinc_model()* are exported to a flat
+bundle of named arrays with *inference.export_runtime_bundle()*. *NumpyEnsemble*
+loads such a bundle and reproduces the output of the thinc model's *predict()*
+without dispatching through thinc layers. Its inputs are plain arrays
+(*PairInputs*), so that this module can be imported by inference-only code without
+spaCy or thinc. *inference.FactorisedEnsemble*, which the *Annotator* uses, runs the
+same code on the arrays it extracts from *tendencies.DocumentPairInfo* objects.
+"""
+
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+import io
+import numpy
+from .errors import CorefereeError
+
+RUNTIME_BUNDLE_FORMAT_VERSION = 1
+
+# The sequences of dense layers that are repeated in every ensemble member
+RUNTIME_BUNDLE_PARTS = ("referrer_squeezer", "antecedent_squeezer", "main")
+
+# The range to which scores are clipped before the softmax, as in thinc
+SOFTMAX_CLIP = 20.0
+
+
+def get_runtime_bundle_key(
+    part: str, member_index: int, layer_index: int, array_name: str
+) -> str:
+    """Returns the name under which an array is stored in a runtime bundle, e.g.
+    *main.2.0.W* for the weight matrix of the first layer of the third member's main
+    stack. Weight matrices (*W*) have the shape *(nO, nI)* as in thinc, biases (*b*)
+    the shape *(nO,)*, and the boolean scalar *relu* records whether the layer applies
+    a ReLU."""
+    return ".".join((part, str(member_index), str(layer_index), array_name))
+
+
+class PairInputs(NamedTuple):
+    """The inputs to the ensemble for the pairs of one document."""
+
+    # The vector of each referrer, one row per referrer
+    referrer_vectors: numpy.ndarray
+
+    # The vector of each antecedent, one row per antecedent. The vector of an
+    # antecedent with several tokens is the mean of the vectors of those tokens.
+    antecedent_vectors: numpy.ndarray
+
+    # The feature and position maps of each referrer and of each antecedent
+    referrer_static_infos: numpy.ndarray
+    antecedent_static_infos: numpy.ndarray
+
+    # The compatibility map of each pair
+    compatibility_infos: numpy.ndarray
+
+    # The index of the referrer and of the antecedent of each pair. The pairs of each
+    # referrer are consecutive.
+    referrers2candidates_pointers: numpy.ndarray
+    candidates: numpy.ndarray
+
+    # The number of pairs of each referrer
+    candidate_lengths: numpy.ndarray
+
+
+class NumpyEnsemble:
+    """Runs the ensemble stored in a runtime bundle.
+
+    The first wide layer of each member is split into the column blocks that see
+    referrer inputs, antecedent inputs and the compatibility map (see
+    *inference.FactorisedEnsemble*), and the members are executed together with their
+    weights stacked, so that the per-pair work is small. Only CPU arrays are supported.
+
+    If *ensemble_size* is supplied, only the first *ensemble_size* members are
+    evaluated unless a different number is passed to *predict()*.
+
+    The feature map that starts each referrer or antecedent static info row is a binary
+    representation of the features in the *FeatureTable*, of which only a handful are
+    set for any one token. If *feature_map_width*, the length of the *FeatureTable*, is
+    supplied, each feature map is handled as the list of its active indexes and its
+    projection as the sum of the rows of the transposed weight matrix at those indexes,
+    as in an embedding bag. Only the numeric position maps that follow are projected as
+    dense matrix products.
+    """
+
+    def __init__(
+        self,
+        bundle: Dict[str, Any],
+        *,
+        ensemble_size: Optional[int] = None,
+        feature_map_width: Optional[int] = None,
+    ):
+        if int(bundle["format_version"]) != RUNTIME_BUNDLE_FORMAT_VERSION:
+            raise CorefereeError(
+                "".join(
+                    (
+                        "Unsupported runtime bundle format version ",
+                        str(int(bundle["format_version"])),
+                        ".",
+                    )
+                )
+            )
+        self.member_count = 0
+        while (
+            get_runtime_bundle_key(RUNTIME_BUNDLE_PARTS[0], self.member_count, 0, "W")
+            in bundle
+        ):
+            self.member_count += 1
+        self.parts = {
+            part: self.stack_layers(bundle, part) for part in RUNTIME_BUNDLE_PARTS
+        }
+        self.ensemble_size = self.validate_ensemble_size(ensemble_size)
+        self.feature_map_width = feature_map_width
+
+    @classmethod
+    def from_bytes(
+        cls,
+        data: bytes,
+        *,
+        ensemble_size: Optional[int] = None,
+        feature_map_width: Optional[int] = None,
+    ) -> "NumpyEnsemble":
+        with numpy.load(io.BytesIO(data), allow_pickle=False) as bundle:
+            return cls(
+                dict(bundle),
+                ensemble_size=ensemble_size,
+                feature_map_width=feature_map_width,
+            )
+
+    @classmethod
+    def from_disk(
+        cls,
+        path: str,
+        *,
+        ensemble_size: Optional[int] = None,
+        feature_map_width: Optional[int] = None,
+    ) -> "NumpyEnsemble":
+        with open(path, "rb") as bundle_file:
+            return cls.from_bytes(
+                bundle_file.read(),
+                ensemble_size=ensemble_size,
+                feature_map_width=feature_map_width,
+            )
+
+    def stack_layers(
+        self, bundle: Dict[str, Any], part: str
+    ) -> List[Tuple[numpy.ndarray, numpy.ndarray, bool]]:
+        """Returns the transposed weights, the biases and the activation of each layer
+        in *part*. The first layer sees the same input in every member, so its
+        transposed weight matrices are placed side by side with a column block per
+        member; those of the later layers are stacked along a leading member axis."""
+        stacked_layers = []
+        layer_index = 0
+        while get_runtime_bundle_key(part, 0, layer_index, "W") in bundle:
+            Ws = []
+            bs = []
+            for member_index in range(self.member_count):
+                Ws.append(
+                    numpy.asarray(
+                        bundle[
+                            get_runtime_bundle_key(part, member_index, layer_index, "W")
+                        ],
+                        dtype="float32",
+                    ).T
+                )
+                bs.append(
+                    numpy.asarray(
+                        bundle[
+                            get_runtime_bundle_key(part, member_index, layer_index, "b")
+                        ],
+                        dtype="float32",
+                    )
+                )
+            if layer_index == 0:
+                W_T = numpy.concatenate(Ws, axis=1)
+                b = numpy.concatenate(bs)
+            else:
+                W_T = numpy.stack(Ws)
+                b = numpy.stack([member_b[None, :] for member_b in bs])
+            is_relu = bool(bundle[get_runtime_bundle_key(part, 0, layer_index, "relu")])
+            stacked_layers.append((numpy.ascontiguousarray(W_T), b, is_relu))
+            layer_index += 1
+        return stacked_layers
+
+    def validate_ensemble_size(self, ensemble_size: Optional[int]) -> int:
+        if ensemble_size is None:
+            return self.member_count
+        if ensemble_size < 1 or ensemble_size > self.member_count:
+            raise CorefereeError(
+                "".join(
+                    (
+                        "Ensemble size must be between 1 and ",
+                        str(self.member_count),
+                        ", not ",
+                        str(ensemble_size),
+                        ".",
+                    )
+                )
+            )
+        return ensemble_size
+
+    def get_layers(
+        self, part: str, ensemble_size: int
+    ) -> List[Tuple[numpy.ndarray, numpy.ndarray, bool]]:
+        """Returns the layers of *part* restricted to the first *ensemble_size*
+        members."""
+        (W_T, b, is_relu), *other_layers = self.parts[part]
+        width = W_T.shape[1] // self.member_count * ensemble_size
+        return [(W_T[:, :width], b[:width], is_relu)] + [
+            (W_T[:ensemble_size], b[:ensemble_size], is_relu)
+            for W_T, b, is_relu in other_layers
+        ]
+
+    @staticmethod
+    def split_members(Y: numpy.ndarray, ensemble_size: int) -> numpy.ndarray:
+        """Converts the output of a layer whose weights are side by side, with one
+        column block per member, into an array with a leading member axis."""
+        return Y.reshape((len(Y), ensemble_size, -1)).transpose((1, 0, 2))
+
+    @staticmethod
+    def run_stacked_layers(
+        stacked_layers: List[Tuple[numpy.ndarray, numpy.ndarray, bool]],
+        Y: numpy.ndarray,
+    ) -> numpy.ndarray:
+        for W_T, b, is_relu in stacked_layers:
+            Y = numpy.matmul(Y, W_T)
+            Y += b
+            if is_relu:
+                numpy.maximum(Y, 0, out=Y)
+        return Y
+
+    def squeeze(
+        self, part: str, vectors: numpy.ndarray, ensemble_size: int
+    ) -> numpy.ndarray:
+        (W_T, b, _), *other_layers = self.get_layers(part, ensemble_size)
+        Y = vectors @ W_T
+        Y += b
+        numpy.maximum(Y, 0, out=Y)
+        return self.run_stacked_layers(
+            other_layers, self.split_members(Y, ensemble_size)
+        )
+
+    def score_pairs(
+        self, document_inputs: PairInputs, ensemble_size: int
+    ) -> numpy.ndarray:
+        """Returns the scores before the softmax for the pairs of a document, with a row
+        for each pair and a column for each of the first *ensemble_size* members."""
+        squeezed_referrers = self.squeeze(
+            "referrer_squeezer", document_inputs.referrer_vectors, ensemble_size
+        )
+        squeezed_antecedents = self.squeeze(
+            "antecedent_squeezer", document_inputs.antecedent_vectors, ensemble_size
+        )
+        (W_T, b, _), *other_layers = self.get_layers("main", ensemble_size)
+        squeezed_width = squeezed_referrers.shape[2]
+        static_width = document_inputs.referrer_static_infos.shape[1]
+        # Row blocks of *W_T* in the order in which *create_thinc_model()* concatenates
+        # the inputs
+        referrer_end = squeezed_width * 2 + static_width
+        antecedent_end = referrer_end + static_width
+        referrer_projections = self.project_squeezed(
+            squeezed_referrers, W_T[:squeezed_width], ensemble_size
+        ) + self.project_static_infos(
+            document_inputs.referrer_static_infos,
+            W_T[squeezed_width * 2 : referrer_end],
+        )
+        antecedent_projections = self.project_squeezed(
+            squeezed_antecedents,
+            W_T[squeezed_width : squeezed_width * 2],
+            ensemble_size,
+        ) + self.project_static_infos(
+            document_inputs.antecedent_static_infos, W_T[referrer_end:antecedent_end]
+        )
+        Y = document_inputs.compatibility_infos @ W_T[antecedent_end:]
+        Y += referrer_projections[document_inputs.referrers2candidates_pointers]
+        Y += antecedent_projections[document_inputs.candidates]
+        Y += b
+        numpy.maximum(Y, 0, out=Y)
+        Y = self.run_stacked_layers(other_layers, self.split_members(Y, ensemble_size))
+        # The last layer has a single output
+        return numpy.ascontiguousarray(Y[:, :, 0].T)
+
+    def project_static_infos(
+        self, static_infos: numpy.ndarray, W_T: numpy.ndarray
+    ) -> numpy.ndarray:
+        """Returns the product of *static_infos* and *W_T*, the rows of the transposed
+        first-layer weights that see them, using the sparse projection of the feature
+        maps if *feature_map_width* was supplied."""
+        if self.feature_map_width is None:
+            return static_infos @ W_T
+        feature_map_width = self.feature_map_width
+        projections = static_infos[:, feature_map_width:] @ W_T[feature_map_width:]
+        # *numpy.nonzero()* returns the active indexes row by row. The values at the
+        # active indexes are always 1.
+        rows, columns = numpy.nonzero(static_infos[:, :feature_map_width])
+        if len(rows) > 0:
+            row_starts = numpy.flatnonzero(numpy.diff(rows, prepend=-1))
+            projections[rows[row_starts]] += numpy.add.reduceat(
+                W_T[columns], row_starts
+            )
+        return projections
+
+    @staticmethod
+    def project_squeezed(
+        squeezed: numpy.ndarray, W_T: numpy.ndarray, ensemble_size: int
+    ) -> numpy.ndarray:
+        """Returns the product of each member's squeezed vectors and its column block of
+        *W_T*, with the results for the different members side by side."""
+        W_T = W_T.reshape((len(W_T), ensemble_size, -1)).transpose((1, 0, 2))
+        Y = numpy.matmul(squeezed, W_T)
+        return Y.transpose((1, 0, 2)).reshape((Y.shape[1], -1))
+
+    @staticmethod
+    def softmax_sequences(
+        scores: numpy.ndarray, lengths: numpy.ndarray
+    ) -> List[numpy.ndarray]:
+        """Applies a softmax to each column of each sequence of *lengths* rows within
+        *scores* and returns the sequences as separate arrays."""
+        exponentials = numpy.exp(numpy.clip(scores, -SOFTMAX_CLIP, SOFTMAX_CLIP))
+        sequence_indexes = numpy.repeat(numpy.arange(len(lengths)), lengths)
+        sums = numpy.empty((len(lengths), scores.shape[1]), dtype=scores.dtype)
+        for column in range(scores.shape[1]):
+            sums[:, column] = numpy.bincount(
+                sequence_indexes,
+                weights=exponentials[:, column],
+                minlength=len(lengths),
+            )
+        exponentials /= sums[sequence_indexes]
+        return numpy.split(exponentials, numpy.cumsum(lengths)[:-1].tolist())
+
+    def predict(
+        self, pair_inputs: List[PairInputs], *, ensemble_size: Optional[int] = None
+    ) -> List[numpy.ndarray]:
+        """Returns the same output as the thinc model's *predict()* on the documents
+        whose inputs are *pair_inputs*: one array per referrer with a row for each
+        candidate antecedent and a column for each evaluated ensemble member. If fewer
+        members than the whole ensemble are evaluated, the members that are not needed
+        are never executed."""
+        ensemble_size = (
+            self.ensemble_size
+            if ensemble_size is None
+            else self.validate_ensemble_size(ensemble_size)
+        )
+        scores = []
+        lengths = []
+        for document_inputs in pair_inputs:
+            if len(document_inputs.candidates) == 0:
+                continue
+            scores.append(self.score_pairs(document_inputs, ensemble_size))
+            lengths.append(document_inputs.candidate_lengths)
+        if len(scores) == 0:
+            return []
+        return self.softmax_sequences(
+            numpy.concatenate(scores), numpy.concatenate(lengths)
+        )
@@ -1,18 +1,45 @@
-from typing import List, Tuple, Callable, cast, Union, Dict, Set
+from typing import (
+    List,
+    Tuple,
+    Callable,
+    cast,
+    Union,
+    Dict,
+    Set,
+    Optional,
+    TYPE_CHECKING,
+)
 from copy import copy
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from thinc.model import Model
 from thinc.layers import Relu, concatenate, chain, clone
 from thinc.layers import Linear, noop, tuplify
 from thinc.backends import Ops, get_current_ops
-from thinc.types import Floats2d, Ints1d, Ragged
+from thinc.types import Floats1d, Floats2d, Ints1d, Ragged
+from thinc.util import get_array_module
 from spacy.tokens import Token, Doc
 from spacy.language import Language
-from .data_model import FeatureTable, Mention
+from .cache import SentenceFeatureCache
+from .data_model import FeatureTable, Mention, get_annotation_context
+from .deadline import AnnotationDeadline, RESTRICTED_CANDIDATE_COUNT
 from .rules import RulesAnalyzerFactory, RulesAnalyzer
 
+if TYPE_CHECKING:
+    from .inference import FactorisedEnsemble
+
 ENSEMBLE_SIZE = 5
 
+# The default maximum number of pairs passed to the neural ensemble at once
+SCORING_BATCH_SIZE = 2000
+
+# The widths of the two hidden layers that follow the concatenated inputs in each
+# ensemble member
+HIDDEN_LAYER_WIDTHS = (639, 20)
+
+# The architecture of the single-member student model trained by distillation
+DISTILLED_ENSEMBLE_SIZE = 1
+DISTILLED_HIDDEN_LAYER_WIDTHS = (96, 12)
+
 
 class TendenciesAnalyzer:
     def __init__(
@@ -20,17 +47,21 @@ class TendenciesAnalyzer:
         rules_analyzer: RulesAnalyzer,
         vectors_nlp: Language,
         feature_table: FeatureTable,
+        sentence_cache: Optional[SentenceFeatureCache] = None,
     ):
+        """If *sentence_cache* is specified, feature maps and position maps are shared
+        with identical sentences in other documents via *sentence_cache*."""
         self.rules_analyzer = rules_analyzer
         self.vectors_nlp = vectors_nlp
         self.feature_table = feature_table
+        self.sentence_cache = sentence_cache
 
     def get_feature_map(
         self, token_or_mention: Union[Token, Mention], doc: Doc
     ) -> List[Union[int, float]]:
         """Returns a binary list representing the features from *self.feature_table* that
         the token or any of the tokens within the mention has. The list is also
-        added as *token._.coref_chains.temp_feature_map* or *mention.temp_feature_map*.
+        cached in the annotation context of *doc*.
         """
 
         def convert_to_oneshot(reference_list, actual_list):
@@ -54,18 +85,30 @@ class TendenciesAnalyzer:
                 ]
             return oneshot
 
+        context = get_annotation_context(doc)
         siblings = []
         if isinstance(token_or_mention, Token):
-            if hasattr(token_or_mention._.coref_chains, "temp_feature_map"):
-                return token_or_mention._.coref_chains.temp_feature_map
+            if token_or_mention.i in context.token_feature_maps:
+                return context.token_feature_maps[token_or_mention.i]
             token = token_or_mention
         else:
-            if hasattr(token_or_mention, "temp_feature_map"):
-                return token_or_mention.temp_feature_map  # type:ignore[attr-defined]
+            if token_or_mention in context.mention_feature_maps:
+                return context.mention_feature_maps[token_or_mention]
             token = doc[token_or_mention.root_index]
             if len(token_or_mention.token_indexes) > 1:
                 siblings = [doc[i] for i in token_or_mention.token_indexes[1:]]
 
+        if self.sentence_cache is not None:
+            cached_feature_map = self.sentence_cache.get(
+                token_or_mention, doc, "feature_map"
+            )
+            if cached_feature_map is not None:
+                if isinstance(token_or_mention, Token):
+                    context.token_feature_maps[token_or_mention.i] = cached_feature_map
+                else:
+                    context.mention_feature_maps[token_or_mention] = cached_feature_map
+                return cached_feature_map
+
         feature_map = convert_to_oneshot(self.feature_table.tags, [token.tag_])
 
         feature_map.extend(
@@ -168,36 +211,45 @@ class TendenciesAnalyzer:
                 )
             )
 
+        if self.sentence_cache is not None:
+            self.sentence_cache.put(token_or_mention, doc, "feature_map", feature_map)
         if isinstance(token_or_mention, Token):
-            token_or_mention._.coref_chains.temp_feature_map = feature_map
+            context.token_feature_maps[token_or_mention.i] = feature_map
         else:
-            token_or_mention.temp_feature_map = feature_map  # type:ignore[attr-defined]
+            context.mention_feature_maps[token_or_mention] = feature_map
         return feature_map
 
     def get_position_map(
         self, token_or_mention: Union[Token, Mention], doc: Doc
     ) -> List[Union[int, float]]:
         """Returns a list of numbers representing the position, depth, etc. of the token or mention
-        within its sentence. The list is also added as *token._.coref_chains.temp_position_map*
-        or *mention.temp_position_map*.
+        within its sentence. The list is also cached in the annotation context of *doc*.
         """
 
+        context = get_annotation_context(doc)
         if isinstance(token_or_mention, Token):
-            if hasattr(token_or_mention._.coref_chains, "temp_position_map"):
-                return token_or_mention._.coref_chains.temp_position_map
+            if token_or_mention.i in context.token_position_maps:
+                return context.token_position_maps[token_or_mention.i]
             token = token_or_mention
         else:
-            if hasattr(token_or_mention, "temp_position_map"):
-                return token_or_mention.temp_position_map  # type:ignore[attr-defined]
+            if token_or_mention in context.mention_position_maps:
+                return context.mention_position_maps[token_or_mention]
             token = doc[token_or_mention.root_index]
 
+        if self.sentence_cache is not None:
+            cached_position_map = self.sentence_cache.get(
+                token_or_mention, doc, "position_map"
+            )
+            if cached_position_map is not None:
+                position_map = cast(List[int], cached_position_map)
+                if isinstance(token_or_mention, Token):
+                    context.token_position_maps[token_or_mention.i] = position_map
+                else:
+                    context.mention_position_maps[token_or_mention] = position_map
+                return cached_position_map
+
         # This token is the nth word within its sentence
-        position_map = [
-            token.i
-            - token.doc._.coref_chains.temp_sent_starts[
-                token._.coref_chains.temp_sent_index
-            ]
-        ]
+        position_map = [token.i - context.sent_starts[context.sent_indexes[token.i]]]
 
         # This token is at depth n from the root
         position_map.append(len(list(token.ancestors)))
@@ -236,8 +288,10 @@ class TendenciesAnalyzer:
 
         # Number of dependent siblings, or -1 if the method was passed a mention that is within
         # a coordination phrase but only covers one token within that phrase
-        if token._.coref_chains.temp_governing_sibling is not None or (
-            len(token._.coref_chains.temp_dependent_siblings) > 0
+        governing_sibling = context.governing_siblings[token.i]
+        dependent_siblings = context.dependent_siblings[token.i]
+        if governing_sibling is not None or (
+            len(dependent_siblings) > 0
             and not (
                 isinstance(token_or_mention, Mention)
                 and len(token_or_mention.token_indexes) > 1
@@ -245,18 +299,16 @@ class TendenciesAnalyzer:
         ):
             position_map.append(-1)
         else:
-            position_map.append(len(token._.coref_chains.temp_dependent_siblings))
+            position_map.append(len(dependent_siblings))
 
-        position_map.append(
-            1 if token._.coref_chains.temp_governing_sibling is not None else 0
-        )
+        position_map.append(1 if governing_sibling is not None else 0)
 
+        if self.sentence_cache is not None:
+            self.sentence_cache.put(token_or_mention, doc, "position_map", position_map)
         if isinstance(token_or_mention, Token):
-            token_or_mention._.coref_chains.temp_position_map = position_map
+            context.token_position_maps[token_or_mention.i] = position_map
         else:
-            token_or_mention.temp_position_map = (  # type:ignore[attr-defined]
-                position_map
-            )
+            context.mention_position_maps[token_or_mention] = position_map
         return position_map
 
     def get_compatibility_map(
@@ -265,13 +317,14 @@ class TendenciesAnalyzer:
         """Returns a list of numbers representing the interaction between *referred* and
         *referring*. It will already have been established that coreference between the two is
         possible; the compatibility map assists the neural network in ascertaining how likely
-        it is. The list is also added as *referred.temp_compatibility_map*.
+        it is. The list is also cached in the annotation context of the document.
         """
         doc = referring.doc
+        context = get_annotation_context(doc)
         referred_root = doc[referred.root_index]
 
-        if hasattr(referred, "temp_compatibility_map"):
-            return referred.temp_compatibility_map  # type:ignore[attr-defined]
+        if (referring.i, referred) in context.compatibility_maps:
+            return context.compatibility_maps[(referring.i, referred)]
 
         # Referential distance in words (may be negative in the case of cataphora)
         compatibility_map = cast(
@@ -280,12 +333,12 @@ class TendenciesAnalyzer:
 
         # Referential distance in sentences
         compatibility_map.append(
-            referring._.coref_chains.temp_sent_index
-            - referred_root._.coref_chains.temp_sent_index
+            context.sent_indexes[referring.i] - context.sent_indexes[referred_root.i]
         )
 
         # Whether the referred mention, its lefthand sibling or its head is among the ancestors
         # of the referring element
+        referred_governing_sibling = context.governing_siblings[referred_root.i]
         compatibility_map.append(
             1
             if referred_root in referring.ancestors
@@ -293,15 +346,12 @@ class TendenciesAnalyzer:
                 referred_root.dep_ != self.rules_analyzer.root_dep
                 and referred_root.head in referring.ancestors
             )
-            or referred_root._.coref_chains.temp_governing_sibling is not None
+            or referred_governing_sibling is not None
             and (
-                referred_root._.coref_chains.temp_governing_sibling
-                in referring.ancestors
+                referred_governing_sibling in referring.ancestors
                 or (
-                    referred_root._.coref_chains.temp_governing_sibling.dep_
-                    != self.rules_analyzer.root_dep
-                    and referred_root._.coref_chains.temp_governing_sibling.head
-                    in referring.ancestors
+                    referred_governing_sibling.dep_ != self.rules_analyzer.root_dep
+                    and referred_governing_sibling.head in referring.ancestors
                 )
             )
             else 0
@@ -337,30 +387,129 @@ class TendenciesAnalyzer:
             ].count(1)
         )
 
-        referred.temp_compatibility_map = compatibility_map  # type:ignore[attr-defined]
+        context.compatibility_maps[(referring.i, referred)] = compatibility_map
         return compatibility_map
 
-    def score(self, doc: Doc, thinc_ensemble: Model) -> None:
-        """Scores all possible anaphoric pairs in *doc*. The scores are never referenced
-        outside this method because the possible pairs on each anaphor are sorted within
-        this method with the more likely interpretations at the front of the list.
+    @staticmethod
+    def get_heuristic_order_key(
+        potential_referred: Mention, referring: Token
+    ) -> Tuple[bool, int]:
+        """Returns a cheap sort key for a potential referred of *referring* that
+        requires no featurisation: certain interpretations before uncertain ones, and
+        within each group the nearest potential referreds first."""
+        return (
+            (referring.i, potential_referred)
+            in get_annotation_context(referring.doc).uncertain_pairs,
+            abs(potential_referred.root_index - referring.i),
+        )
+
+    def get_candidates_to_score(
+        self, doc: Doc, max_candidates: Optional[int] = None
+    ) -> Tuple[Dict[int, List[Mention]], Dict[int, List[Mention]]]:
+        """Returns two dictionaries from the indexes of the anaphors in *doc* to the
+        potential referreds that are kept and to those that are pruned respectively.
+
+        If *max_candidates* is specified, only the *max_candidates* potential referreds
+        of each anaphor that come first under *get_heuristic_order_key()* are kept; the
+        remainder are returned in heuristic order. Otherwise all potential referreds are
+        kept. The lists on the tokens are left unchanged.
         """
-        document_pair_info = DocumentPairInfo.from_doc(doc, self, ENSEMBLE_SIZE)
+        referrers_to_candidates: Dict[int, List[Mention]] = {}
+        referrers_to_pruned_candidates: Dict[int, List[Mention]] = {}
+        for referring_index, potential_referreds in sorted(
+            get_annotation_context(doc).potential_referreds.items()
+        ):
+            referring = doc[referring_index]
+            candidates = list(potential_referreds)
+            if max_candidates is not None and len(candidates) > max_candidates:
+                candidates.sort(
+                    key=lambda potential_referred: self.get_heuristic_order_key(
+                        potential_referred, referring
+                    )
+                )
+                referrers_to_pruned_candidates[referring.i] = candidates[
+                    max_candidates:
+                ]
+                candidates = candidates[:max_candidates]
+            referrers_to_candidates[referring.i] = candidates
+        return referrers_to_candidates, referrers_to_pruned_candidates
+
+    @staticmethod
+    def get_scoring_batches(
+        referrers_to_candidates: Dict[int, List[Mention]],
+        scoring_batch_size: Optional[int],
+    ) -> List[Dict[int, List[Mention]]]:
+        """Splits *referrers_to_candidates* into batches with at most
+        *scoring_batch_size* candidates each, or with all the candidates if
+        *scoring_batch_size* is *None*. The candidates of an anaphor are never split
+        across batches because the softmax is calculated over all of them; an anaphor
+        with more than *scoring_batch_size* candidates forms a batch on its own."""
+        batches: List[Dict[int, List[Mention]]] = [{}]
+        batch_pair_count = 0
+        for referring_index, candidates in referrers_to_candidates.items():
+            if (
+                scoring_batch_size is not None
+                and batch_pair_count + len(candidates) > scoring_batch_size
+                and batch_pair_count > 0
+            ):
+                batches.append({})
+                batch_pair_count = 0
+            batches[-1][referring_index] = candidates
+            batch_pair_count += len(candidates)
+        return batches
+
+    def restrict_candidates(
+        self,
+        referring: Token,
+        candidates: List[Mention],
+        pruned_candidates: List[Mention],
+    ) -> Tuple[List[Mention], List[Mention]]:
+        """Keeps the *RESTRICTED_CANDIDATE_COUNT* members of *candidates* that come
+        first under *get_heuristic_order_key()* and returns them together with the remaining
+        potential referreds in heuristic order."""
+        candidates = sorted(
+            candidates,
+            key=lambda potential_referred: self.get_heuristic_order_key(
+                potential_referred, referring
+            ),
+        )
+        return (
+            candidates[:RESTRICTED_CANDIDATE_COUNT],
+            candidates[RESTRICTED_CANDIDATE_COUNT:] + pruned_candidates,
+        )
+
+    def score_batch(
+        self,
+        doc: Doc,
+        thinc_ensemble: Union[Model, "FactorisedEnsemble"],
+        ensemble_size: Optional[int],
+        referrers_to_candidates: Dict[int, List[Mention]],
+    ) -> Dict[Tuple[int, Mention], float]:
+        """Returns a dictionary from the pairs of anaphor index and candidate in
+        *referrers_to_candidates* to their scores."""
+        pair_scores: Dict[Tuple[int, Mention], float] = {}
+        document_pair_info = DocumentPairInfo.from_doc(
+            doc,
+            self,
+            ENSEMBLE_SIZE,
+            referrers_to_candidates=referrers_to_candidates,
+        )
         if len(document_pair_info.candidates.dataXd) > 0:
-            scores = thinc_ensemble.predict([document_pair_info])
+            if ensemble_size is None:
+                scores = thinc_ensemble.predict([document_pair_info])
+            else:
+                scores = cast("FactorisedEnsemble", thinc_ensemble).predict(
+                    [document_pair_info], ensemble_size=ensemble_size
+                )
             referring_scores_iterator = iter(scores)
-            for referring in (
-                t for t in doc if hasattr(t._.coref_chains, "temp_potential_referreds")
-            ):
+            for referring_index, candidates in referrers_to_candidates.items():
                 referring_scores = next(referring_scores_iterator)
                 mention_scores_iterator = iter(referring_scores)
-                for potential_referred in (
-                    p for p in referring._.coref_chains.temp_potential_referreds
-                ):
+                for potential_referred in candidates:
                     ensemble_scores = next(mention_scores_iterator)
-                    potential_referred.temp_score = sum(ensemble_scores) / len(
+                    pair_scores[(referring_index, potential_referred)] = sum(
                         ensemble_scores
-                    )
+                    ) / len(ensemble_scores)
                 is_last = False
                 try:
                     next(mention_scores_iterator)
@@ -377,15 +526,94 @@ class TendenciesAnalyzer:
             assert (
                 is_last
             ), "Mismatch between referring anaphors and neural network output."
-            for referring in (
-                t for t in doc if hasattr(t._.coref_chains, "temp_potential_referreds")
-            ):
-                referring._.coref_chains.temp_potential_referreds.sort(
+        return pair_scores
+
+    def score(
+        self,
+        doc: Doc,
+        thinc_ensemble: Union[Model, "FactorisedEnsemble"],
+        ensemble_size: Optional[int] = None,
+        max_candidates: Optional[int] = None,
+        scoring_batch_size: Optional[int] = SCORING_BATCH_SIZE,
+        deadline: Optional[AnnotationDeadline] = None,
+    ) -> None:
+        """Scores all possible anaphoric pairs in *doc*. The scores are never referenced
+        outside this method because the possible pairs on each anaphor are sorted within
+        this method with the more likely interpretations at the front of the list.
+
+        *ensemble_size* overrides the number of ensemble members that a
+        *FactorisedEnsemble* evaluates.
+
+        The softmax over the candidates of an anaphor with a single potential referred
+        always returns 1.0, so such anaphors are not passed to the network. If
+        *max_candidates* is specified, only the potential referreds selected by
+        *get_candidates_to_score()* are scored; the pruned potential referreds follow
+        the scored ones in heuristic order.
+
+        The pairs are passed to the network in batches of at most *scoring_batch_size*
+        (see *get_scoring_batches()*), so that the memory required by the inputs and
+        activations does not grow with the length of *doc*.
+
+        *deadline* is checked before each batch. Once the *restricted_candidates* stage
+        is reached, only the potential referreds that come first under
+        *get_heuristic_order_key()* are scored; once the *rules_only* stage is reached, no
+        further batches are scored and the remaining potential referreds are ordered
+        by *get_heuristic_order_key()*.
+        """
+        (
+            referrers_to_candidates,
+            referrers_to_pruned_candidates,
+        ) = self.get_candidates_to_score(doc, max_candidates)
+        referrers_to_scored_candidates = {
+            referring_index: candidates
+            for referring_index, candidates in referrers_to_candidates.items()
+            if len(candidates) > 1
+        }
+        unscored_referring_indexes: Set[int] = set()
+        pair_scores: Dict[Tuple[int, Mention], float] = {}
+        for referrers_to_batch_candidates in self.get_scoring_batches(
+            referrers_to_scored_candidates, scoring_batch_size
+        ):
+            if deadline is not None and deadline.has_reached("rules_only"):
+                unscored_referring_indexes.update(referrers_to_batch_candidates)
+                continue
+            if deadline is not None and deadline.has_reached("restricted_candidates"):
+                for referring_index in referrers_to_batch_candidates:
+                    (
+                        referrers_to_candidates[referring_index],
+                        referrers_to_pruned_candidates[referring_index],
+                    ) = self.restrict_candidates(
+                        doc[referring_index],
+                        referrers_to_candidates[referring_index],
+                        referrers_to_pruned_candidates.get(referring_index, []),
+                    )
+                    referrers_to_batch_candidates[referring_index] = (
+                        referrers_to_candidates[referring_index]
+                    )
+            pair_scores.update(
+                self.score_batch(
+                    doc, thinc_ensemble, ensemble_size, referrers_to_batch_candidates
+                )
+            )
+        context = get_annotation_context(doc)
+        for referring_index, candidates in referrers_to_candidates.items():
+            if referring_index in unscored_referring_indexes:
+                candidates.sort(
+                    key=lambda potential_referred: self.get_heuristic_order_key(
+                        potential_referred, doc[referring_index]
+                    )
+                )
+            elif referring_index in referrers_to_scored_candidates:
+                candidates.sort(
                     key=lambda potential_referred: (
-                        potential_referred.temp_is_uncertain,
-                        0 - potential_referred.temp_score,
+                        (referring_index, potential_referred)
+                        in context.uncertain_pairs,
+                        0 - pair_scores[(referring_index, potential_referred)],
                     )
                 )
+            context.potential_referreds[referring_index] = (
+                candidates + referrers_to_pruned_candidates.get(referring_index, [])
+            )
 
 
 def generate_feature_table(docs: list, nlp: Language) -> FeatureTable:
@@ -489,9 +717,55 @@ class DocumentPairInfo:
     # A list specifying which referrer the candidate at each position points to.
     referrers2candidates_pointers: Ints1d
 
-    static_infos: Floats2d
+    # The feature and position maps of each referrer, aligned with *referrers*.
+    referrer_static_infos: Floats2d
+
+    # The feature and position maps of each antecedent, aligned with *antecedents*.
+    antecedent_static_infos: Floats2d
+
+    # The compatibility map of each pair, aligned with *candidates*.
+    compatibility_infos: Floats2d
+
     training_outputs: List[Floats2d]
 
+    # Cache for *static_infos*
+    _static_infos: Optional[Floats2d] = field(default=None, init=False, repr=False)
+
+    @property
+    def vectors(self) -> Dict[int, Floats1d]:
+        """The vectors of the referrers and antecedent tokens by token index."""
+        return get_annotation_context(self.doc).vectors
+
+    @property
+    def head_vectors(self) -> Dict[int, Floats1d]:
+        """The vectors of the heads of the referrers and antecedent tokens by token
+        index."""
+        return get_annotation_context(self.doc).head_vectors
+
+    @property
+    def static_infos(self) -> Floats2d:
+        """One row per pair made up of the referrer static info, the antecedent static
+        info and the compatibility info. The same referrer and antecedent blocks are
+        repeated for every pair they take part in, so the array is only assembled when
+        it is first requested: inference via *FactorisedEnsemble* never requests it.
+        """
+        if self._static_infos is None:
+            if len(self.compatibility_infos) > 0:
+                xp = get_array_module(self.compatibility_infos)
+                self._static_infos = xp.concatenate(
+                    (
+                        self.referrer_static_infos[self.referrers2candidates_pointers],
+                        self.antecedent_static_infos[
+                            cast(Ints1d, self.candidates.dataXd)
+                        ],
+                        self.compatibility_infos,
+                    ),
+                    axis=1,
+                )
+            else:
+                self._static_infos = self.compatibility_infos
+        return cast(Floats2d, self._static_infos)
+
     @classmethod
     def from_doc(
         cls,
@@ -500,29 +774,41 @@ class DocumentPairInfo:
         ensemble_size: int,
         ops=None,
         is_train: bool = False,
+        *,
+        referrers_to_candidates: Optional[Dict[int, List[Mention]]] = None
     ) -> "DocumentPairInfo":
+        """If *referrers_to_candidates* is specified, only the tokens at its keys are
+        treated as referrers, with the mentions in its values as their candidates.
+        Otherwise all tokens with potential referreds are referrers."""
         if ops is None:
             ops = get_current_ops()
 
         referrers_list: List[int] = []
         antecedents_list: List[List[int]] = []
         candidates_list: List[List[int]] = []
-        static_infos_list: List[List[Union[float, int]]] = []
+        referrer_static_infos_list: List[List[Union[float, int]]] = []
+        antecedent_static_infos_list: List[List[Union[float, int]]] = []
+        compatibility_infos_list: List[List[Union[float, int]]] = []
         training_outputs_list: List[List[float]] = []
         candidates2antecedents: Dict[Tuple[int, ...], int] = {}
+        if referrers_to_candidates is None:
+            referrers_to_candidates = get_annotation_context(doc).potential_referreds
         for token in doc:
-            if not hasattr(token._.coref_chains, "temp_potential_referreds"):
+            if token.i not in referrers_to_candidates:
                 continue
+            potential_referreds = referrers_to_candidates[token.i]
             _set_vectors(tendencies_analyzer.vectors_nlp, ops, token)
-            temp_potential_referreds = cast(
-                List[Mention], token._.coref_chains.temp_potential_referreds
-            )
             if is_train and Mention.number_of_training_mentions_marked_true(token) == 0:
                 continue
             referrers_list.append(token.i)
+            referrer_static_info = copy(tendencies_analyzer.get_feature_map(token, doc))
+            referrer_static_info.extend(
+                tendencies_analyzer.get_position_map(token, doc)
+            )
+            referrer_static_infos_list.append(referrer_static_info)
             candidates_list.append([])
-            temp_potential_referreds.sort(key=lambda m: m.root_index)
-            for mention in temp_potential_referreds:
+            potential_referreds.sort(key=lambda m: m.root_index)
+            for mention in potential_referreds:
                 if is_train and hasattr(mention, "spanned_in_training"):
                     continue
                 # spanned in training - X->Y and Y->Z; we do want to present X->Z
@@ -536,18 +822,20 @@ class DocumentPairInfo:
                     candidates2antecedents[token_indexes] = len(antecedents_list)
                     candidates_list[-1].append(len(antecedents_list))
                     antecedents_list.append(mention.token_indexes)
+                    antecedent_static_info = copy(
+                        tendencies_analyzer.get_feature_map(mention, doc)
+                    )
+                    antecedent_static_info.extend(
+                        tendencies_analyzer.get_position_map(mention, doc)
+                    )
+                    antecedent_static_infos_list.append(antecedent_static_info)
                     for token_index in token_indexes:
                         _set_vectors(
                             tendencies_analyzer.vectors_nlp, ops, token.doc[token_index]
                         )
-                static_info = copy(tendencies_analyzer.get_feature_map(token, doc))
-                static_info.extend(tendencies_analyzer.get_position_map(token, doc))
-                static_info.extend(tendencies_analyzer.get_feature_map(mention, doc))
-                static_info.extend(tendencies_analyzer.get_position_map(mention, doc))
-                static_info.extend(
+                compatibility_infos_list.append(
                     tendencies_analyzer.get_compatibility_map(mention, token)
                 )
-                static_infos_list.append(static_info)
                 if is_train:
                     training_outputs_list.append(
                         [1.0] * ensemble_size
@@ -568,6 +856,23 @@ class DocumentPairInfo:
                 training_outputs = [ops.alloc2f(0, 0)]
         else:
             training_outputs = None
+        referrers2candidates_pointers = ops.asarray1i(
+            [
+                item
+                for sublist in [
+                    [index] * len(entries)
+                    for index, entries in enumerate(candidates_list)
+                ]
+                for item in sublist
+            ]
+        )
+        if len(compatibility_infos_list) > 0:
+            referrer_static_infos = ops.asarray2f(referrer_static_infos_list)
+            antecedent_static_infos = ops.asarray2f(antecedent_static_infos_list)
+            compatibility_infos = ops.asarray2f(compatibility_infos_list)
+        else:
+            referrer_static_infos = antecedent_static_infos = ops.alloc2f(0, 0)
+            compatibility_infos = ops.alloc2f(0, 0)
         return cls(
             doc=doc,
             referrers=ops.asarray1i(referrers_list),
@@ -575,22 +880,22 @@ class DocumentPairInfo:
             if len(antecedents_list) > 0
             else _empty_Ragged(ops, "i"),
             candidates=candidates,
-            referrers2candidates_pointers=ops.asarray1i(
-                [
-                    item
-                    for sublist in [
-                        [index] * len(entries)
-                        for index, entries in enumerate(candidates_list)
-                    ]
-                    for item in sublist
-                ]
-            ),
-            static_infos=ops.asarray2f(static_infos_list),
+            referrers2candidates_pointers=referrers2candidates_pointers,
+            referrer_static_infos=referrer_static_infos,
+            antecedent_static_infos=antecedent_static_infos,
+            compatibility_infos=compatibility_infos,
             training_outputs=training_outputs,
         )
 
 
-def create_thinc_model() -> Model[List["DocumentPairInfo"], Tuple]:
+def create_thinc_model(
+    *,
+    ensemble_size: int = ENSEMBLE_SIZE,
+    hidden_layer_widths: Tuple[int, int] = HIDDEN_LAYER_WIDTHS
+) -> Model[List["DocumentPairInfo"], Tuple]:
+    """Generates the neural ensemble. The defaults produce the architecture of the
+    shipped models; *create_distilled_thinc_model()* produces the student model."""
+
     def create_vector_squeezer() -> Model[Floats2d, Floats2d]:
         """Generates part of the network that accepts a full-width vector and squeezes
         it down to 3 neurons to feed into the rest of the network. This is intended
@@ -612,7 +917,7 @@ def create_thinc_model() -> Model[List["DocumentPairInfo"], Tuple]:
         static_inputs = get_static_inputs()
 
         ensemble_members = []
-        for _ in range(ENSEMBLE_SIZE):
+        for _ in range(ensemble_size):
 
             inputs: Model[List["DocumentPairInfo"], Floats2d] = concatenate(
                 referrers >> create_vector_squeezer(),
@@ -622,8 +927,8 @@ def create_thinc_model() -> Model[List["DocumentPairInfo"], Tuple]:
 
             model: Model[List["DocumentPairInfo"], Floats2d] = chain(
                 inputs,
-                Relu(639),
-                Relu(20),
+                Relu(hidden_layer_widths[0]),
+                Relu(hidden_layer_widths[1]),
                 Linear(1),
             )
 
@@ -635,6 +940,39 @@ def create_thinc_model() -> Model[List["DocumentPairInfo"], Tuple]:
         return chain(noop() & ensemble, apply_softmax_sequences())
 
 
+def create_distilled_thinc_model() -> Model[List["DocumentPairInfo"], Tuple]:
+    return create_thinc_model(
+        ensemble_size=DISTILLED_ENSEMBLE_SIZE,
+        hidden_layer_widths=DISTILLED_HIDDEN_LAYER_WIDTHS,
+    )
+
+
+def get_ensemble_member_layers(
+    thinc_ensemble: Model[List["DocumentPairInfo"], Tuple],
+) -> List[Dict[str, List[Model]]]:
+    """Returns, for each member of an ensemble generated by *create_thinc_model()*, the
+    dense layers of its referrer vector squeezer (*referrer_squeezer*), of its antecedent
+    vector squeezer (*antecedent_squeezer*) and of the stack that accepts the concatenated
+    inputs (*main*).
+    """
+    ensemble = thinc_ensemble.layers[0].layers[1]
+    # *concatenate()* returns a single member as it is rather than wrapping it
+    member_models = (
+        [ensemble] if ensemble.layers[-1].name == "linear" else ensemble.layers
+    )
+    members = []
+    for member in member_models:
+        inputs = member.layers[0]
+        members.append(
+            {
+                "referrer_squeezer": list(inputs.layers[0].layers[1].layers),
+                "antecedent_squeezer": list(inputs.layers[1].layers[1].layers),
+                "main": list(member.layers[1:]),
+            }
+        )
+    return members
+
+
 def apply_softmax_sequences() -> Model[
     Tuple[List["DocumentPairInfo"], Floats2d], Floats2d
 ]:
@@ -679,11 +1017,9 @@ def referrers_forward(
 
     for document_pair_info in document_pair_infos:
 
+        vectors = document_pair_info.vectors
         this_document_vector = model.ops.asarray2f(
-            [
-                document_pair_info.doc[referrer]._.coref_chains.temp_vector
-                for referrer in document_pair_info.referrers.tolist()
-            ]
+            [vectors[referrer] for referrer in document_pair_info.referrers.tolist()]
         )[model.ops.asarray1i(document_pair_info.referrers2candidates_pointers)]
 
         vectors_to_return.append(this_document_vector)
@@ -705,9 +1041,10 @@ def referrer_heads_forward(
 
     for document_pair_info in document_pair_infos:
 
+        head_vectors = document_pair_info.head_vectors
         this_document_vector = model.ops.asarray2f(
             [
-                document_pair_info.doc[referrer]._.coref_chains.temp_head_vector
+                head_vectors[referrer]
                 for referrer in document_pair_info.referrers.tolist()
             ]
         )[model.ops.asarray1i(document_pair_info.referrers2candidates_pointers)]
@@ -731,13 +1068,12 @@ def antecedents_forward(
 
     for document_pair_info in document_pair_infos:
 
+        vectors = document_pair_info.vectors
         this_document_vector = model.ops.asarray2f(
             [
                 model.ops.asarray1f(
                     [
-                        document_pair_info.doc[
-                            cast(int, index[0])
-                        ]._.coref_chains.temp_vector
+                        vectors[cast(int, index[0])]
                         for index in document_pair_info.antecedents[i].dataXd.tolist()
                     ]
                 ).mean(  # type: ignore
@@ -766,14 +1102,15 @@ def antecedent_heads_forward(
 
     for document_pair_info in document_pair_infos:
 
+        head_vectors = document_pair_info.head_vectors
         this_document_vector = model.ops.asarray2f(
             # We only examine the head of the first element within the coordinated phrase
             # because other elements will not have the true semantic head as their
             # syntactic head
             [
-                document_pair_info.doc[
+                head_vectors[
                     cast(int, document_pair_info.antecedents[i].dataXd.tolist()[0][0])
-                ]._.coref_chains.temp_head_vector
+                ]
                 for i in range(len(document_pair_info.antecedents))
             ]
         )[model.ops.asarray1i(cast(Ints1d, document_pair_info.candidates.dataXd))]
@@ -813,22 +1150,19 @@ def _empty_Ragged(ops: Ops, dtype: str) -> Ragged:
 
 
 def _set_vectors(vectors_nlp: Language, ops: Ops, token: Token) -> None:
-    if hasattr(token._.coref_chains, "temp_vector"):
+    context = get_annotation_context(token.doc)
+    if token.i in context.vectors:
         return
     if (not vectors_nlp.vocab[token.lemma_].has_vector) and len(token.vector) > 0:
-        token._.coref_chains.temp_vector = token.vector
+        context.vectors[token.i] = token.vector
     else:
-        token._.coref_chains.temp_vector = vectors_nlp.vocab[token.lemma_].vector
+        context.vectors[token.i] = vectors_nlp.vocab[token.lemma_].vector
     if token != token.head:
         if (not vectors_nlp.vocab[token.head.lemma_].has_vector) and len(
             token.head.vector
         ) > 0:
-            token._.coref_chains.temp_head_vector = token.head.vector
+            context.head_vectors[token.i] = token.head.vector
         else:
-            token._.coref_chains.temp_head_vector = vectors_nlp.vocab[
-                token.head.lemma_
-            ].vector
+            context.head_vectors[token.i] = vectors_nlp.vocab[token.head.lemma_].vector
     else:
-        token._.coref_chains.temp_head_vector = (
-            ops.alloc1f(len(token._.coref_chains.temp_vector)) + 0.0
-        )
+        context.head_vectors[token.i] = ops.alloc1f(len(context.vectors[token.i])) + 0.0
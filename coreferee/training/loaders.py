@@ -7,7 +7,7 @@ import bisect
 from abc import ABC, abstractmethod
 from spacy.language import Language
 from spacy.tokens import Doc, Span, Token
-from ..data_model import Mention
+from ..data_model import Mention, get_annotation_context
 from ..rules import RulesAnalyzer
 
 
@@ -19,7 +19,7 @@ class GenericLoader(ABC):
         """Loads training data from *directory_name* to produce a list of documents parsed using
         the spacy model *nlp*. Each document goes through *RulesAnalyzer.initialize()*.
         Wherever an anaphor points to a referred mention in the training data, the
-        mention within *token._.coref_chains.temp_potential_referreds* is annotated with
+        mention within the potential referreds of each anaphor is annotated with
         *true_in_training=True*."""
 
 
@@ -80,6 +80,7 @@ class ParCorLoader(GenericLoader):
         parser.parse(coref_level_filename)
         doc = nlp(" ".join(word for word in parcor_handler.words))
         rules_analyzer.initialize(doc)
+        context = get_annotation_context(doc)
         lookup = []
         spacy_token_iterator = enumerate(doc)
         for parcor_token in parcor_handler.words:
@@ -118,8 +119,8 @@ class ParCorLoader(GenericLoader):
                     lookup[parcor_span[0]][0] : lookup[parcor_span[1]][-1] + 1
                 ]
                 include_dependent_siblings = (
-                    len(holmes_span.root._.coref_chains.temp_dependent_siblings) > 0
-                    and holmes_span.root._.coref_chains.temp_dependent_siblings[-1].i
+                    len(context.dependent_siblings[holmes_span.root.i]) > 0
+                    and context.dependent_siblings[holmes_span.root.i][-1].i
                     <= lookup[parcor_span[1]][-1]
                 )
                 working_referent = Mention(holmes_span.root, include_dependent_siblings)
@@ -132,15 +133,10 @@ class ParCorLoader(GenericLoader):
                         ][-1]
                         + 1
                     ]
-                    if hasattr(
-                        previous_holmes_span.root._.coref_chains,
-                        "temp_potential_referreds",
-                    ):
-                        for (
-                            mention
-                        ) in (
-                            previous_holmes_span.root._.coref_chains.temp_potential_referreds
-                        ):
+                    if previous_holmes_span.root.i in context.potential_referreds:
+                        for mention in context.potential_referreds[
+                            previous_holmes_span.root.i
+                        ]:
                             if mention == working_referent:
                                 mention.true_in_training = True
                                 marked = True
@@ -151,14 +147,10 @@ class ParCorLoader(GenericLoader):
                         lookup[next_parcor_span[0]][0] : lookup[next_parcor_span[1]][-1]
                         + 1
                     ]
-                    if hasattr(
-                        next_holmes_span.root._.coref_chains, "temp_potential_referreds"
-                    ):
-                        for (
-                            mention
-                        ) in (
-                            next_holmes_span.root._.coref_chains.temp_potential_referreds
-                        ):
+                    if next_holmes_span.root.i in context.potential_referreds:
+                        for mention in context.potential_referreds[
+                            next_holmes_span.root.i
+                        ]:
                             if mention == working_referent:
                                 mention.true_in_training = True
                                 continue
@@ -202,6 +194,7 @@ class PolishCoreferenceCorpusANNLoader(GenericLoader):
         doc: Doc, ann_file_lines: List[str], rules_analyzer: RulesAnalyzer
     ) -> None:
         rules_analyzer.initialize(doc)
+        context = get_annotation_context(doc)
         token_char_start_indexes = [token.idx for token in doc]
         mention_numbers_to_spans = {}
         mention_numbers_to_set_numbers: Dict[str, int] = {}
@@ -270,32 +263,25 @@ class PolishCoreferenceCorpusANNLoader(GenericLoader):
                     spans.append(span_to_check)
             for index, span in enumerate(spans):
                 include_dependent_siblings = (
-                    len(span.root._.coref_chains.temp_dependent_siblings) > 0
-                    and span.root._.coref_chains.temp_dependent_siblings[-1].i
-                    < span.end
+                    len(context.dependent_siblings[span.root.i]) > 0
+                    and context.dependent_siblings[span.root.i][-1].i < span.end
                 )
                 working_referent = Mention(span.root, include_dependent_siblings)
                 marked = False
                 if index > 0:
                     previous_span = spans[index - 1]
-                    if hasattr(
-                        previous_span.root._.coref_chains, "temp_potential_referreds"
-                    ):
-                        for (
-                            mention
-                        ) in previous_span.root._.coref_chains.temp_potential_referreds:
+                    if previous_span.root.i in context.potential_referreds:
+                        for mention in context.potential_referreds[
+                            previous_span.root.i
+                        ]:
                             if mention == working_referent:
                                 mention.true_in_training = True
                                 marked = True
                                 continue
                 if not marked and index < len(spans) - 1:
                     next_span = spans[index + 1]
-                    if hasattr(
-                        next_span.root._.coref_chains, "temp_potential_referreds"
-                    ):
-                        for (
-                            mention
-                        ) in next_span.root._.coref_chains.temp_potential_referreds:
+                    if next_span.root.i in context.potential_referreds:
+                        for mention in context.potential_referreds[next_span.root.i]:
                             if mention == working_referent:
                                 mention.true_in_training = True
                                 continue
@@ -331,6 +317,7 @@ class LitBankANNLoader(GenericLoader):
         doc: Doc, ann_file_lines: list, rules_analyzer: RulesAnalyzer
     ) -> None:
         rules_analyzer.initialize(doc)
+        context = get_annotation_context(doc)
         token_char_start_indexes = [token.idx for token in doc]
         mention_labels_to_span_sets: Dict[str, Set[Span]] = {}
         for index, ann_file_line in enumerate(ann_file_lines):
@@ -359,32 +346,25 @@ class LitBankANNLoader(GenericLoader):
             spans.sort(key=lambda span: span.start)
             for index, span in enumerate(spans):
                 include_dependent_siblings = (
-                    len(span.root._.coref_chains.temp_dependent_siblings) > 0
-                    and span.root._.coref_chains.temp_dependent_siblings[-1].i
-                    < span.end
+                    len(context.dependent_siblings[span.root.i]) > 0
+                    and context.dependent_siblings[span.root.i][-1].i < span.end
                 )
                 working_referent = Mention(span.root, include_dependent_siblings)
                 marked = False
                 if index > 0:
                     previous_span = spans[index - 1]
-                    if hasattr(
-                        previous_span.root._.coref_chains, "temp_potential_referreds"
-                    ):
-                        for (
-                            mention
-                        ) in previous_span.root._.coref_chains.temp_potential_referreds:
+                    if previous_span.root.i in context.potential_referreds:
+                        for mention in context.potential_referreds[
+                            previous_span.root.i
+                        ]:
                             if mention == working_referent:
                                 mention.true_in_training = True
                                 marked = True
                                 continue
                 if not marked and index < len(spans) - 1:
                     next_span = spans[index + 1]
-                    if hasattr(
-                        next_span.root._.coref_chains, "temp_potential_referreds"
-                    ):
-                        for (
-                            mention
-                        ) in next_span.root._.coref_chains.temp_potential_referreds:
+                    if next_span.root.i in context.potential_referreds:
+                        for mention in context.potential_referreds[next_span.root.i]:
                             if mention == working_referent:
                                 mention.true_in_training = True
                                 continue
@@ -467,6 +447,7 @@ class ConllLoader(GenericLoader):
             conll_tokens = [l[3].lstrip("/") for l in this_part_split_conll_lines]
             doc = nlp(" ".join(conll_tokens))
             rules_analyzer.initialize(doc)
+            context = get_annotation_context(doc)
             conll_to_spacy_lookup = (
                 []
             )  # indexes correspond to conll token indexes, entries are lists of spaCy tokens
@@ -525,45 +506,37 @@ class ConllLoader(GenericLoader):
                 chain.sort(key=lambda span: span[0])  # type: ignore[arg-type, return-value]
                 for span_index, span in enumerate(chain):
                     include_dependent_siblings = (
-                        len(span.root._.coref_chains.temp_dependent_siblings) > 0
-                        and span.root._.coref_chains.temp_dependent_siblings[-1] in span
+                        len(context.dependent_siblings[span.root.i]) > 0
+                        and context.dependent_siblings[span.root.i][-1] in span
                     )
                     working_referent = Mention(span.root, include_dependent_siblings)
                     if span_index > 0:
                         previous_span = chain[span_index - 1]
                         if (
-                            hasattr(
-                                previous_span.root._.coref_chains,
-                                "temp_potential_referreds",
-                            )
+                            previous_span.root.i in context.potential_referreds
                             and Mention.number_of_training_mentions_marked_true(
                                 previous_span.root
                             )
                             == 0
                         ):
-                            for (
-                                mention
-                            ) in (
-                                previous_span.root._.coref_chains.temp_potential_referreds
-                            ):
+                            for mention in context.potential_referreds[
+                                previous_span.root.i
+                            ]:
                                 if mention == working_referent:
                                     mention.true_in_training = True
                                     continue
                     if span_index < len(chain) - 1:
                         next_span = chain[span_index + 1]
                         if (
-                            hasattr(
-                                next_span.root._.coref_chains,
-                                "temp_potential_referreds",
-                            )
+                            next_span.root.i in context.potential_referreds
                             and Mention.number_of_training_mentions_marked_true(
                                 next_span.root
                             )
                             == 0
                         ):
-                            for (
-                                mention
-                            ) in next_span.root._.coref_chains.temp_potential_referreds:
+                            for mention in context.potential_referreds[
+                                next_span.root.i
+                            ]:
                                 if mention == working_referent:
                                     mention.true_in_training = True
                                     continue
@@ -589,6 +562,7 @@ class RuCorefLoader(GenericLoader):
     @staticmethod
     def load_file(doc: Doc, ann_file_lines: list, rules_analyzer: RulesAnalyzer) -> None:
         rules_analyzer.initialize(doc)
+        context = get_annotation_context(doc)
         token_char_start_indexes = [token.idx for token in doc]
         mention_numbers_to_spans = {}
         mention_numbers = {}
@@ -619,22 +593,25 @@ class RuCorefLoader(GenericLoader):
                     spans.append(span_to_check)
             for index, span in enumerate(spans):
                 include_dependent_siblings = (
-                        len(span.root._.coref_chains.temp_dependent_siblings) > 0
-                        and span.root._.coref_chains.temp_dependent_siblings[-1].i < span.end)
+                    len(context.dependent_siblings[span.root.i]) > 0
+                    and context.dependent_siblings[span.root.i][-1].i < span.end
+                )
                 working_referent = Mention(span.root, include_dependent_siblings)
                 marked = False
                 if index > 0:
                     previous_span = spans[index - 1]
-                    if hasattr(previous_span.root._.coref_chains, "temp_potential_referreds"):
-                        for mention in previous_span.root._.coref_chains.temp_potential_referreds:
+                    if previous_span.root.i in context.potential_referreds:
+                        for mention in context.potential_referreds[
+                            previous_span.root.i
+                        ]:
                             if mention == working_referent:
                                 mention.true_in_training = True
                                 marked = True
                                 continue
                 if not marked and index < len(spans) - 1:
                     next_span = spans[index + 1]
-                    if hasattr(next_span.root._.coref_chains, "temp_potential_referreds"):
-                        for mention in next_span.root._.coref_chains.temp_potential_referreds:
+                    if next_span.root.i in context.potential_referreds:
+                        for mention in context.potential_referreds[next_span.root.i]:
                             if mention == working_referent:
                                 mention.true_in_training = True
                                 continue
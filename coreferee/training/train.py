@@ -1,6 +1,7 @@
-from typing import Dict, List, Tuple, cast, Callable
+from typing import Dict, List, Tuple, Optional, TextIO, cast, Callable
 import os
 import bisect
+import math
 import shutil
 import sys
 import time
@@ -20,13 +21,22 @@ from thinc.optimizers import Adam
 from thinc.types import Floats2d
 from .loaders import GenericLoader
 from ..annotation import Annotator
-from ..data_model import FeatureTable, Mention
+from ..data_model import FeatureTable, Mention, get_annotation_context
+from ..inference import FactorisedEnsemble
 from ..manager import COMMON_MODELS_PACKAGE_NAMEPART, get_annotator
 from ..manager import FEATURE_TABLE_FILENAME, THINC_MODEL_FILENAME
+from ..manager import QUANTISED_THINC_MODEL_FILENAMES, DISTILLED_THINC_MODEL_FILENAME
+from ..quantisation import quantise_thinc_model, dequantise_thinc_model
 from ..rules import RulesAnalyzerFactory
 from ..tendencies import TendenciesAnalyzer, generate_feature_table, create_thinc_model
+from ..tendencies import create_distilled_thinc_model, DISTILLED_ENSEMBLE_SIZE
 from ..tendencies import DocumentPairInfo, ENSEMBLE_SIZE
 from ..errors import LanguageNotSupportedError, ModelNotSupportedError
+from ..errors import DistilledModelNotInstalledError
+
+# The recall of training antecedents that the *max_candidates* value recommended by
+# *benchmark* must reach
+SAFE_CANDIDATE_RECALL = 0.99
 
 
 class TrainingManager:
@@ -187,6 +197,22 @@ class TrainingManager:
         with open(init_py_filename, "w") as init_py_file:
             self.writeln(init_py_file)
 
+    def add_package_data(self, filename: str):
+        """Adds *filename* to the files that are packaged with the models for the
+        language, which initially comprise only the feature tables and the full
+        models. Called when a quantised or distilled model file has been written."""
+        setup_cfg_filename = os.sep.join((self.models_dirname, "setup.cfg"))
+        with open(setup_cfg_filename, "r") as setup_cfg_file:
+            lines = setup_cfg_file.read().splitlines()
+        for index, line in enumerate(lines):
+            if line.startswith("* = "):
+                filenames = line[4:].split(", ")
+                if filename not in filenames:
+                    lines[index] = ", ".join((line, filename))
+        with open(setup_cfg_filename, "w") as setup_cfg_file:
+            for line in lines:
+                self.writeln(setup_cfg_file, line)
+
     @staticmethod
     def writeln(file, *args):
         file.write("".join(("".join([str(arg) for arg in args]), "\n")))
@@ -195,23 +221,20 @@ class TrainingManager:
         self, temp_log_file, token, correct_referred_token, incorrect_referred_token
     ):
         doc = token.doc
+        context = get_annotation_context(doc)
         self.writeln(temp_log_file, "Incorrect annotation:")
         start_token_index = min(correct_referred_token.i, incorrect_referred_token.i)
-        sentence_start_index = doc._.coref_chains.temp_sent_starts[
-            doc[start_token_index]._.coref_chains.temp_sent_index
+        sentence_start_index = context.sent_starts[
+            context.sent_indexes[start_token_index]
         ]
-        if token._.coref_chains.temp_sent_index + 1 == len(
-            doc._.coref_chains.temp_sent_starts
-        ):
+        if context.sent_indexes[token.i] + 1 == len(context.sent_starts):
             self.writeln(temp_log_file, doc[sentence_start_index:])
             self.writeln(
                 temp_log_file, "Tokens from ", sentence_start_index, " to the end:"
             )
             self.writeln(temp_log_file, doc[sentence_start_index:])
         else:
-            sentence_end_index = doc._.coref_chains.temp_sent_starts[
-                token._.coref_chains.temp_sent_index + 1
-            ]
+            sentence_end_index = context.sent_starts[context.sent_indexes[token.i] + 1]
             self.writeln(
                 temp_log_file,
                 "Tokens ",
@@ -222,7 +245,7 @@ class TrainingManager:
             )
             self.writeln(temp_log_file, doc[sentence_start_index:sentence_end_index])
         self.writeln(temp_log_file, "Referring pronoun: ", token, " at index ", token.i)
-        for potential_referred in token._.coref_chains.temp_potential_referreds:
+        for potential_referred in context.potential_referreds[token.i]:
             if hasattr(potential_referred, "true_in_training"):
                 self.writeln(
                     temp_log_file,
@@ -243,10 +266,14 @@ class TrainingManager:
         nlp: Language,
         vectors_nlp: Language,
         feature_table: FeatureTable,
+        *,
+        create_model: Callable[[], Model] = create_thinc_model
     ) -> Model:
+        """Trains a model generated by *create_model()* on the *training_outputs* of
+        *document_pair_infos* until its accuracy on *test_docs* stops improving."""
         print()
         print("Generating model ...")
-        model = create_thinc_model()
+        model = create_model()
         print()
         optimizer = Adam(0.001)
         epoch = 1
@@ -276,31 +303,14 @@ class TrainingManager:
             )
             print()
             annotator = Annotator(nlp, vectors_nlp, feature_table, model)
-            correct_counter = incorrect_counter = 0
-            for test_doc in tqdm(test_docs):
-                for token in test_doc:
-                    token._.coref_chains.chains = []
-                annotator.annotate(test_doc, used_in_training=True)
-                for token in test_doc:
-                    if hasattr(token._.coref_chains, "temp_potential_referreds"):
-                        for (
-                            potential_referred
-                        ) in token._.coref_chains.temp_potential_referreds:
-                            if hasattr(potential_referred, "true_in_training"):
-                                for chain in token._.coref_chains:
-                                    if Mention(token, False) not in chain:
-                                        continue
-                                    if potential_referred in chain:
-                                        correct_counter += 1
-                                    else:
-                                        incorrect_counter += 1
+            correct_counter, incorrect_counter = self.evaluate(annotator, test_docs)
             accuracy = round(
                 100 * correct_counter / (correct_counter + incorrect_counter), 2
             )
             print("Accuracy: ", "".join((str(accuracy), "%")))
             if accuracy < last_epoch_accuracy:
                 print("Saving model from epoch", epoch - 1)
-                model = create_thinc_model()
+                model = create_model()
                 model.from_bytes(last_epoch_model)
                 return model
             else:
@@ -308,26 +318,61 @@ class TrainingManager:
                 last_epoch_model = model.to_bytes()
                 epoch += 1
 
+    def evaluate(
+        self,
+        annotator: Annotator,
+        test_docs: List[Doc],
+        temp_log_file=None,
+        *,
+        ensemble_size: Optional[int] = None
+    ) -> Tuple[int, int]:
+        """Annotates *test_docs* and returns the number of correct and the number of
+        incorrect annotations with respect to the training data. If *temp_log_file* is
+        specified, the chains and incorrect annotations for each document are logged.
+        """
+        correct_counter = incorrect_counter = 0
+        for test_doc in tqdm(test_docs):
+            annotator.annotate(
+                test_doc, used_in_training=True, ensemble_size=ensemble_size
+            )
+            if temp_log_file is not None:
+                self.writeln(temp_log_file, "test_doc ", test_doc[:100], "... :")
+                self.writeln(temp_log_file)
+                self.writeln(temp_log_file, "Coref chains:")
+                self.writeln(temp_log_file)
+                for chain in test_doc._.coref_chains:
+                    self.writeln(temp_log_file, chain.pretty_representation)
+                self.writeln(temp_log_file)
+                self.writeln(temp_log_file, "Incorrect annotations:")
+                self.writeln(temp_log_file)
+            context = get_annotation_context(test_doc)
+            for token in test_doc:
+                if token.i in context.potential_referreds:
+                    for potential_referred in context.potential_referreds[token.i]:
+                        if hasattr(potential_referred, "true_in_training"):
+                            for chain in token._.coref_chains:
+                                if Mention(token, False) not in chain:
+                                    continue
+                                if potential_referred in chain:
+                                    correct_counter += 1
+                                else:
+                                    incorrect_counter += 1
+                                    if temp_log_file is not None:
+                                        self.log_incorrect_annotation(
+                                            temp_log_file,
+                                            token,
+                                            token.doc[potential_referred.root_index],
+                                            token.doc[chain.mentions[0].root_index],
+                                        )
+        return correct_counter, incorrect_counter
+
     def load_documents(self, nlp, rules_analyzer):
         docs = []
         for loader in self.loaders:
             docs.extend(loader.load(self.data_dir, nlp, rules_analyzer))
         return docs
 
-    def train_or_check(self, config_entry_name: str, config_entry, temp_log_file):
-        self.writeln(temp_log_file, "Config entry name: ", config_entry_name)
-        nlp_name = "_".join((self.lang, config_entry["model"]))
-        nlp = self.nlp_dict[nlp_name]
-        self.writeln(
-            temp_log_file, "Spacy model: ", nlp_name, " version ", nlp.meta["version"]
-        )
-        if (
-            self.train_not_check
-            and config_entry["train_version"] != nlp.meta["version"]
-        ):
-            raise ModelNotSupportedError(
-                "Declared train_version does not match loaded spaCy version"
-            )
+    def get_vectors_nlp(self, nlp: Language, config_entry, temp_log_file) -> Language:
         if "vectors_model" in config_entry:
             vectors_nlp_name = "_".join((self.lang, config_entry["vectors_model"]))
             vectors_nlp = self.nlp_dict[vectors_nlp_name]
@@ -341,8 +386,12 @@ class TrainingManager:
         else:
             vectors_nlp = nlp
             self.writeln(temp_log_file, "Main model is being used as vectors model")
+        return vectors_nlp
 
-        rules_analyzer = RulesAnalyzerFactory().get_rules_analyzer(nlp)
+    def load_and_split_documents(
+        self, nlp: Language, rules_analyzer, temp_log_file
+    ) -> Tuple[List[Doc], List[Doc], List[Doc]]:
+        """Returns all documents, the training documents and the test documents."""
         docs = self.load_documents(nlp, rules_analyzer)
         rand = Random(0.47)
         for _ in range(100):
@@ -371,6 +420,28 @@ class TrainingManager:
             len(test_docs),
         )
 
+        return docs, training_docs, test_docs
+
+    def train_or_check(self, config_entry_name: str, config_entry, temp_log_file):
+        self.writeln(temp_log_file, "Config entry name: ", config_entry_name)
+        nlp_name = "_".join((self.lang, config_entry["model"]))
+        nlp = self.nlp_dict[nlp_name]
+        self.writeln(
+            temp_log_file, "Spacy model: ", nlp_name, " version ", nlp.meta["version"]
+        )
+        if (
+            self.train_not_check
+            and config_entry["train_version"] != nlp.meta["version"]
+        ):
+            raise ModelNotSupportedError(
+                "Declared train_version does not match loaded spaCy version"
+            )
+        vectors_nlp = self.get_vectors_nlp(nlp, config_entry, temp_log_file)
+        rules_analyzer = RulesAnalyzerFactory().get_rules_analyzer(nlp)
+        docs, training_docs, test_docs = self.load_and_split_documents(
+            nlp, rules_analyzer, temp_log_file
+        )
+
         if self.train_not_check:
             feature_table = generate_feature_table(docs, nlp)
             self.writeln(temp_log_file, "Feature table: ", feature_table.__dict__)
@@ -402,40 +473,10 @@ class TrainingManager:
                 nlp=nlp, vectors_nlp=vectors_nlp, config_entry_name=config_entry_name
             )
         self.writeln(temp_log_file)
-        correct_counter = incorrect_counter = 0
         print("Analysing test documents...")
-        for test_doc in tqdm(test_docs):
-            for token in test_doc:
-                token._.coref_chains.chains = []
-            annotator.annotate(test_doc, used_in_training=True)
-            self.writeln(temp_log_file, "test_doc ", test_doc[:100], "... :")
-            self.writeln(temp_log_file)
-            self.writeln(temp_log_file, "Coref chains:")
-            self.writeln(temp_log_file)
-            for chain in test_doc._.coref_chains:
-                self.writeln(temp_log_file, chain.pretty_representation)
-            self.writeln(temp_log_file)
-            self.writeln(temp_log_file, "Incorrect annotations:")
-            self.writeln(temp_log_file)
-            for token in test_doc:
-                if hasattr(token._.coref_chains, "temp_potential_referreds"):
-                    for (
-                        potential_referred
-                    ) in token._.coref_chains.temp_potential_referreds:
-                        if hasattr(potential_referred, "true_in_training"):
-                            for chain in token._.coref_chains:
-                                if Mention(token, False) not in chain:
-                                    continue
-                                if potential_referred in chain:
-                                    correct_counter += 1
-                                else:
-                                    incorrect_counter += 1
-                                    self.log_incorrect_annotation(
-                                        temp_log_file,
-                                        token,
-                                        token.doc[potential_referred.root_index],
-                                        token.doc[chain.mentions[0].root_index],
-                                    )
+        correct_counter, incorrect_counter = self.evaluate(
+            annotator, test_docs, temp_log_file
+        )
         if len(test_docs) > 0:
             accuracy = round(
                 100 * correct_counter / (correct_counter + incorrect_counter), 2
@@ -464,6 +505,10 @@ class TrainingManager:
                     )
                 )
             )
+        if not self.train_not_check:
+            self.check_distilled_model(
+                nlp, vectors_nlp, annotator, config_entry_name, test_docs, temp_log_file
+            )
         if self.train_not_check:
             this_model_dir = os.sep.join(
                 (
@@ -486,23 +531,29 @@ class TrainingManager:
             )
             model.to_disk(thinc_model_filename)
 
-    def train_models(self):
-        assert self.train_not_check
+    def process_config_entries(
+        self, description: str, func: Callable[[str, Dict, TextIO], None]
+    ):
+        """Calls *func* for each relevant config entry with a temporary log file."""
         for config_entry_name in self.relevant_config_entry_names:
             config_entry = self.config[config_entry_name]
-            print("Processing", config_entry_name, "...")
+            print(description, config_entry_name, "...")
             temp_log_filename = "".join(
                 (self.log_dir, os.sep, "temp", os.sep, config_entry_name, ".log")
             )
             with open(temp_log_filename, "w", encoding="utf-8") as temp_log_file:
-                self.train_or_check(config_entry_name, config_entry, temp_log_file)
+                func(config_entry_name, config_entry, temp_log_file)
+
+    def archive_log_files(self, name: str):
+        """Zips the temporary log files into *log_dir* and removes them."""
         timestamp = datetime.now().isoformat(timespec="microseconds")
         sanitized_timestamp = "".join([ch for ch in timestamp if ch.isalnum()])
         zip_filename = "".join(
             (
                 self.log_dir,
                 os.sep,
-                "train_log_",
+                name,
+                "_",
                 self.lang,
                 "_",
                 sanitized_timestamp,
@@ -513,6 +564,11 @@ class TrainingManager:
         temp_dir = os.sep.join((self.log_dir, "temp"))
         if os.path.isdir(temp_dir):
             shutil.rmtree(temp_dir)
+
+    def train_models(self):
+        assert self.train_not_check
+        self.process_config_entries("Processing", self.train_or_check)
+        self.archive_log_files("train_log")
         zip_filename = "".join(
             (
                 self.models_dirname,
@@ -530,30 +586,524 @@ class TrainingManager:
             shutil.rmtree(build_dir)
         shutil.make_archive(zip_filename, "zip", self.models_dirname)
 
-    def check_models(self):
-        assert not self.train_not_check
-        for config_entry_name in self.relevant_config_entry_names:
-            config_entry = self.config[config_entry_name]
-            print("Checking", config_entry_name, "...")
-            temp_log_filename = "".join(
-                (self.log_dir, os.sep, "temp", os.sep, config_entry_name, ".log")
+    def get_this_model_dir(self, config_entry_name: str) -> str:
+        return os.sep.join(
+            (
+                self.models_dirname,
+                "".join((COMMON_MODELS_PACKAGE_NAMEPART, self.lang)),
+                config_entry_name,
             )
-            with open(temp_log_filename, "w", encoding="utf-8") as temp_log_file:
-                self.train_or_check(config_entry_name, config_entry, temp_log_file)
-        timestamp = datetime.now().isoformat(timespec="microseconds")
-        sanitized_timestamp = "".join([ch for ch in timestamp if ch.isalnum()])
-        zip_filename = "".join(
+        )
+
+    def get_installed_annotator_and_docs(
+        self, config_entry_name: str, config_entry, temp_log_file
+    ) -> Tuple[Language, Language, Annotator, List[Doc], List[Doc]]:
+        """Returns the spaCy model, the vectors model, the annotator for the installed
+        Coreferee model, the training documents and the test documents for
+        *config_entry_name*."""
+        self.writeln(temp_log_file, "Config entry name: ", config_entry_name)
+        nlp_name = "_".join((self.lang, config_entry["model"]))
+        nlp = self.nlp_dict[nlp_name]
+        self.writeln(
+            temp_log_file, "Spacy model: ", nlp_name, " version ", nlp.meta["version"]
+        )
+        vectors_nlp = self.get_vectors_nlp(nlp, config_entry, temp_log_file)
+        rules_analyzer = RulesAnalyzerFactory().get_rules_analyzer(nlp)
+        _, training_docs, test_docs = self.load_and_split_documents(
+            nlp, rules_analyzer, temp_log_file
+        )
+        annotator = get_annotator(
+            nlp=nlp, vectors_nlp=vectors_nlp, config_entry_name=config_entry_name
+        )
+        self.writeln(temp_log_file)
+        return nlp, vectors_nlp, annotator, training_docs, test_docs
+
+    def report_performance(
+        self,
+        label: str,
+        annotator: Annotator,
+        test_docs: List[Doc],
+        temp_log_file,
+        *,
+        ensemble_size: Optional[int] = None,
+        report_speed: bool = True
+    ) -> str:
+        """Logs and returns the accuracy and, if *report_speed* is *True*, the mean
+        time taken to annotate a test document and, unless *annotator* is in rules-only
+        mode, the throughput of the neural ensemble in pairs per second, both as
+        configured and with sparse feature maps."""
+        print("Analysing test documents with", label, "...")
+        start_time = time.perf_counter()
+        correct_counter, incorrect_counter = self.evaluate(
+            annotator, test_docs, ensemble_size=ensemble_size
+        )
+        annotation_seconds = time.perf_counter() - start_time
+        accuracy = (
+            round(100 * correct_counter / (correct_counter + incorrect_counter), 2)
+            if correct_counter + incorrect_counter > 0
+            else 0.0
+        )
+        report = "".join(
             (
-                self.log_dir,
-                os.sep,
-                "check_log_",
-                self.lang,
-                "_",
-                sanitized_timestamp,
-                ".zip",
+                label,
+                ": Correct: ",
+                str(correct_counter),
+                "; Incorrect: ",
+                str(incorrect_counter),
+                " (",
+                str(accuracy),
+                "%)",
             )
         )
-        shutil.make_archive(zip_filename, "zip", os.sep.join((self.log_dir, "temp")))
-        temp_dir = os.sep.join((self.log_dir, "temp"))
-        if os.path.isdir(temp_dir):
-            shutil.rmtree(temp_dir)
+        if report_speed:
+            report = "".join(
+                (
+                    report,
+                    "; ",
+                    str(
+                        round(1000 * annotation_seconds / len(test_docs), 1)
+                        if len(test_docs) > 0
+                        else 0
+                    ),
+                    " ms per document",
+                )
+            )
+        if report_speed and annotator.tendencies_analyzer is not None:
+            document_pair_infos = []
+            for test_doc in test_docs:
+                (
+                    referrers_to_candidates,
+                    _,
+                ) = annotator.tendencies_analyzer.get_candidates_to_score(
+                    test_doc, annotator.max_candidates
+                )
+                document_pair_infos.append(
+                    DocumentPairInfo.from_doc(
+                        test_doc,
+                        annotator.tendencies_analyzer,
+                        ENSEMBLE_SIZE,
+                        referrers_to_candidates={
+                            referring_index: candidates
+                            for referring_index, candidates in (
+                                referrers_to_candidates.items()
+                            )
+                            if len(candidates) > 1
+                        },
+                    )
+                )
+            pairs = sum(len(dpi.candidates.dataXd) for dpi in document_pair_infos)
+            scoring_seconds = self.time_scoring(
+                annotator.factorised_ensemble, document_pair_infos, ensemble_size
+            )
+            # The same pairs scored with the sparse projection of the feature maps
+            sparse_scoring_seconds = self.time_scoring(
+                FactorisedEnsemble(
+                    annotator.thinc_ensemble,
+                    feature_map_width=len(annotator.tendencies_analyzer.feature_table),
+                ),
+                document_pair_infos,
+                ensemble_size,
+            )
+            report = "".join(
+                (
+                    report,
+                    "; scored ",
+                    str(pairs),
+                    " pairs in ",
+                    str(round(scoring_seconds, 3)),
+                    " seconds (",
+                    str(round(pairs / scoring_seconds) if scoring_seconds > 0 else 0),
+                    " pairs per second; ",
+                    str(
+                        round(pairs / sparse_scoring_seconds)
+                        if sparse_scoring_seconds > 0
+                        else 0
+                    ),
+                    " pairs per second with sparse feature maps)",
+                )
+            )
+        self.writeln(temp_log_file, report)
+        print(report)
+        return report
+
+    @staticmethod
+    def time_scoring(
+        factorised_ensemble: FactorisedEnsemble,
+        document_pair_infos: List[DocumentPairInfo],
+        ensemble_size: Optional[int],
+    ) -> float:
+        """Returns the number of seconds *factorised_ensemble* takes to score
+        *document_pair_infos* one document at a time."""
+        start_time = time.perf_counter()
+        for document_pair_info in document_pair_infos:
+            factorised_ensemble.predict(
+                [document_pair_info], ensemble_size=ensemble_size
+            )
+        return time.perf_counter() - start_time
+
+    def quantise(self, config_entry_name: str, config_entry, dtype: str, temp_log_file):
+        """Writes a quantised copy of the installed model for *config_entry_name* to the
+        models directory and logs the accuracy and the size of the float32 and of the
+        quantised model on the test documents. Speed is not reported because quantised
+        weights are expanded to float32 when they are loaded, so that both models are
+        scored in the same way."""
+        (
+            nlp,
+            vectors_nlp,
+            annotator,
+            _,
+            test_docs,
+        ) = self.get_installed_annotator_and_docs(
+            config_entry_name, config_entry, temp_log_file
+        )
+        quantised_thinc_model_bytes = quantise_thinc_model(
+            annotator.thinc_ensemble, dtype
+        )
+        this_model_dir = self.get_this_model_dir(config_entry_name)
+        if os.path.isdir(this_model_dir):
+            quantised_thinc_model_filename = os.sep.join(
+                (this_model_dir, QUANTISED_THINC_MODEL_FILENAMES[dtype])
+            )
+            with open(
+                quantised_thinc_model_filename, "wb"
+            ) as quantised_thinc_model_file:
+                quantised_thinc_model_file.write(quantised_thinc_model_bytes)
+            self.add_package_data(QUANTISED_THINC_MODEL_FILENAMES[dtype])
+        else:
+            print(
+                "Not saving quantised model for config entry",
+                config_entry_name,
+                "as the models directory contains no model for it.",
+            )
+        quantised_annotator = Annotator(
+            nlp,
+            vectors_nlp,
+            annotator.tendencies_analyzer.feature_table,
+            dequantise_thinc_model(quantised_thinc_model_bytes),
+        )
+        for label, this_annotator, model_size in (
+            ("float32 model", annotator, len(annotator.thinc_ensemble.to_bytes())),
+            (
+                " ".join((dtype, "model")),
+                quantised_annotator,
+                len(quantised_thinc_model_bytes),
+            ),
+        ):
+            self.report_performance(
+                label, this_annotator, test_docs, temp_log_file, report_speed=False
+            )
+            self.writeln(temp_log_file, "Model size: ", model_size, " bytes")
+            print("Model size:", model_size, "bytes")
+
+    def report_candidate_recall(
+        self,
+        annotator: Annotator,
+        test_docs: List[Doc],
+        max_candidates_values: List[int],
+        temp_log_file,
+    ):
+        """Logs, for each of *max_candidates_values*, the proportion of anaphors for
+        which the candidates kept by the heuristic ordering include the potential referred
+        marked as correct in the training data, and the proportion for which they
+        include the potential referred that the whole ensemble ranks first. Also logs
+        the smallest *max_candidates* value at which the recall of training antecedents
+        reaches *SAFE_CANDIDATE_RECALL*. *annotator* must not itself prune
+        candidates."""
+        assert annotator.max_candidates is None
+        self.evaluate(annotator, test_docs)
+        anaphors_with_true_candidates = anaphors = 0
+        true_candidate_kept_counters = {
+            max_candidates: 0 for max_candidates in max_candidates_values
+        }
+        first_candidate_kept_counters = {
+            max_candidates: 0 for max_candidates in max_candidates_values
+        }
+        # The number of heuristically ordered potential referreds up to and including the first one
+        # marked as correct, for each anaphor that has one
+        true_candidate_ranks = []
+        for test_doc in test_docs:
+            context = get_annotation_context(test_doc)
+            for referring in (
+                t for t in test_doc if len(context.potential_referreds.get(t.i, [])) > 0
+            ):
+                potential_referreds = context.potential_referreds[referring.i]
+                ordered_potential_referreds = sorted(
+                    potential_referreds,
+                    key=lambda potential_referred: (
+                        annotator.tendencies_analyzer.get_heuristic_order_key(
+                            potential_referred, referring
+                        )
+                    ),
+                )
+                anaphors += 1
+                has_true_candidate = any(
+                    hasattr(potential_referred, "true_in_training")
+                    for potential_referred in potential_referreds
+                )
+                if has_true_candidate:
+                    anaphors_with_true_candidates += 1
+                    true_candidate_ranks.append(
+                        1
+                        + [
+                            hasattr(potential_referred, "true_in_training")
+                            for potential_referred in ordered_potential_referreds
+                        ].index(True)
+                    )
+                for max_candidates in max_candidates_values:
+                    kept_potential_referreds = ordered_potential_referreds[
+                        :max_candidates
+                    ]
+                    if has_true_candidate and any(
+                        hasattr(potential_referred, "true_in_training")
+                        for potential_referred in kept_potential_referreds
+                    ):
+                        true_candidate_kept_counters[max_candidates] += 1
+                    if potential_referreds[0] in kept_potential_referreds:
+                        first_candidate_kept_counters[max_candidates] += 1
+        for max_candidates in max_candidates_values:
+            report = "".join(
+                (
+                    "max_candidates ",
+                    str(max_candidates),
+                    ": recall of training antecedents ",
+                    str(
+                        round(
+                            100
+                            * true_candidate_kept_counters[max_candidates]
+                            / anaphors_with_true_candidates,
+                            2,
+                        )
+                        if anaphors_with_true_candidates > 0
+                        else 0.0
+                    ),
+                    "% of ",
+                    str(anaphors_with_true_candidates),
+                    " anaphors; recall of the ensemble's first choices ",
+                    str(
+                        round(
+                            100
+                            * first_candidate_kept_counters[max_candidates]
+                            / anaphors,
+                            2,
+                        )
+                        if anaphors > 0
+                        else 0.0
+                    ),
+                    "% of ",
+                    str(anaphors),
+                    " anaphors",
+                )
+            )
+            self.writeln(temp_log_file, report)
+            print(report)
+        if len(true_candidate_ranks) > 0:
+            true_candidate_ranks.sort()
+            # The number of anaphors whose training antecedents must be kept
+            required_anaphors = math.ceil(
+                round(SAFE_CANDIDATE_RECALL * len(true_candidate_ranks), 6)
+            )
+            safe_max_candidates = true_candidate_ranks[required_anaphors - 1]
+            report = "".join(
+                (
+                    "Smallest max_candidates with a recall of training antecedents of ",
+                    str(round(100 * SAFE_CANDIDATE_RECALL, 2)),
+                    "% or more: ",
+                    str(safe_max_candidates),
+                )
+            )
+            self.writeln(temp_log_file, report)
+            print(report)
+
+    def benchmark(
+        self,
+        config_entry_name: str,
+        config_entry,
+        ensemble_sizes: List[int],
+        max_candidates_values: List[int],
+        temp_log_file,
+    ):
+        """Logs the accuracy and speed of the installed model for *config_entry_name* on
+        the test documents when evaluating each of *ensemble_sizes* ensemble members and
+        when pruning the candidates of each anaphor to each of *max_candidates_values*,
+        together with the recall of the pruning, and compares them with rules-only
+        mode."""
+        (
+            nlp,
+            vectors_nlp,
+            annotator,
+            _,
+            test_docs,
+        ) = self.get_installed_annotator_and_docs(
+            config_entry_name, config_entry, temp_log_file
+        )
+        for ensemble_size in ensemble_sizes:
+            self.report_performance(
+                "".join(("ensemble size ", str(ensemble_size))),
+                annotator,
+                test_docs,
+                temp_log_file,
+                ensemble_size=ensemble_size,
+            )
+        self.report_candidate_recall(
+            annotator, test_docs, max_candidates_values, temp_log_file
+        )
+        for max_candidates in max_candidates_values:
+            self.report_performance(
+                "".join(("max_candidates ", str(max_candidates))),
+                Annotator(
+                    nlp,
+                    vectors_nlp,
+                    annotator.tendencies_analyzer.feature_table,
+                    annotator.thinc_ensemble,
+                    max_candidates=max_candidates,
+                ),
+                test_docs,
+                temp_log_file,
+            )
+        self.report_performance(
+            "rules only", Annotator(nlp, None, None, None), test_docs, temp_log_file
+        )
+
+    def distill(self, config_entry_name: str, config_entry, temp_log_file):
+        """Trains a single-member student model on the soft scores that the installed
+        ensemble for *config_entry_name* assigns to the pairs in the training documents,
+        writes it to the models directory and logs the accuracy and speed of the
+        ensemble and of the student model on the test documents."""
+        (
+            nlp,
+            vectors_nlp,
+            annotator,
+            training_docs,
+            test_docs,
+        ) = self.get_installed_annotator_and_docs(
+            config_entry_name, config_entry, temp_log_file
+        )
+        prefer_gpu()
+        print("Scoring training documents with the ensemble ...")
+        document_pair_infos = []
+        for training_doc in tqdm(training_docs):
+            dpi = DocumentPairInfo.from_doc(
+                training_doc,
+                annotator.tendencies_analyzer,
+                DISTILLED_ENSEMBLE_SIZE,
+                is_train=True,
+            )
+            if len(dpi.candidates.dataXd) > 0:
+                # The student learns the mean of the members' probabilities, which
+                # like each member's probabilities sums to 1 over each referrer's
+                # candidates
+                dpi.training_outputs = [
+                    ensemble_scores.mean(axis=1, keepdims=True)
+                    for ensemble_scores in annotator.factorised_ensemble.predict([dpi])
+                ]
+                document_pair_infos.append(dpi)
+        feature_table = annotator.tendencies_analyzer.feature_table
+        model = self.train_thinc_model(
+            document_pair_infos,
+            test_docs,
+            nlp,
+            vectors_nlp,
+            feature_table,
+            create_model=create_distilled_thinc_model,
+        )
+        this_model_dir = self.get_this_model_dir(config_entry_name)
+        if os.path.isdir(this_model_dir):
+            model.to_disk(os.sep.join((this_model_dir, DISTILLED_THINC_MODEL_FILENAME)))
+            self.add_package_data(DISTILLED_THINC_MODEL_FILENAME)
+        else:
+            print(
+                "Not saving distilled model for config entry",
+                config_entry_name,
+                "as the models directory contains no model for it.",
+            )
+        self.compare_with_distilled_model(
+            annotator,
+            Annotator(nlp, vectors_nlp, feature_table, model),
+            test_docs,
+            temp_log_file,
+        )
+
+    def check_distilled_model(
+        self,
+        nlp: Language,
+        vectors_nlp: Language,
+        annotator: Annotator,
+        config_entry_name: str,
+        test_docs: List[Doc],
+        temp_log_file,
+    ):
+        """Compares the installed distilled model for *config_entry_name*, if there is
+        one, with the ensemble."""
+        if not os.path.isfile(
+            os.sep.join(
+                (
+                    self.get_this_model_dir(config_entry_name),
+                    DISTILLED_THINC_MODEL_FILENAME,
+                )
+            )
+        ):
+            return
+        try:
+            distilled_annotator = get_annotator(
+                nlp=nlp,
+                vectors_nlp=vectors_nlp,
+                config_entry_name=config_entry_name,
+                distilled=True,
+            )
+        except DistilledModelNotInstalledError:
+            return
+        self.compare_with_distilled_model(
+            annotator, distilled_annotator, test_docs, temp_log_file
+        )
+
+    def compare_with_distilled_model(
+        self,
+        annotator: Annotator,
+        distilled_annotator: Annotator,
+        test_docs: List[Doc],
+        temp_log_file,
+    ):
+        for label, this_annotator in (
+            ("ensemble", annotator),
+            ("distilled model", distilled_annotator),
+        ):
+            self.report_performance(label, this_annotator, test_docs, temp_log_file)
+            model_size = len(this_annotator.thinc_ensemble.to_bytes())
+            self.writeln(temp_log_file, "Model size: ", model_size, " bytes")
+            print("Model size:", model_size, "bytes")
+
+    def quantise_models(self, dtype: str):
+        assert not self.train_not_check
+        self.process_config_entries(
+            "Quantising",
+            lambda config_entry_name, config_entry, temp_log_file: self.quantise(
+                config_entry_name, config_entry, dtype, temp_log_file
+            ),
+        )
+        self.archive_log_files("_".join(("quantise_log", dtype)))
+
+    def benchmark_models(
+        self, ensemble_sizes: List[int], max_candidates_values: List[int]
+    ):
+        assert not self.train_not_check
+        self.process_config_entries(
+            "Benchmarking",
+            lambda config_entry_name, config_entry, temp_log_file: self.benchmark(
+                config_entry_name,
+                config_entry,
+                ensemble_sizes,
+                max_candidates_values,
+                temp_log_file,
+            ),
+        )
+        self.archive_log_files("benchmark_log")
+
+    def distill_models(self):
+        assert not self.train_not_check
+        self.process_config_entries("Distilling", self.distill)
+        self.archive_log_files("distill_log")
+
+    def check_models(self):
+        assert not self.train_not_check
+        self.process_config_entries("Checking", self.train_or_check)
+        self.archive_log_files("check_log")
@@ -1,5 +1,9 @@
 import unittest
 from coreferee.test_utils import get_nlps
+from coreferee.annotation import Annotator, ChainUnionFind
+from coreferee.data_model import Mention, ANNOTATION_CONTEXT_KEY
+from coreferee.data_model import get_annotation_context
+from coreferee.errors import CorefereeError
 
 
 class CommonAnnotationTest(unittest.TestCase):
@@ -192,3 +196,383 @@ class CommonAnnotationTest(unittest.TestCase):
         self.compare_annotations(
             "Peter and Jane came in. She saw them.", "[0: [2], [6]]"
         )
+
+    def get_pruning_annotator(self, nlp, max_candidates):
+        annotator = nlp.get_pipe("coreferee").annotator
+        return Annotator(
+            nlp,
+            annotator.tendencies_analyzer.vectors_nlp,
+            annotator.tendencies_analyzer.feature_table,
+            annotator.thinc_ensemble,
+            max_candidates=max_candidates,
+        )
+
+    def test_max_candidates_without_pruning(self):
+        def func(nlp):
+            doc_text = "Although he was very busy with his work, Peter had had enough of it. He and his wife decided they needed a holiday. They travelled to Spain because they loved the country very much."
+            with nlp.select_pipes(disable=["coreferee"]):
+                doc = nlp(doc_text)
+            self.get_pruning_annotator(nlp, 100).annotate(doc)
+            self.assertEqual(
+                str(nlp(doc_text)._.coref_chains),
+                str(doc._.coref_chains),
+                nlp.meta["name"],
+            )
+
+        self.all_nlps(func)
+
+    def test_max_candidates_pruning(self):
+        def func(nlp):
+            annotator = self.get_pruning_annotator(nlp, 2)
+            with nlp.select_pipes(disable=["coreferee"]):
+                doc = nlp(
+                    "Richard and Peter came in. Jane saw them. He said she had seen him."
+                )
+            annotator.rules_analyzer.initialize(doc)
+            context = get_annotation_context(doc)
+            (
+                referrers_to_candidates,
+                referrers_to_pruned_candidates,
+            ) = annotator.tendencies_analyzer.get_candidates_to_score(doc, 2)
+            for token in doc:
+                if token.i not in context.potential_referreds:
+                    continue
+                potential_referreds = context.potential_referreds[token.i]
+                candidates = referrers_to_candidates[token.i]
+                pruned_candidates = referrers_to_pruned_candidates.get(token.i, [])
+                self.assertLessEqual(len(candidates), 2)
+                self.assertEqual(
+                    len(potential_referreds), len(candidates) + len(pruned_candidates)
+                )
+                heuristic_order_keys = [
+                    annotator.tendencies_analyzer.get_heuristic_order_key(
+                        potential_referred, token
+                    )
+                    for potential_referred in candidates + pruned_candidates
+                ]
+                self.assertEqual(sorted(heuristic_order_keys), heuristic_order_keys)
+            annotator.tendencies_analyzer.score(
+                doc, annotator.factorised_ensemble, max_candidates=2
+            )
+            for token in doc:
+                if token.i not in context.potential_referreds:
+                    continue
+                self.assertEqual(
+                    referrers_to_pruned_candidates.get(token.i, []),
+                    context.potential_referreds[token.i][2:],
+                )
+
+        self.all_nlps(func)
+
+    def test_annotation_context_dropped(self):
+        def func(nlp):
+            doc = nlp("Richard said he had finished")
+            self.assertNotIn(ANNOTATION_CONTEXT_KEY, doc.user_data)
+            self.assertEqual(["chains"], list(doc[2]._.coref_chains.__dict__))
+            self.assertEqual("[0: [0], [2]]", str(doc._.coref_chains))
+
+        self.all_nlps(func)
+
+    def test_max_candidates_invalid(self):
+        def func(nlp):
+            with self.assertRaises(CorefereeError):
+                self.get_pruning_annotator(nlp, 0)
+
+        self.all_nlps(func)
+
+    def test_scoring_batch_size(self):
+        def func(nlp):
+            annotator = nlp.get_pipe("coreferee").annotator
+            doc_text = "Although he was very busy with his work, Peter had had enough of it. He and his wife decided they needed a holiday. They travelled to Spain because they loved the country very much."
+            with nlp.select_pipes(disable=["coreferee"]):
+                doc = nlp(doc_text)
+            Annotator(
+                nlp,
+                annotator.tendencies_analyzer.vectors_nlp,
+                annotator.tendencies_analyzer.feature_table,
+                annotator.thinc_ensemble,
+                scoring_batch_size=1,
+            ).annotate(doc)
+            self.assertEqual(
+                str(nlp(doc_text)._.coref_chains),
+                str(doc._.coref_chains),
+                nlp.meta["name"],
+            )
+
+        self.all_nlps(func)
+
+    def test_chain_union_find_rewind(self):
+        def func(nlp):
+            doc = nlp(
+                "Peter and Jane came in. He saw her. She greeted him and they sat."
+            )
+            chains = ChainUnionFind()
+            Annotator.record_mention(Mention(doc[0], False), doc[6], chains)
+            chains.mark(8)
+            Annotator.record_mention(Mention(doc[2], False), doc[8], chains)
+            chains.mark(10)
+            Annotator.record_mention(Mention(doc[2], False), doc[10], chains)
+            Annotator.record_mention(Mention(doc[6], False), doc[12], chains)
+            self.assertEqual(
+                [[[0], [6], [12]], [[2], [8], [10]]],
+                [
+                    sorted(mention.token_indexes for mention in chain)
+                    for chain in chains.get_chains()
+                ],
+            )
+            chains.rewind(10)
+            self.assertEqual(
+                [[[0], [6]], [[2], [8]]],
+                [
+                    sorted(mention.token_indexes for mention in chain)
+                    for chain in chains.get_chains()
+                ],
+            )
+            self.assertIsNone(chains.get_chain_without_coordination(10))
+            chains.forget_before(10)
+            chains.rewind(8)
+            self.assertEqual(
+                [[[0], [6]], [[2], [8]]],
+                [
+                    sorted(mention.token_indexes for mention in chain)
+                    for chain in chains.get_chains()
+                ],
+            )
+
+        self.all_nlps(func)
+
+    def test_chain_union_find_relink_after_rewind(self):
+        def func(nlp):
+            doc = nlp(
+                "Peter and Jane came in. He saw her. She greeted him and they sat."
+            )
+            chains = ChainUnionFind()
+            Annotator.record_mention(Mention(doc[0], False), doc[6], chains)
+            Annotator.record_mention(Mention(doc[2], False), doc[8], chains)
+            chains.mark(12)
+            Annotator.record_mention(Mention(doc[8], False), doc[12], chains)
+            chains.rewind(12)
+            Annotator.record_mention(Mention(doc[6], False), doc[12], chains)
+            self.assertEqual(
+                [[[0], [6], [12]], [[2], [8]]],
+                [
+                    sorted(mention.token_indexes for mention in chain)
+                    for chain in chains.get_chains()
+                ],
+            )
+
+        self.all_nlps(func)
+
+    def test_no_token_in_two_chains(self):
+        def func(nlp):
+            doc = nlp(
+                "Richard came in. He and Peter went out. They said they had finished. "
+                "Mary told Sarah that she would help her. He thanked her."
+            )
+            chain_token_indexes = [
+                set(
+                    mention.root_index
+                    for mention in chain
+                    if len(mention.token_indexes) == 1
+                )
+                for chain in doc._.coref_chains
+            ]
+            for index, token_indexes in enumerate(chain_token_indexes):
+                for other_token_indexes in chain_token_indexes[index + 1 :]:
+                    self.assertEqual(set(), token_indexes & other_token_indexes)
+
+        self.all_nlps(func)
+
+    def get_retry_budget_annotator(self, nlp, **kwargs):
+        annotator = nlp.get_pipe("coreferee").annotator
+        return Annotator(
+            nlp,
+            annotator.tendencies_analyzer.vectors_nlp,
+            annotator.tendencies_analyzer.feature_table,
+            annotator.thinc_ensemble,
+            **kwargs
+        )
+
+    def test_retry_statistics(self):
+        def func(nlp):
+            doc = nlp(
+                "He saw him. He saw him. He saw her. She saw him. They saw him and her."
+            )
+            retry_statistics = doc._.coref_chains.retry_statistics
+            self.assertGreaterEqual(retry_statistics.rewinds, 0)
+            self.assertEqual(0, retry_statistics.budget_exhaustions)
+
+        self.all_nlps(func)
+
+    def test_retry_budget_not_exhausted(self):
+        def func(nlp):
+            for doc_text in (
+                "He saw him. He saw him. He saw her. She saw him. They saw him and her.",
+                "Peter and Jane came in. He saw her. She greeted him and they sat. He said they had seen him and it.",
+            ):
+                with nlp.select_pipes(disable=["coreferee"]):
+                    doc = nlp(doc_text)
+                self.get_retry_budget_annotator(nlp, retry_budget=10000).annotate(doc)
+                self.assertEqual(
+                    0, doc._.coref_chains.retry_statistics.budget_exhaustions
+                )
+                self.assertEqual(
+                    str(nlp(doc_text)._.coref_chains),
+                    str(doc._.coref_chains),
+                    nlp.meta["name"],
+                )
+
+        self.all_nlps(func)
+
+    def test_retry_budget_exhausted(self):
+        def func(nlp):
+            doc_text = (
+                "He saw him. He saw him. He saw her. She saw him. They saw him and her."
+            )
+            with nlp.select_pipes(disable=["coreferee"]):
+                doc = nlp(doc_text)
+            self.get_retry_budget_annotator(nlp, retry_budget=0).annotate(doc)
+            retry_statistics = doc._.coref_chains.retry_statistics
+            self.assertEqual(0, retry_statistics.rewinds)
+            self.assertLessEqual(
+                retry_statistics.budget_exhaustions, retry_statistics.retries
+            )
+
+        self.all_nlps(func)
+
+    def test_retry_budget_invalid(self):
+        def func(nlp):
+            with self.assertRaises(CorefereeError):
+                self.get_retry_budget_annotator(nlp, retry_budget=-1)
+            with self.assertRaises(CorefereeError):
+                self.get_retry_budget_annotator(nlp, retry_time_budget=-0.5)
+
+        self.all_nlps(func)
+
+    def test_time_limit_not_reached(self):
+        def func(nlp):
+            doc = nlp("Richard came in. He said he was tired.")
+            self.assertEqual((), doc._.coref_chains.degradations)
+            self.assertEqual(1, len(doc._.coref_chains))
+
+        self.all_nlps(func)
+
+    def test_time_limit_reached(self):
+        def func(nlp):
+            with nlp.select_pipes(disable=["coreferee"]):
+                doc = nlp("Richard came in. He said he was tired.")
+            nlp.get_pipe("coreferee").annotator.annotate(doc, time_limit=0)
+            self.assertEqual(
+                (
+                    "skipped_retries",
+                    "restricted_candidates",
+                    "skipped_noun_links",
+                    "rules_only",
+                    "truncated",
+                ),
+                doc._.coref_chains.degradations,
+            )
+            self.assertEqual(0, len(doc._.coref_chains))
+
+        self.all_nlps(func)
+
+    def test_time_limit_invalid(self):
+        def func(nlp):
+            with self.assertRaises(CorefereeError):
+                self.get_retry_budget_annotator(nlp, time_limit=-1)
+            with nlp.select_pipes(disable=["coreferee"]):
+                doc = nlp("Richard came in. He said he was tired.")
+            with self.assertRaises(CorefereeError):
+                nlp.get_pipe("coreferee").annotator.annotate(doc, time_limit=-1)
+
+        self.all_nlps(func)
+
+    def test_rules_only(self):
+        def func(nlp):
+            annotator = Annotator(nlp, None, None, None)
+            self.assertIsNone(annotator.tendencies_analyzer)
+            for doc_text, expected_coref_chains in (
+                ("Richard said he had finished", "[0: [0], [2]]"),
+                (
+                    "Richard and Peter said they had finished",
+                    "[0: [0, 2], [4]]",
+                ),
+                (
+                    "Richard came in. He and Peter went out. They said they had "
+                    "finished",
+                    "[0: [0], [4], 1: [4, 6], [10], [12]]",
+                ),
+            ):
+                with nlp.select_pipes(disable=["coreferee"]):
+                    doc = nlp(doc_text)
+                annotator.annotate(doc)
+                self.assertEqual(expected_coref_chains, str(doc._.coref_chains))
+
+        self.all_nlps(func)
+
+    def test_rules_only_invalid(self):
+        def func(nlp):
+            with self.assertRaises(CorefereeError):
+                Annotator(
+                    nlp,
+                    None,
+                    None,
+                    nlp.get_pipe("coreferee").annotator.thinc_ensemble,
+                )
+
+        self.all_nlps(func)
+
+    def test_resolve_tokens(self):
+        def func(nlp):
+            doc_text = (
+                "Peter came in. Richard came in. Richard said he was tired. Then he "
+                "left."
+            )
+            annotator = nlp.get_pipe("coreferee").annotator
+            with nlp.select_pipes(disable=["coreferee"]):
+                doc = nlp(doc_text)
+            resolved = annotator.resolve_tokens(doc, [10, 15], context_sentences=1)
+            self.assertEqual(["Richard"], [token.text for token in resolved[10]])
+            self.assertEqual(["Richard"], [token.text for token in resolved[15]])
+            self.assertEqual({10, 15}, set(annotator.resolved_tokens[doc]))
+            self.assertIsNone(doc[0]._.coref_chains)
+            self.assertEqual({}, doc.user_data)
+            self.assertEqual(resolved, annotator.resolve_tokens(doc, [10, 15]))
+            self.assertIsNone(annotator.resolve_tokens(doc, [0])[0])
+            annotated_doc = nlp(doc_text)
+            with nlp.select_pipes(disable=["coreferee"]):
+                doc = nlp(doc_text)
+            self.assertIsNone(
+                annotator.resolve_tokens(doc, [15], context_sentences=0)[15]
+            )
+            self.assertEqual(
+                [
+                    token.i
+                    for token in annotated_doc._.coref_chains.resolve(annotated_doc[15])
+                ],
+                [token.i for token in annotator.resolve_tokens(doc, [15])[15]],
+            )
+            self.assertEqual(
+                {
+                    10: annotated_doc._.coref_chains.resolve(annotated_doc[10]),
+                    15: annotated_doc._.coref_chains.resolve(annotated_doc[15]),
+                },
+                annotator.resolve_tokens(annotated_doc, [10, 15]),
+            )
+
+        self.all_nlps(func)
+
+    def test_get_resolution_windows(self):
+        def func(nlp):
+            annotator = nlp.get_pipe("coreferee").annotator
+            doc = nlp("He came in. She came in. It came in. They came in. He came in.")
+            self.assertEqual(
+                [(0, 8, [0, 4]), (12, 20, [16])],
+                annotator.get_resolution_windows(doc, [4, 0, 16], 1),
+            )
+            self.assertEqual(
+                [(0, 20, [4, 16])],
+                annotator.get_resolution_windows(doc, [16, 4], 3),
+            )
+
+        self.all_nlps(func)
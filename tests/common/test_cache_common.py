@@ -0,0 +1,122 @@
+import unittest
+import os
+from tempfile import TemporaryDirectory
+import spacy
+from coreferee.cache import ChainCache, SentenceFeatureCache
+from coreferee.data_model import Mention
+from coreferee.errors import CorefereeError
+from coreferee.test_utils import get_nlps
+
+
+class CommonCacheTest(unittest.TestCase):
+    def setUp(self):
+        nlps = get_nlps("en")
+        for nlp in (nlp for nlp in nlps if nlp.meta["name"] == "core_web_sm"):
+            self.sm_nlp = nlp
+
+    def test_lru_eviction(self):
+        cache = ChainCache(b"identity", 1)
+        first_doc = self.sm_nlp("Peter told Paul he was dissatisfied.")
+        second_doc = self.sm_nlp(
+            "I saw Peter. He and Richard came in. They had arrived"
+        )
+        first_key = cache.get_key(first_doc)
+        second_key = cache.get_key(second_doc)
+        self.assertNotEqual(first_key, second_key)
+        self.assertEqual(first_key, cache.get_key(self.sm_nlp(first_doc.text)))
+        self.assertNotEqual(first_key, ChainCache(b"other", 1).get_key(first_doc))
+        cache.put(first_key, first_doc._.coref_chains)
+        cache.put(second_key, second_doc._.coref_chains)
+        self.assertIsNone(cache.get(first_key))
+        chain_holder = cache.get(second_key)
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(1, cache.misses)
+        doc = self.sm_nlp.make_doc(second_doc.text)
+        doc._.coref_chains = chain_holder
+        self.assertEqual("[0: [2], [4], 1: [4, 6], [10]]", str(doc._.coref_chains))
+        self.assertEqual(
+            "0: Peter(2), He(4); 1: [He(4); Richard(6)], They(10)",
+            doc._.coref_chains.pretty_representation,
+        )
+        self.assertEqual([doc[2], doc[6]], doc._.coref_chains.resolve(doc[10]))
+
+    def test_sqlite_tier(self):
+        with TemporaryDirectory() as dirname:
+            path = os.sep.join((dirname, "chains.sqlite"))
+            doc = self.sm_nlp("Peter told Paul he was dissatisfied.")
+            cache = ChainCache(b"identity", 1, path)
+            cache.put(cache.get_key(doc), doc._.coref_chains)
+            cache.close()
+            cache = ChainCache(b"identity", 1, path)
+            self.assertEqual("[0: [0], [3]]", str(cache.get(cache.get_key(doc))))
+            self.assertEqual(1, len(cache.entries))
+            cache.close()
+
+    def test_pipe_with_cache(self):
+        nlp = spacy.load("en_core_web_sm")
+        nlp.add_pipe("coreferee", config={"cache_size": 10})
+        cache = nlp.get_pipe("coreferee").cache
+        first_doc = nlp("Peter told Paul he was dissatisfied.")
+        second_doc = nlp("Peter told Paul he was dissatisfied.")
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(1, cache.misses)
+        self.assertEqual("[0: [0], [3]]", str(first_doc._.coref_chains))
+        self.assertEqual("[0: [0], [3]]", str(second_doc._.coref_chains))
+        self.assertEqual("[0: [0], [3]]", str(second_doc[3]._.coref_chains))
+        self.assertIsNot(first_doc._.coref_chains, second_doc._.coref_chains)
+
+    def test_invalid_cache_size(self):
+        with self.assertRaises(CorefereeError):
+            ChainCache(b"identity", 0)
+        with self.assertRaises(CorefereeError):
+            SentenceFeatureCache(0)
+
+    def test_sentence_cache_counts_misses_across_sentences(self):
+        nlp = spacy.load("en_core_web_sm")
+        nlp.add_pipe("coreferee", config={"sentence_cache_size": 10})
+        tendencies_analyzer = nlp.get_pipe("coreferee").annotator.tendencies_analyzer
+        sentence_cache = tendencies_analyzer.sentence_cache
+        doc = nlp("He came in. Peter told Paul he was dissatisfied.")
+        tendencies_analyzer.rules_analyzer.initialize(doc)
+        mention = Mention(doc[0])
+        mention.token_indexes = [0, 4]
+        misses = sentence_cache.misses
+        self.assertIsNone(sentence_cache.get(mention, doc, "feature_map"))
+        self.assertEqual(misses + 1, sentence_cache.misses)
+
+    def test_pipe_with_sentence_cache(self):
+        nlp = spacy.load("en_core_web_sm")
+        nlp.add_pipe("coreferee", config={"sentence_cache_size": 10})
+        tendencies_analyzer = nlp.get_pipe("coreferee").annotator.tendencies_analyzer
+        sentence_cache = tendencies_analyzer.sentence_cache
+        first_doc = nlp("Peter told Paul he was dissatisfied.")
+        self.assertEqual(0, sentence_cache.hits)
+        self.assertGreater(sentence_cache.misses, 0)
+        self.assertEqual(1, len(sentence_cache.entries))
+        second_doc = nlp("He came in. Peter told Paul he was dissatisfied.")
+        self.assertGreater(sentence_cache.hits, 0)
+        self.assertEqual(2, len(sentence_cache.entries))
+        self.assertEqual("[0: [0], [3]]", str(first_doc._.coref_chains))
+        plain_nlp = spacy.load("en_core_web_sm")
+        plain_nlp.add_pipe("coreferee")
+        plain_doc = plain_nlp(second_doc.text)
+        self.assertEqual(str(plain_doc._.coref_chains), str(second_doc._.coref_chains))
+        plain_tendencies_analyzer = plain_nlp.get_pipe(
+            "coreferee"
+        ).annotator.tendencies_analyzer
+        self.assertIsNone(plain_tendencies_analyzer.sentence_cache)
+        plain_tendencies_analyzer.rules_analyzer.initialize(plain_doc)
+        tendencies_analyzer.rules_analyzer.initialize(second_doc)
+        for token in second_doc:
+            self.assertEqual(
+                plain_tendencies_analyzer.get_feature_map(
+                    plain_doc[token.i], plain_doc
+                ),
+                tendencies_analyzer.get_feature_map(token, second_doc),
+            )
+            self.assertEqual(
+                plain_tendencies_analyzer.get_position_map(
+                    plain_doc[token.i], plain_doc
+                ),
+                tendencies_analyzer.get_position_map(token, second_doc),
+            )
@@ -0,0 +1,122 @@
+import unittest
+import json
+import os
+from tempfile import TemporaryDirectory
+from spacy.tokens import DocBin
+from coreferee.corpus import CorpusAnnotator, MANIFEST_FILENAME
+from coreferee.errors import CorefereeError
+from coreferee.test_utils import get_nlps
+
+TEXTS = [
+    "Peter told Paul he was dissatisfied.",
+    "Peter said he was dissatisfied.",
+    "I saw Peter. He and Richard came in. They had arrived",
+]
+
+
+class CommonCorpusTest(unittest.TestCase):
+    def setUp(self):
+        nlps = get_nlps("en")
+        for nlp in (nlp for nlp in nlps if nlp.meta["name"] == "core_web_sm"):
+            self.sm_nlp = nlp
+
+    def write_input(self, dirname):
+        input_path = os.sep.join((dirname, "input.jsonl"))
+        with open(input_path, "w", encoding="utf-8") as input_file:
+            input_file.write(json.dumps(TEXTS[0]))
+            input_file.write("\n")
+            input_file.write(json.dumps({"text": TEXTS[1], "id": "second"}))
+            input_file.write("\n")
+            input_file.write(json.dumps({"text": TEXTS[2]}))
+            input_file.write("\n")
+        return input_path
+
+    def test_jsonl_output(self):
+        with TemporaryDirectory() as dirname:
+            input_path = self.write_input(dirname)
+            output_dir = os.sep.join((dirname, "output"))
+            manifest = CorpusAnnotator(
+                self.sm_nlp, output_format="jsonl", shard_size=2
+            ).annotate(input_path, output_dir)
+            self.assertTrue(manifest["complete"])
+            self.assertEqual(3, manifest["documents"])
+            self.assertEqual(
+                ["shard_00000.jsonl", "shard_00001.jsonl"],
+                [shard["filename"] for shard in manifest["shards"]],
+            )
+            records = []
+            for shard in manifest["shards"]:
+                with open(
+                    os.sep.join((output_dir, shard["filename"])), encoding="utf-8"
+                ) as shard_file:
+                    records.extend(json.loads(line) for line in shard_file)
+            self.assertEqual([0, "second", 2], [record["id"] for record in records])
+            self.assertEqual(
+                [
+                    {
+                        "most_specific_mention_index": 0,
+                        "mentions": [
+                            {"token_indexes": [0], "char_offsets": [[0, 5]]},
+                            {"token_indexes": [3], "char_offsets": [[16, 18]]},
+                        ],
+                    }
+                ],
+                records[0]["chains"],
+            )
+            self.assertEqual(
+                [[4, 6], [10]],
+                [
+                    mention["token_indexes"]
+                    for mention in records[2]["chains"][1]["mentions"]
+                ],
+            )
+
+    def test_docbin_output_and_resume(self):
+        with TemporaryDirectory() as dirname:
+            input_path = self.write_input(dirname)
+            output_dir = os.sep.join((dirname, "output"))
+            corpus_annotator = CorpusAnnotator(self.sm_nlp, shard_size=2)
+            manifest = corpus_annotator.annotate(input_path, output_dir)
+            # simulate a job interrupted after the first shard
+            manifest["shards"] = manifest["shards"][:1]
+            manifest["documents"] = 2
+            manifest["tokens"] = manifest["shards"][0]["tokens"]
+            manifest["complete"] = False
+            corpus_annotator.write_manifest(manifest, output_dir)
+            os.remove(os.sep.join((output_dir, "shard_00001.spacy")))
+            manifest = corpus_annotator.annotate(input_path, output_dir)
+            self.assertTrue(manifest["complete"])
+            self.assertEqual(3, manifest["documents"])
+            docs = []
+            for shard in manifest["shards"]:
+                docs.extend(
+                    DocBin()
+                    .from_disk(os.sep.join((output_dir, shard["filename"])))
+                    .get_docs(self.sm_nlp.vocab)
+                )
+            self.assertEqual(TEXTS, [doc.text for doc in docs])
+            self.assertEqual([0, "second", 2], [doc.user_data["id"] for doc in docs])
+            self.assertEqual("[0: [0], [3]]", str(docs[0]._.coref_chains))
+            self.assertEqual("[0: [0], [2]]", str(docs[1]._.coref_chains))
+            self.assertEqual(
+                "[0: [2], [4], 1: [4, 6], [10]]", str(docs[2]._.coref_chains)
+            )
+            with open(
+                os.sep.join((output_dir, MANIFEST_FILENAME)), encoding="utf-8"
+            ) as manifest_file:
+                self.assertEqual(manifest, json.load(manifest_file))
+
+            # the documents written can themselves be used as input
+            jsonl_output_dir = os.sep.join((dirname, "jsonl_output"))
+            manifest = CorpusAnnotator(self.sm_nlp, output_format="jsonl").annotate(
+                output_dir, jsonl_output_dir
+            )
+            self.assertEqual(3, manifest["documents"])
+            with self.assertRaises(CorefereeError):
+                corpus_annotator.annotate(input_path, jsonl_output_dir)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(CorefereeError):
+            CorpusAnnotator(self.sm_nlp, output_format="csv")
+        with self.assertRaises(CorefereeError):
+            CorpusAnnotator(self.sm_nlp, shard_size=0)
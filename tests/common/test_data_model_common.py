@@ -1,5 +1,6 @@
 import unittest
-from coreferee.data_model import Mention
+from coreferee.data_model import Mention, TokenChainIndex
+from coreferee.errors import CorefereeError
 from coreferee.rules import RulesAnalyzerFactory
 from coreferee.test_utils import get_nlps
 
@@ -94,6 +95,65 @@ class CommonDataModelTest(unittest.TestCase):
         self.assertEqual([doc[6]], doc._.coref_chains.resolve(doc[1]))
         self.assertEqual(None, doc._.coref_chains.resolve(doc[6]))
 
+    def test_token_chain_index(self):
+        doc = self.sm_nlp("I saw Peter. He and Richard came in. They had arrived")
+        chains = doc._.coref_chains.chains
+        token_chain_index = TokenChainIndex(chains)
+        self.assertEqual([], token_chain_index.get_chains(0))
+        self.assertEqual([chains[0]], token_chain_index.get_chains(2))
+        self.assertEqual([chains[0], chains[1]], token_chain_index.get_chains(4))
+        self.assertEqual([chains[1]], token_chain_index.get_chains(6))
+        self.assertEqual([chains[1]], token_chain_index.get_chains(10))
+        self.assertEqual([], token_chain_index.get_chains(12))
+        self.assertEqual([], TokenChainIndex([]).get_chains(0))
+        self.assertIsNot(doc[4]._.coref_chains, doc[4]._.coref_chains)
+        self.assertEqual(chains[1], doc[10]._.coref_chains[0])
+
+    def test_overlapping_mentions(self):
+        doc = self.sm_nlp("I saw Peter. He and Richard came in. They had arrived")
+        chain_holder = doc._.coref_chains
+        self.assertEqual([(0, 0)], chain_holder.get_overlapping_mentions(0, 3))
+        self.assertEqual([(0, 1), (1, 0)], chain_holder.get_overlapping_mentions(4, 5))
+        self.assertEqual([(1, 0)], chain_holder.get_overlapping_mentions(5, 6))
+        self.assertEqual([], chain_holder.get_overlapping_mentions(7, 10))
+        self.assertEqual(
+            [chain_holder[0], chain_holder[1]],
+            chain_holder.get_overlapping_chains(0, len(doc)),
+        )
+        self.assertEqual(
+            [(1, 0)],
+            chain_holder.get_overlapping_mentions(
+                doc[5].idx, doc[5].idx + 1, char_offsets=True
+            ),
+        )
+        self.assertEqual(
+            [chain_holder[1]],
+            chain_holder.get_overlapping_chains(
+                doc[10].idx, len(doc.text), char_offsets=True
+            ),
+        )
+        chain_holder.chains = chain_holder.chains[1:]
+        with self.assertRaises(CorefereeError):
+            chain_holder.get_overlapping_mentions(0, 3)
+        chain_holder.index_mentions(doc)
+        self.assertEqual([(0, 0)], chain_holder.get_overlapping_mentions(4, 5))
+
+    def test_mention_slots(self):
+        doc = self.sm_nlp("I saw Peter. He and Richard came in. They had arrived")
+        mention = doc._.coref_chains[1][0]
+        self.assertEqual([4, 6], mention.token_indexes)
+        self.assertEqual(hash((4, 6)), hash(mention))
+        self.assertIsNone(mention._doc)
+        self.assertEqual("[He(4); Richard(6)]", mention.pretty_representation)
+        self.assertFalse(hasattr(mention, "__dict__"))
+        self.assertFalse(hasattr(doc._.coref_chains[1], "__dict__"))
+        new_mention = Mention(doc[10], False)
+        self.assertIs(doc, new_mention._doc)
+        self.assertIsNone(new_mention._pretty_representation)
+        self.assertEqual("They(10)", new_mention.pretty_representation)
+        self.assertIsNone(new_mention._doc)
+        self.assertEqual(doc._.coref_chains[1][1], new_mention)
+
     def test_most_specific_only_nouns(self):
         doc = self.sm_nlp("I saw a big dog. The dog came in.")
         self.assertEqual("[0: [4], [7]]", str(doc._.coref_chains))
@@ -114,6 +174,23 @@ class CommonDataModelTest(unittest.TestCase):
         )
         self.assertEqual([doc[4], doc[9], doc[15]], doc._.coref_chains.resolve(doc[19]))
 
+    def test_resolve_all(self):
+        doc = self.sm_nlp(
+            "I spoke to Mr. Platt. The man and Richard came in. They and Peter said hello. They were all here."
+        )
+        resolutions = doc._.coref_chains.resolve_all()
+        self.assertEqual([4, 9, 15], resolutions[19])
+        self.assertEqual(
+            {
+                token.i: [resolved_token.i for resolved_token in resolved_tokens]
+                for token in doc
+                for resolved_tokens in (doc._.coref_chains.resolve(token),)
+                if resolved_tokens is not None
+            },
+            resolutions,
+        )
+        self.assertNotIn(4, resolutions)
+
     def test_representations_cataphora(self):
         doc = self.sm_nlp("Although he had gone out, Richard came back")
         self.assertEqual("[0: [1], [6]]", str(doc._.coref_chains))
@@ -3,8 +3,11 @@ from multiprocessing import Process, Manager, Queue as m_Queue
 from queue import Queue
 from threading import Thread
 import spacy
+import srsly
 from spacy.tokens import Doc
 from thinc.util import prefer_gpu, require_cpu
+from coreferee.data_model import ChainHolder
+from coreferee.errors import CorefereeError, UnsupportedChainFormatError
 from coreferee.test_utils import get_nlps
 
 NUMBER_OF_THREADS = 50
@@ -109,6 +112,83 @@ class CommonGeneralTest(unittest.TestCase):
         self.assertEqual(0, doc2._.coref_chains[0].most_specific_mention_index)
         self.assertEqual([doc2[0]], doc2._.coref_chains.resolve(doc2[2]))
 
+    def test_serialization_compact_format(self):
+        doc = self.sm_nlp("Peter told Paul he was dissatisfied.")
+        serialized_chains = srsly.msgpack_loads(
+            srsly.msgpack_dumps(doc._.coref_chains), use_list=False
+        )
+        self.assertIsNone(serialized_chains.chains[0][0]._pretty_representation)
+        self.assertEqual(2, serialized_chains.decoded_version)
+        self.assertEqual(
+            {
+                "__coreferee_chains__": {
+                    "version": 2,
+                    "chain_lengths": [2],
+                    "mention_lengths": [1, 1],
+                    "token_indexes": [0, 3],
+                    "most_specific_mention_indexes": [0],
+                }
+            },
+            ChainHolder.serialize_obj(doc._.coref_chains),
+        )
+        with self.assertRaises(UnsupportedChainFormatError):
+            srsly.msgpack_loads(
+                srsly.msgpack_dumps({"__coreferee_chains__": {"version": 3}})
+            )
+
+    def test_deserialization_legacy_format(self):
+        doc = self.sm_nlp("Peter told Paul he was dissatisfied.")
+        legacy_chains = {
+            "__coreferee_chain_holder__": [([([0], "Peter(0)"), ([3], "he(3)")], 0)]
+        }
+        b = doc.to_bytes()
+        doc = None
+        doc2 = Doc(self.sm_nlp.vocab).from_bytes(b)
+        doc2.user_data[("._.", "coref_chains", None, None)] = srsly.msgpack_loads(
+            srsly.msgpack_dumps(legacy_chains), use_list=False
+        )
+        doc2.user_data[("._.", "coref_chains", 3, None)] = srsly.msgpack_loads(
+            srsly.msgpack_dumps(legacy_chains), use_list=False
+        )
+        self.assertEqual("[0: [0], [3]]", str(doc2._.coref_chains))
+        self.assertEqual("[0: [0], [3]]", str(doc2[3]._.coref_chains))
+        self.assertEqual(
+            "0: Peter(0), he(3)", doc2[3]._.coref_chains.pretty_representation
+        )
+        self.assertNotIn(("._.", "coref_chains", 3, None), doc2.user_data)
+        self.assertEqual([doc2[0]], doc2._.coref_chains.resolve(doc2[3]))
+
+    def test_span_group_output(self):
+        nlp = spacy.load("en_core_web_sm")
+        nlp.add_pipe("coreferee", config={"output": "both"})
+        doc = nlp("I saw Peter. He and Richard came in. They had arrived")
+        self.assertEqual("[0: [2], [4], 1: [4, 6], [10]]", str(doc._.coref_chains))
+        self.assertEqual(["coref_chains_0", "coref_chains_1"], list(doc.spans))
+        self.assertEqual(["Peter", "He"], [s.text for s in doc.spans["coref_chains_0"]])
+        self.assertEqual(
+            ["He and Richard", "They"], [s.text for s in doc.spans["coref_chains_1"]]
+        )
+        self.assertEqual(
+            {"chain_index": 1, "most_specific_mention_index": 0},
+            doc.spans["coref_chains_1"].attrs,
+        )
+        nlp = spacy.load("en_core_web_sm")
+        nlp.add_pipe("coreferee", config={"output": "span_groups"})
+        doc = nlp("Peter told Paul he was dissatisfied.")
+        self.assertIsNone(doc._.coref_chains)
+        self.assertIsNone(doc[3]._.coref_chains)
+        self.assertEqual([], list(doc.user_data))
+        doc2 = Doc(nlp.vocab).from_bytes(doc.to_bytes())
+        self.assertEqual(
+            ["Peter", "he"], [s.text for s in doc2.spans["coref_chains_0"]]
+        )
+        self.assertEqual(0, doc2.spans["coref_chains_0"].attrs["chain_index"])
+
+    def test_span_group_output_invalid(self):
+        nlp = spacy.load("en_core_web_sm")
+        with self.assertRaises(CorefereeError):
+            nlp.add_pipe("coreferee", config={"output": "spans"})
+
     def test_processing_in_pipe_1_cpu(self):
         doc_texts = [
             "Peter told Paul he was dissatisfied.",
@@ -0,0 +1,189 @@
+import unittest
+import numpy as np
+from coreferee.test_utils import get_nlps
+from coreferee.tendencies import DocumentPairInfo, ENSEMBLE_SIZE, create_thinc_model
+from coreferee.tendencies import create_distilled_thinc_model
+from coreferee.errors import CorefereeError
+from coreferee.inference import FactorisedEnsemble
+
+
+class CommonInferenceTest(unittest.TestCase):
+    def setUp(self):
+
+        self.nlps = get_nlps("en")
+
+    def all_nlps(self, func):
+        for nlp in self.nlps:
+            func(nlp)
+
+    def get_document_pair_info(self, nlp, doc_text):
+        annotator = nlp.get_pipe("coreferee").annotator
+        doc = nlp(doc_text)
+        annotator.rules_analyzer.initialize(doc)
+        return DocumentPairInfo.from_doc(
+            doc, annotator.tendencies_analyzer, ENSEMBLE_SIZE
+        )
+
+    def compare_factorised_predictions(self, doc_text, *, sparse_feature_maps=False):
+        def func(nlp):
+            annotator = nlp.get_pipe("coreferee").annotator
+            document_pair_info = self.get_document_pair_info(nlp, doc_text)
+            thinc_predictions = annotator.thinc_ensemble.predict([document_pair_info])
+            if sparse_feature_maps:
+                factorised_ensemble = FactorisedEnsemble(
+                    annotator.thinc_ensemble,
+                    feature_map_width=len(annotator.tendencies_analyzer.feature_table),
+                )
+            else:
+                factorised_ensemble = annotator.factorised_ensemble
+            factorised_predictions = factorised_ensemble.predict([document_pair_info])
+            self.assertEqual(len(thinc_predictions), len(factorised_predictions))
+            for thinc_prediction, factorised_prediction in zip(
+                thinc_predictions, factorised_predictions
+            ):
+                self.assertEqual(thinc_prediction.shape, factorised_prediction.shape)
+                self.assertTrue(
+                    np.allclose(thinc_prediction, factorised_prediction, atol=1e-5),
+                    nlp.meta["name"],
+                )
+
+        self.all_nlps(func)
+
+    def test_static_infos_composed_from_blocks(self):
+        def func(nlp):
+            document_pair_info = self.get_document_pair_info(
+                nlp, "Richard and Peter came in. They said he had seen them."
+            )
+            static_width = document_pair_info.referrer_static_infos.shape[1]
+            self.assertEqual(
+                static_width, document_pair_info.antecedent_static_infos.shape[1]
+            )
+            for pair_index, static_info in enumerate(document_pair_info.static_infos):
+                referrer_index = document_pair_info.referrers2candidates_pointers[
+                    pair_index
+                ]
+                antecedent_index = document_pair_info.candidates.dataXd[pair_index]
+                self.assertEqual(
+                    document_pair_info.referrer_static_infos[referrer_index].tolist(),
+                    static_info[:static_width].tolist(),
+                )
+                self.assertEqual(
+                    document_pair_info.antecedent_static_infos[
+                        antecedent_index
+                    ].tolist(),
+                    static_info[static_width : static_width * 2].tolist(),
+                )
+                self.assertEqual(
+                    document_pair_info.compatibility_infos[pair_index].tolist(),
+                    static_info[static_width * 2 :].tolist(),
+                )
+
+        self.all_nlps(func)
+
+    def test_factorised_simple(self):
+        self.compare_factorised_predictions("Richard said he had finished")
+
+    def test_factorised_coordination(self):
+        self.compare_factorised_predictions(
+            "Richard came in. He and Peter went out. They said they had finished"
+        )
+
+    def test_factorised_longer_document(self):
+        self.compare_factorised_predictions(
+            "Although he was very busy with his work, Peter had had enough of it. He and his wife decided they needed a holiday. They travelled to Spain because they loved the country very much."
+        )
+
+    def test_factorised_sparse_feature_maps(self):
+        self.compare_factorised_predictions(
+            "Although he was very busy with his work, Peter had had enough of it. He and his wife decided they needed a holiday. They travelled to Spain because they loved the country very much.",
+            sparse_feature_maps=True,
+        )
+
+    def test_factorised_after_model_reload(self):
+        def func(nlp):
+            annotator = nlp.get_pipe("coreferee").annotator
+            reloaded_thinc_ensemble = create_thinc_model().from_bytes(
+                annotator.thinc_ensemble.to_bytes()
+            )
+            document_pair_info = self.get_document_pair_info(
+                nlp,
+                "Richard came in. He and Peter went out. They said they had finished",
+            )
+            for original_prediction, reloaded_prediction in zip(
+                annotator.factorised_ensemble.predict([document_pair_info]),
+                FactorisedEnsemble(reloaded_thinc_ensemble).predict(
+                    [document_pair_info]
+                ),
+            ):
+                self.assertTrue(
+                    np.allclose(original_prediction, reloaded_prediction),
+                    nlp.meta["name"],
+                )
+
+        self.all_nlps(func)
+
+    def test_ensemble_subset(self):
+        def func(nlp):
+            annotator = nlp.get_pipe("coreferee").annotator
+            document_pair_info = self.get_document_pair_info(
+                nlp,
+                "Richard came in. He and Peter went out. They said they had finished",
+            )
+            thinc_predictions = annotator.thinc_ensemble.predict([document_pair_info])
+            for ensemble_size in (1, 3):
+                for thinc_prediction, subset_prediction in zip(
+                    thinc_predictions,
+                    annotator.factorised_ensemble.predict(
+                        [document_pair_info], ensemble_size=ensemble_size
+                    ),
+                ):
+                    self.assertEqual(subset_prediction.shape[1], ensemble_size)
+                    self.assertTrue(
+                        np.allclose(
+                            thinc_prediction[:, :ensemble_size],
+                            subset_prediction,
+                            atol=1e-5,
+                        ),
+                        nlp.meta["name"],
+                    )
+
+        self.all_nlps(func)
+
+    def test_ensemble_subset_invalid_size(self):
+        def func(nlp):
+            annotator = nlp.get_pipe("coreferee").annotator
+            with self.assertRaises(CorefereeError):
+                FactorisedEnsemble(
+                    annotator.thinc_ensemble, ensemble_size=ENSEMBLE_SIZE + 1
+                )
+
+        self.all_nlps(func)
+
+    def test_factorised_distilled_model(self):
+        def func(nlp):
+            document_pair_info = self.get_document_pair_info(
+                nlp,
+                "Richard came in. He and Peter went out. They said they had finished",
+            )
+            distilled_thinc_model = create_distilled_thinc_model()
+            distilled_thinc_model.initialize(
+                X=[document_pair_info],
+                Y=[
+                    np.ones((length, 1), dtype="float32")
+                    for length in document_pair_info.candidates.lengths.tolist()
+                ],
+            )
+            thinc_predictions = distilled_thinc_model.predict([document_pair_info])
+            factorised_predictions = FactorisedEnsemble(distilled_thinc_model).predict(
+                [document_pair_info]
+            )
+            for thinc_prediction, factorised_prediction in zip(
+                thinc_predictions, factorised_predictions
+            ):
+                self.assertEqual(1, factorised_prediction.shape[1])
+                self.assertTrue(
+                    np.allclose(thinc_prediction, factorised_prediction, atol=1e-5),
+                    nlp.meta["name"],
+                )
+
+        self.all_nlps(func)
@@ -0,0 +1,63 @@
+import unittest
+import numpy as np
+from coreferee.test_utils import get_nlps
+from coreferee.errors import CorefereeError
+from coreferee.inference import FactorisedEnsemble
+from coreferee.quantisation import quantise_thinc_model, dequantise_thinc_model
+from coreferee.tendencies import DocumentPairInfo, ENSEMBLE_SIZE
+
+
+class CommonQuantisationTest(unittest.TestCase):
+    def setUp(self):
+
+        self.nlps = get_nlps("en")
+
+    def all_nlps(self, func):
+        for nlp in self.nlps:
+            func(nlp)
+
+    def compare_quantised_predictions(self, dtype, atol):
+        def func(nlp):
+            annotator = nlp.get_pipe("coreferee").annotator
+            doc = nlp(
+                "Although he was very busy with his work, Peter had had enough of it. He and his wife decided they needed a holiday. They travelled to Spain because they loved the country very much."
+            )
+            annotator.rules_analyzer.initialize(doc)
+            document_pair_info = DocumentPairInfo.from_doc(
+                doc, annotator.tendencies_analyzer, ENSEMBLE_SIZE
+            )
+            quantised_thinc_model_bytes = quantise_thinc_model(
+                annotator.thinc_ensemble, dtype
+            )
+            self.assertLess(
+                len(quantised_thinc_model_bytes),
+                len(annotator.thinc_ensemble.to_bytes()),
+            )
+            quantised_ensemble = FactorisedEnsemble(
+                dequantise_thinc_model(quantised_thinc_model_bytes)
+            )
+            for prediction, quantised_prediction in zip(
+                annotator.factorised_ensemble.predict([document_pair_info]),
+                quantised_ensemble.predict([document_pair_info]),
+            ):
+                self.assertEqual(prediction.shape, quantised_prediction.shape)
+                self.assertTrue(
+                    np.allclose(prediction, quantised_prediction, atol=atol),
+                    nlp.meta["name"],
+                )
+
+        self.all_nlps(func)
+
+    def test_float16(self):
+        self.compare_quantised_predictions("float16", 0.01)
+
+    def test_int8(self):
+        self.compare_quantised_predictions("int8", 0.05)
+
+    def test_unsupported_dtype(self):
+        def func(nlp):
+            annotator = nlp.get_pipe("coreferee").annotator
+            with self.assertRaises(CorefereeError):
+                quantise_thinc_model(annotator.thinc_ensemble, "int4")
+
+        self.all_nlps(func)
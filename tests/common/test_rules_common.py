@@ -3,7 +3,7 @@ import spacy
 import coreferee
 from coreferee.rules import RulesAnalyzerFactory
 from coreferee.test_utils import get_nlps
-from coreferee.data_model import Mention
+from coreferee.data_model import Mention, get_annotation_context
 
 
 class CommonRulesTest(unittest.TestCase):
@@ -28,7 +28,7 @@ class CommonRulesTest(unittest.TestCase):
             rules_analyzer.initialize(doc)
             self.assertEqual(
                 expected_sent_starts,
-                doc._.coref_chains.temp_sent_starts,
+                get_annotation_context(doc).sent_starts,
                 nlp.meta["name"],
             )
 
@@ -47,7 +47,7 @@ class CommonRulesTest(unittest.TestCase):
             rules_analyzer.initialize(doc)
             self.assertEqual(
                 expected_sent_indexes,
-                [token._.coref_chains.temp_sent_index for token in doc],
+                get_annotation_context(doc).sent_indexes,
                 nlp.meta["name"],
             )
 
@@ -59,6 +59,35 @@ class CommonRulesTest(unittest.TestCase):
             [0, 0, 0, 0, 0, 1, 1, 1, 1, 2, 2, 2, 2],
         )
 
+    def test_initialize_with_anaphor_indexes(self):
+        def func(nlp):
+
+            doc = nlp(
+                "Peter came in. Richard came in. Richard said he was tired. Then he "
+                "left. He came in."
+            )
+            rules_analyzer = RulesAnalyzerFactory().get_rules_analyzer(nlp)
+            rules_analyzer.initialize(doc)
+            potential_referreds = get_annotation_context(doc).potential_referreds
+            self.assertEqual(
+                [10, 15, 18], sorted(potential_referreds), nlp.meta["name"]
+            )
+            rules_analyzer.initialize(doc, [15])
+            self.assertEqual(
+                {
+                    token_index: potential_referreds[token_index]
+                    for token_index in (10, 15)
+                },
+                get_annotation_context(doc).potential_referreds,
+                nlp.meta["name"],
+            )
+            rules_analyzer.initialize(doc, [0, 10])
+            self.assertEqual(
+                [10], list(get_annotation_context(doc).potential_referreds)
+            )
+
+        self.all_nlps(func)
+
     def compare_get_dependent_sibling_info(
         self,
         doc_text,
@@ -76,36 +105,37 @@ class CommonRulesTest(unittest.TestCase):
             doc = nlp(doc_text)
             rules_analyzer = RulesAnalyzerFactory.get_rules_analyzer(nlp)
             rules_analyzer.initialize(doc)
+            context = get_annotation_context(doc)
             self.assertEqual(
                 expected_dependent_siblings,
-                str(doc[index]._.coref_chains.temp_dependent_siblings),
+                str(context.dependent_siblings[index]),
                 nlp.meta["name"],
             )
             for sibling in (
                 sibling
-                for sibling in doc[index]._.coref_chains.temp_dependent_siblings
+                for sibling in context.dependent_siblings[index]
                 if sibling.i != index
             ):
                 self.assertEqual(
                     doc[index],
-                    sibling._.coref_chains.temp_governing_sibling,
+                    context.governing_siblings[sibling.i],
                     nlp.meta["name"],
                 )
             if expected_governing_sibling is None:
                 self.assertEqual(
                     None,
-                    doc[index]._.coref_chains.temp_governing_sibling,
+                    context.governing_siblings[index],
                     nlp.meta["name"],
                 )
             else:
                 self.assertEqual(
                     doc[expected_governing_sibling],
-                    doc[index]._.coref_chains.temp_governing_sibling,
+                    context.governing_siblings[index],
                     nlp.meta["name"],
                 )
             self.assertEqual(
                 expected_has_or_coordination,
-                doc[index]._.coref_chains.temp_has_or_coordination,
+                context.has_or_coordination[index],
                 nlp.meta["name"],
             )
 
@@ -188,7 +218,7 @@ class CommonRulesTest(unittest.TestCase):
             rules_analyzer.initialize(doc)
             self.assertEqual(
                 expected_quote_array,
-                doc[index]._.coref_chains.temp_quote_array,
+                get_annotation_context(doc).quote_arrays[index],
                 nlp.meta["name"],
             )
 
@@ -225,6 +255,17 @@ class CommonRulesTest(unittest.TestCase):
                 ),
                 nlp.meta["name"],
             )
+            if expected_truth:
+                # the index of coreferring noun candidates must not exclude the pair
+                referred_keys = rules_analyzer.get_coreferring_noun_keys(
+                    doc[referred_index], False
+                )
+                referring_keys = rules_analyzer.get_coreferring_noun_keys(
+                    doc[referring_index], True
+                )
+                self.assertFalse(
+                    referred_keys.isdisjoint(referring_keys), nlp.meta["name"]
+                )
 
         self.all_nlps(func)
 
@@ -327,12 +368,13 @@ class CommonRulesTest(unittest.TestCase):
             "The dog, the dog and the dog came home.", 4, 7, False
         )
 
-    def test_potentially_independent_nouns_stored_on_token(self):
+    def test_potentially_independent_nouns_stored_in_context(self):
         doc = self.sm_nlp("They went to look at the space suits")
         self.sm_rules_analyzer.initialize(doc)
-        self.assertFalse(doc[3]._.coref_chains.temp_potentially_referring)
-        self.assertFalse(doc[6]._.coref_chains.temp_potentially_referring)
-        self.assertTrue(doc[7]._.coref_chains.temp_potentially_referring)
+        potentially_referring = get_annotation_context(doc).potentially_referring
+        self.assertFalse(potentially_referring[3])
+        self.assertFalse(potentially_referring[6])
+        self.assertTrue(potentially_referring[7])
 
     def compare_potential_pair(
         self,
@@ -0,0 +1,142 @@
+import unittest
+import subprocess
+import sys
+import numpy as np
+from coreferee.test_utils import get_nlps
+from coreferee.errors import CorefereeError
+from coreferee.inference import export_runtime_bundle, get_pair_inputs
+from coreferee.inference import load_thinc_model
+from coreferee.quantisation import quantise_thinc_model
+from coreferee.runtime import NumpyEnsemble
+from coreferee.tendencies import DocumentPairInfo, ENSEMBLE_SIZE
+from coreferee.tendencies import create_distilled_thinc_model
+
+TEXTS = {
+    "en": "Although he was very busy with his work, Peter had had enough of it. He and his wife decided they needed a holiday. They travelled to Spain because they loved the country very much.",
+    "de": "Obwohl er mit seiner Arbeit sehr beschäftigt war, hatte Peter genug davon. Er und seine Frau entschieden, dass sie Urlaub brauchten. Sie fuhren nach Spanien, weil sie das Land sehr mochten.",
+    "fr": "Même s'il était très occupé par son travail, Pierre en avait marre. Lui et sa femme ont décidé qu'ils avaient besoin de vacances. Ils sont allés en Espagne parce qu'ils adoraient le pays.",
+    "pl": "Chociaż był bardzo zajęty swoją pracą, Piotr miał jej dość. On i jego żona zdecydowali, że potrzebują urlopu. Pojechali do Hiszpanii, bo bardzo kochali ten kraj.",
+    "ru": "Хотя он был очень занят своей работой, Пётр устал от неё. Он и его жена решили, что им нужен отпуск. Они поехали в Испанию, потому что очень любили эту страну.",
+}
+
+
+class CommonRuntimeTest(unittest.TestCase):
+    def setUp(self):
+
+        self.nlps = [nlp for language in TEXTS for nlp in get_nlps(language)]
+
+    def all_nlps(self, func):
+        for nlp in self.nlps:
+            func(nlp)
+
+    def get_document_pair_info(self, nlp):
+        annotator = nlp.get_pipe("coreferee").annotator
+        doc = nlp(TEXTS[nlp.meta["lang"]])
+        annotator.rules_analyzer.initialize(doc)
+        return DocumentPairInfo.from_doc(
+            doc, annotator.tendencies_analyzer, ENSEMBLE_SIZE
+        )
+
+    def test_runtime_matches_thinc_model(self):
+        def func(nlp):
+            annotator = nlp.get_pipe("coreferee").annotator
+            document_pair_info = self.get_document_pair_info(nlp)
+            numpy_ensemble = NumpyEnsemble.from_bytes(
+                export_runtime_bundle(annotator.thinc_ensemble)
+            )
+            thinc_predictions = annotator.thinc_ensemble.predict([document_pair_info])
+            runtime_predictions = numpy_ensemble.predict(
+                [get_pair_inputs(document_pair_info)]
+            )
+            self.assertEqual(len(thinc_predictions), len(runtime_predictions))
+            for thinc_prediction, runtime_prediction in zip(
+                thinc_predictions, runtime_predictions
+            ):
+                self.assertEqual(thinc_prediction.shape, runtime_prediction.shape)
+                self.assertTrue(
+                    np.allclose(thinc_prediction, runtime_prediction, atol=1e-5),
+                    nlp.meta["name"],
+                )
+
+        self.all_nlps(func)
+
+    def test_runtime_ensemble_subset(self):
+        def func(nlp):
+            annotator = nlp.get_pipe("coreferee").annotator
+            document_pair_info = self.get_document_pair_info(nlp)
+            numpy_ensemble = NumpyEnsemble.from_bytes(
+                export_runtime_bundle(annotator.thinc_ensemble), ensemble_size=2
+            )
+            for thinc_prediction, runtime_prediction in zip(
+                annotator.thinc_ensemble.predict([document_pair_info]),
+                numpy_ensemble.predict([get_pair_inputs(document_pair_info)]),
+            ):
+                self.assertTrue(
+                    np.allclose(thinc_prediction[:, :2], runtime_prediction, atol=1e-5),
+                    nlp.meta["name"],
+                )
+            with self.assertRaises(CorefereeError):
+                numpy_ensemble.predict(
+                    [get_pair_inputs(document_pair_info)],
+                    ensemble_size=ENSEMBLE_SIZE + 1,
+                )
+
+        self.all_nlps(func)
+
+    def test_runtime_no_pairs(self):
+        def func(nlp):
+            annotator = nlp.get_pipe("coreferee").annotator
+            numpy_ensemble = NumpyEnsemble.from_bytes(
+                export_runtime_bundle(annotator.thinc_ensemble)
+            )
+            self.assertEqual([], numpy_ensemble.predict([]))
+
+        self.all_nlps(func)
+
+    def test_load_thinc_model_architectures(self):
+        def func(nlp):
+            annotator = nlp.get_pipe("coreferee").annotator
+            document_pair_info = self.get_document_pair_info(nlp)
+            distilled_thinc_model = create_distilled_thinc_model()
+            distilled_thinc_model.initialize(
+                X=[document_pair_info],
+                Y=[
+                    np.ones((length, 1), dtype="float32")
+                    for length in document_pair_info.candidates.lengths.tolist()
+                ],
+            )
+            for thinc_model, member_count in (
+                (annotator.thinc_ensemble, ENSEMBLE_SIZE),
+                (distilled_thinc_model, 1),
+            ):
+                loaded_thinc_model = load_thinc_model(thinc_model.to_bytes())
+                self.assertEqual(
+                    member_count,
+                    NumpyEnsemble.from_bytes(
+                        export_runtime_bundle(loaded_thinc_model)
+                    ).member_count,
+                )
+            quantised_thinc_model = load_thinc_model(
+                quantise_thinc_model(annotator.thinc_ensemble, "float16")
+            )
+            for prediction, quantised_prediction in zip(
+                annotator.thinc_ensemble.predict([document_pair_info]),
+                quantised_thinc_model.predict([document_pair_info]),
+            ):
+                self.assertTrue(
+                    np.allclose(prediction, quantised_prediction, atol=0.01),
+                    nlp.meta["name"],
+                )
+
+        self.all_nlps(func)
+
+    def test_runtime_import_without_spacy(self):
+        # Importing spaCy or thinc fails in the subprocess as if they were not installed
+        script = "; ".join(
+            (
+                "import sys",
+                "sys.modules['spacy'] = sys.modules['thinc'] = None",
+                "from coreferee.runtime import NumpyEnsemble",
+            )
+        )
+        subprocess.run([sys.executable, "-c", script], check=True)
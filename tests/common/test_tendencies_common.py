@@ -4,7 +4,7 @@ import numpy as np
 from coreferee.rules import RulesAnalyzerFactory
 from coreferee.test_utils import get_nlps
 from coreferee.tendencies import TendenciesAnalyzer, generate_feature_table
-from coreferee.data_model import Mention
+from coreferee.data_model import Mention, get_annotation_context
 
 nlps = get_nlps("en")
 train_version_mismatch = False
@@ -48,7 +48,9 @@ class CommonTendenciesTest(unittest.TestCase):
         mention = Mention(doc[0], False)
         feature_map = self.sm_tendencies_analyzer.get_feature_map(mention, doc)
         self.assertEqual(len(self.sm_feature_table), len(feature_map))
-        self.assertEqual(mention.temp_feature_map, feature_map)
+        self.assertEqual(
+            get_annotation_context(doc).mention_feature_maps[mention], feature_map
+        )
         if nlp.meta["version"] == "3.2.0":
             self.assertEqual(
                 [
@@ -188,7 +190,7 @@ class CommonTendenciesTest(unittest.TestCase):
         self.sm_rules_analyzer.initialize(doc)
         feature_map = self.sm_tendencies_analyzer.get_feature_map(doc[0], doc)
         self.assertEqual(len(self.sm_feature_table), len(feature_map))
-        self.assertEqual(doc[0]._.coref_chains.temp_feature_map, feature_map)
+        self.assertEqual(get_annotation_context(doc).token_feature_maps[0], feature_map)
         if nlp.meta["version"] == "3.2.0":
             self.assertEqual(
                 [
@@ -533,7 +535,9 @@ class CommonTendenciesTest(unittest.TestCase):
         doc = self.sm_nlp("Richard said he was entering the big house")
         self.sm_rules_analyzer.initialize(doc)
         position_map = self.sm_tendencies_analyzer.get_position_map(doc[0], doc)
-        self.assertEqual(doc[0]._.coref_chains.temp_position_map, position_map)
+        self.assertEqual(
+            get_annotation_context(doc).token_position_maps[0], position_map
+        )
         self.assertEqual([0, 1, 1, 0, 0, 0, 0], position_map)
 
         position_map = self.sm_tendencies_analyzer.get_position_map(doc[2], doc)
@@ -548,7 +552,9 @@ class CommonTendenciesTest(unittest.TestCase):
         self.sm_rules_analyzer.initialize(doc)
         mention = Mention(doc[0], False)
         position_map = self.sm_tendencies_analyzer.get_position_map(mention, doc)
-        self.assertEqual(mention.temp_position_map, position_map)
+        self.assertEqual(
+            get_annotation_context(doc).mention_position_maps[mention], position_map
+        )
         self.assertEqual([0, 1, 1, 0, 0, 0, 0], position_map)
 
         position_map = self.sm_tendencies_analyzer.get_position_map(
@@ -944,3 +950,42 @@ class CommonTendenciesTest(unittest.TestCase):
                 Mention(doc[0], False), doc[3]
             ),
         )
+
+    def test_get_scoring_batches(self):
+        doc = self.sm_nlp(
+            "Richard and Peter came in. Jane saw them. He said she had seen him."
+        )
+        mentions = [Mention(token, False) for token in doc]
+        referrers_to_candidates = {
+            8: mentions[:2],
+            10: mentions[:3],
+            12: mentions[:4],
+            15: mentions[:1],
+        }
+        self.assertEqual(
+            [[8, 10], [12, 15]],
+            [
+                list(batch)
+                for batch in TendenciesAnalyzer.get_scoring_batches(
+                    referrers_to_candidates, 5
+                )
+            ],
+        )
+        self.assertEqual(
+            [[8], [10], [12], [15]],
+            [
+                list(batch)
+                for batch in TendenciesAnalyzer.get_scoring_batches(
+                    referrers_to_candidates, 1
+                )
+            ],
+        )
+        self.assertEqual(
+            [[8, 10, 12, 15]],
+            [
+                list(batch)
+                for batch in TendenciesAnalyzer.get_scoring_batches(
+                    referrers_to_candidates, None
+                )
+            ],
+        )
@@ -4,6 +4,7 @@ import pytest
 import spacy
 from coreferee.rules import RulesAnalyzerFactory
 from coreferee.tendencies import *
+from coreferee.data_model import get_annotation_context
 from coreferee.test_utils import get_nlps
 from thinc.backends import get_current_ops
 
@@ -50,8 +51,9 @@ def setup_training_doc():
     feature_table = generate_feature_table([doc], nlp)
     tendencies_analyzer = TendenciesAnalyzer(rules_analyzer, nlp, feature_table)
     # linguistically nonsensical labels that only serve to test wiring
-    doc[10]._.coref_chains.temp_potential_referreds[2].true_in_training = True
-    doc[12]._.coref_chains.temp_potential_referreds[0].true_in_training = True
+    potential_referreds = get_annotation_context(doc).potential_referreds
+    potential_referreds[10][2].true_in_training = True
+    potential_referreds[12][0].true_in_training = True
     return DocumentPairInfo.from_doc(doc, tendencies_analyzer, 5, is_train=True)
 
 
@@ -64,8 +66,9 @@ def setup_training_doc_with_spanned():
     feature_table = generate_feature_table([doc], nlp)
     tendencies_analyzer = TendenciesAnalyzer(rules_analyzer, nlp, feature_table)
     # linguistically nonsensical labels that only serve to test wiring
-    doc[10]._.coref_chains.temp_potential_referreds[1].spanned_in_training = True
-    doc[10]._.coref_chains.temp_potential_referreds[2].true_in_training = True
+    potential_referreds = get_annotation_context(doc).potential_referreds
+    potential_referreds[10][1].spanned_in_training = True
+    potential_referreds[10][2].true_in_training = True
     return DocumentPairInfo.from_doc(doc, tendencies_analyzer, 5, is_train=True)
 
 
@@ -79,34 +82,31 @@ def test_dpi_normal(setup_simple_example):
     assert list(document_pair_info.candidates.lengths) == [4, 2]
     assert list(document_pair_info.referrers2candidates_pointers) == [0, 0, 0, 0, 1, 1]
     assert document_pair_info.training_outputs is None
+    context = get_annotation_context(document_pair_info.doc)
     for index in range(6):
         pointed_to_referrer = document_pair_info.referrers2candidates_pointers[index]
         referrer = document_pair_info.referrers[pointed_to_referrer]
-        referrer_feature_map = document_pair_info.doc[
-            referrer
-        ]._.coref_chains.temp_feature_map
+        referrer_feature_map = context.token_feature_maps[referrer]
         assert list(document_pair_info.static_infos[index][:33]) == list(
             referrer_feature_map
         )
-        referrer_position_map = document_pair_info.doc[
-            referrer
-        ]._.coref_chains.temp_position_map
+        referrer_position_map = context.token_position_maps[referrer]
         assert list(document_pair_info.static_infos[index][33:40]) == list(
             referrer_position_map
         )
         working_antecedent_index = index if index < 4 else index - 4
-        working_mention = document_pair_info.doc[
-            referrer
-        ]._.coref_chains.temp_potential_referreds[working_antecedent_index]
-        antecedent_feature_map = working_mention.temp_feature_map
+        working_mention = context.potential_referreds[referrer][
+            working_antecedent_index
+        ]
+        antecedent_feature_map = context.mention_feature_maps[working_mention]
         assert list(document_pair_info.static_infos[index][40:73]) == list(
             antecedent_feature_map
         )
-        antecedent_position_map = working_mention.temp_position_map
+        antecedent_position_map = context.mention_position_maps[working_mention]
         assert list(document_pair_info.static_infos[index][73:80]) == list(
             antecedent_position_map
         )
-        compatibility_map = working_mention.temp_compatibility_map
+        compatibility_map = context.compatibility_maps[(referrer, working_mention)]
         assert list(document_pair_info.static_infos[index][80:]) == list(
             compatibility_map
         )
@@ -1,7 +1,7 @@
 import unittest
 from coreferee.rules import RulesAnalyzerFactory
 from coreferee.test_utils import get_nlps
-from coreferee.data_model import Mention
+from coreferee.data_model import Mention, get_annotation_context
 
 nlps = get_nlps("de")
 if len(nlps) == 0:
@@ -40,36 +40,37 @@ class GermanRulesTest(unittest.TestCase):
             doc = nlp(doc_text)
             rules_analyzer = RulesAnalyzerFactory.get_rules_analyzer(nlp)
             rules_analyzer.initialize(doc)
+            context = get_annotation_context(doc)
             self.assertEqual(
                 expected_dependent_siblings,
-                str(doc[index]._.coref_chains.temp_dependent_siblings),
+                str(context.dependent_siblings[index]),
                 nlp.meta["name"],
             )
             for sibling in (
                 sibling
-                for sibling in doc[index]._.coref_chains.temp_dependent_siblings
+                for sibling in context.dependent_siblings[index]
                 if sibling.i != index
             ):
                 self.assertEqual(
                     doc[index],
-                    sibling._.coref_chains.temp_governing_sibling,
+                    context.governing_siblings[sibling.i],
                     nlp.meta["name"],
                 )
             if expected_governing_sibling is None:
                 self.assertEqual(
                     None,
-                    doc[index]._.coref_chains.temp_governing_sibling,
+                    context.governing_siblings[index],
                     nlp.meta["name"],
                 )
             else:
                 self.assertEqual(
                     doc[expected_governing_sibling],
-                    doc[index]._.coref_chains.temp_governing_sibling,
+                    context.governing_siblings[index],
                     nlp.meta["name"],
                 )
             self.assertEqual(
                 expected_has_or_coordination,
-                doc[index]._.coref_chains.temp_has_or_coordination,
+                context.has_or_coordination[index],
                 nlp.meta["name"],
             )
 
@@ -21,7 +21,7 @@ import spacy
 import coreferee
 from coreferee.rules import RulesAnalyzerFactory
 from coreferee.test_utils import get_nlps
-from coreferee.data_model import Mention
+from coreferee.data_model import Mention, get_annotation_context
 
 
 class RussianRulesTest(unittest.TestCase):
@@ -48,21 +48,22 @@ class RussianRulesTest(unittest.TestCase):
             doc = nlp(doc_text)
             rules_analyzer = RulesAnalyzerFactory.get_rules_analyzer(nlp)
             rules_analyzer.initialize(doc)
+            context = get_annotation_context(doc)
             self.assertEqual(expected_dependent_siblings, str(
-                doc[index]._.coref_chains.temp_dependent_siblings), nlp.meta['name'])
+                context.dependent_siblings[index]), nlp.meta['name'])
             for sibling in (sibling for sibling in
-                            doc[index]._.coref_chains.temp_dependent_siblings if
+                            context.dependent_siblings[index] if
                             sibling.i != index):
-                self.assertEqual(doc[index], sibling._.coref_chains.temp_governing_sibling,
+                self.assertEqual(doc[index], context.governing_siblings[sibling.i],
                                  nlp.meta['name'])
             if expected_governing_sibling is None:
-                self.assertEqual(None, doc[index]._.coref_chains.temp_governing_sibling,
+                self.assertEqual(None, context.governing_siblings[index],
                                  nlp.meta['name'])
             else:
                 self.assertEqual(doc[expected_governing_sibling],
-                                 doc[index]._.coref_chains.temp_governing_sibling, nlp.meta['name'])
+                                 context.governing_siblings[index], nlp.meta['name'])
             self.assertEqual(expected_has_or_coordination,
-                             doc[index]._.coref_chains.temp_has_or_coordination, nlp.meta['name'])
+                             context.has_or_coordination[index], nlp.meta['name'])
 
         self.all_nlps(func)
 